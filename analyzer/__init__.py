@@ -0,0 +1,3 @@
+"""
+Support modules for the NextGen Resume Analyzer Streamlit app.
+"""
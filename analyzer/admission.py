@@ -0,0 +1,299 @@
+import contextlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from analyzer.metrics import ADMISSION_WAIT_SECONDS
+
+# ===========================
+# Upstream Admission Control
+# ===========================
+# Every process on the host (Streamlit, API workers, batch runs) shares one
+# OpenRouter quota. Two limits keep it from running dry, both kept in a small
+# SQLite file so they hold across processes:
+#   - a token bucket that every upstream HTTP attempt draws from; a 429 empties
+#     it and pauses all processes for the Retry-After delay, instead of each
+#     session retrying on its own;
+#   - a fair queue of analyses with a global and a per-client cap on how many
+#     run at once. Waiting analyses are admitted round-robin across clients
+#     (a client's n-th waiting analysis goes after every other client's
+#     first), so one large batch cannot starve interactive users, and each
+#     waiter learns its position and an estimated wait.
+# Only analyses that miss the cache and lead their single-flight group queue.
+
+DEFAULT_ADMISSION_PATH = os.environ.get("LLM_ADMISSION_DB", "llm_admission.db")
+# Upstream requests per minute for the whole host (0 = unlimited) and how many may be sent in a burst
+REQUESTS_PER_MINUTE = float(os.environ.get("LLM_REQUESTS_PER_MINUTE", 0))
+BURST = int(os.environ.get("LLM_BURST", 5))
+# Analyses talking to the LLM at once, across processes and per client (0 = no cap)
+MAX_CONCURRENT = int(os.environ.get("LLM_MAX_CONCURRENT", 8))
+MAX_PER_CLIENT = int(os.environ.get("LLM_MAX_PER_CLIENT", 2))
+# Waiters re-check the queue at most this often; further back in line, less often
+POLL_SECONDS = 0.25
+MAX_POLL_SECONDS = 2.0
+# Tickets of processes that died without releasing them are dropped this often
+SWEEP_SECONDS = 5.0
+# Estimated analysis time until the first ones finish, and the weight of each new sample
+DEFAULT_SERVICE_SECONDS = 20.0
+SERVICE_TIME_WEIGHT = 0.2
+
+ADMISSION_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS rate_bucket (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        tokens REAL NOT NULL,
+        updated REAL NOT NULL,
+        paused_until REAL NOT NULL DEFAULT 0,
+        service_seconds REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS admission_ticket (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        client TEXT NOT NULL,
+        pid INTEGER NOT NULL,
+        enqueued REAL NOT NULL,
+        started REAL
+    );
+'''
+
+
+def process_alive(pid):
+    """
+    Whether a process with this pid is running on this machine.
+    """
+    if pid is None:
+        return False
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        # Signal 0 is not a liveness probe on Windows; assume other processes are alive
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def fair_order(tickets):
+    """
+    Orders the waiting tickets of [(id, client, started)] round-robin across
+    clients: a client's n-th waiting ticket ranks n plus the number it
+    already has running, and ties go to the oldest ticket.
+    """
+    running = Counter(client for _, client, started in tickets if started is not None)
+    seen = Counter()
+    ranked = []
+    for ticket_id, client, started in tickets:
+        if started is None:
+            seen[client] += 1
+            ranked.append((running[client] + seen[client], ticket_id, client))
+    return [(ticket_id, client) for _, ticket_id, client in sorted(ranked)], running
+
+
+class AdmissionControl:
+    """
+    Cross-process token bucket and fair concurrency queue for upstream LLM
+    requests, stored in a SQLite file.
+    """
+
+    def __init__(self, path=DEFAULT_ADMISSION_PATH, requests_per_minute=REQUESTS_PER_MINUTE, burst=BURST,
+                 max_concurrent=MAX_CONCURRENT, max_per_client=MAX_PER_CLIENT):
+        self.path = path
+        self.requests_per_minute = requests_per_minute
+        self.burst = max(burst, 1)
+        self.max_concurrent = max_concurrent
+        self.max_per_client = max_per_client
+        self._lock = threading.Lock()
+        # Wakes this process's waiters as soon as one of its analyses finishes
+        self._released = threading.Condition()
+        self._last_sweep = 0.0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(ADMISSION_SCHEMA)
+        with self._transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO rate_bucket (id, tokens, updated, service_seconds) "
+                         "VALUES (1, ?, ?, ?)", (self.burst, time.time(), DEFAULT_SERVICE_SECONDS))
+            # A ticket with our pid was left by an earlier process that had the same pid
+            conn.execute("DELETE FROM admission_ticket WHERE pid = ?", (os.getpid(),))
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so read-modify-write is atomic across processes
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _take_token(self):
+        """
+        Takes one token; returns 0, or the seconds to wait before trying again.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            tokens, updated, paused_until = conn.execute(
+                "SELECT tokens, updated, paused_until FROM rate_bucket WHERE id = 1").fetchone()
+            if now < paused_until:
+                return paused_until - now
+            if self.requests_per_minute <= 0:
+                return 0
+            rate = self.requests_per_minute / 60
+            tokens = min(self.burst, tokens + max(now - updated, 0) * rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            conn.execute("UPDATE rate_bucket SET tokens = ?, updated = ? WHERE id = 1",
+                         (tokens - 1 if not wait else tokens, now))
+            return wait
+
+    def acquire(self):
+        """
+        Blocks until the bucket allows another upstream request.
+        """
+        started = time.perf_counter()
+        while True:
+            wait = self._take_token()
+            if not wait:
+                break
+            time.sleep(min(wait, MAX_POLL_SECONDS))
+        ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started, kind="token")
+
+    def penalize(self, seconds):
+        """
+        Empties the bucket and holds every process's requests for the given
+        seconds, after the upstream answered 429.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("UPDATE rate_bucket SET tokens = 0, updated = ?, paused_until = MAX(paused_until, ?) "
+                         "WHERE id = 1", (now, now + seconds))
+
+    def _sweep(self, conn, now):
+        if now - self._last_sweep < SWEEP_SECONDS:
+            return
+        self._last_sweep = now
+        for (pid,) in conn.execute("SELECT DISTINCT pid FROM admission_ticket").fetchall():
+            if not process_alive(pid):
+                conn.execute("DELETE FROM admission_ticket WHERE pid = ?", (pid,))
+
+    def _try_start(self, ticket_id):
+        """
+        Starts the ticket if the caps leave room for it after every ticket
+        ahead of it in the fair order. Returns (0, 0) once started, otherwise
+        (position in the queue, estimated seconds to wait).
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            self._sweep(conn, now)
+            tickets = conn.execute("SELECT id, client, started FROM admission_ticket ORDER BY id").fetchall()
+            waiting, running = fair_order(tickets)
+            free = self.max_concurrent - sum(running.values()) if self.max_concurrent > 0 else len(waiting)
+            for other_id, client in waiting:
+                if free <= 0:
+                    break
+                if self.max_per_client > 0 and running[client] >= self.max_per_client:
+                    continue
+                if other_id == ticket_id:
+                    conn.execute("UPDATE admission_ticket SET started = ? WHERE id = ?", (now, ticket_id))
+                    return 0, 0
+                # Admitted ahead of us: its slot is spoken for even before its owner claims it
+                free -= 1
+                running[client] += 1
+            service_seconds, paused_until = conn.execute(
+                "SELECT service_seconds, paused_until FROM rate_bucket WHERE id = 1").fetchone()
+        # A ticket swept away from under us (it never is while this process lives) no longer waits
+        position = next((n for n, (other_id, _) in enumerate(waiting, 1) if other_id == ticket_id), 0)
+        eta = math.ceil(position / self.max_concurrent) * service_seconds if self.max_concurrent > 0 \
+            else service_seconds
+        if self.requests_per_minute > 0:
+            eta = max(eta, position * 60 / self.requests_per_minute)
+        return position, eta + max(paused_until - now, 0)
+
+    @contextlib.contextmanager
+    def slot(self, client, on_wait=None):
+        """
+        Context manager that waits for the client's turn to run an analysis
+        against the LLM and holds the slot until the block exits.
+        on_wait(position, eta_seconds) is called on every check while the
+        analysis waits, and with (0, 0) once it is admitted.
+        """
+        if self.max_concurrent <= 0 and self.max_per_client <= 0:
+            yield
+            return
+        requested = time.perf_counter()
+        with self._transaction() as conn:
+            ticket_id = conn.execute("INSERT INTO admission_ticket (client, pid, enqueued) VALUES (?, ?, ?)",
+                                     (client, os.getpid(), time.time())).lastrowid
+        admitted = None
+        try:
+            position, eta = self._try_start(ticket_id)
+            waited = bool(position)
+            while position:
+                if on_wait is not None:
+                    on_wait(position, eta)
+                with self._released:
+                    self._released.wait(min(POLL_SECONDS * position, MAX_POLL_SECONDS))
+                position, eta = self._try_start(ticket_id)
+            if waited and on_wait is not None:
+                on_wait(0, 0)
+            admitted = time.perf_counter()
+            ADMISSION_WAIT_SECONDS.observe(admitted - requested, kind="slot")
+            yield
+        finally:
+            self._release(ticket_id, None if admitted is None else time.perf_counter() - admitted)
+
+    def _release(self, ticket_id, seconds):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM admission_ticket WHERE id = ?", (ticket_id,))
+            if seconds is not None:
+                # Moving average of how long an admitted analysis holds its slot, for wait estimates
+                conn.execute("UPDATE rate_bucket SET service_seconds = service_seconds * ? + ? * ? WHERE id = 1",
+                             (1 - SERVICE_TIME_WEIGHT, SERVICE_TIME_WEIGHT, seconds))
+        with self._released:
+            self._released.notify_all()
+
+    def stats(self):
+        """
+        Returns the analyses running and waiting on the host, the clients
+        waiting, the tokens left, the remaining 429 pause and the average
+        analysis time.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            tokens, updated, paused_until, service_seconds = conn.execute(
+                "SELECT tokens, updated, paused_until, service_seconds FROM rate_bucket WHERE id = 1").fetchone()
+            running, waiting, clients = conn.execute(
+                "SELECT COUNT(started), COUNT(*) - COUNT(started), "
+                "COUNT(DISTINCT CASE WHEN started IS NULL THEN client END) FROM admission_ticket").fetchone()
+        if self.requests_per_minute > 0 and now >= paused_until:
+            tokens = min(self.burst, tokens + max(now - updated, 0) * self.requests_per_minute / 60)
+        return {
+            "running": running,
+            "waiting": waiting,
+            "waiting_clients": clients,
+            "tokens": tokens if self.requests_per_minute > 0 else None,
+            "paused_seconds": max(paused_until - now, 0),
+            "service_seconds": service_seconds,
+        }
+
+
+_admission = None
+_admission_lock = threading.Lock()
+
+
+def get_admission():
+    """
+    Returns the process-wide AdmissionControl, creating it on first use.
+    """
+    global _admission
+    if _admission is None:
+        with _admission_lock:
+            if _admission is None:
+                _admission = AdmissionControl()
+    return _admission
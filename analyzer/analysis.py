@@ -0,0 +1,475 @@
+import contextlib
+import copy
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from analyzer.admission import get_admission
+from analyzer.cache import make_cache_key
+from analyzer.compaction import DEFAULT_TOKEN_BUDGET, compact_resume, estimate_tokens
+from analyzer.http_client import CircuitOpenError, get_http_client
+from analyzer.metrics import (API_ERRORS, INVALID_SECTIONS, JSON_PARSE_FAILURES, JSON_PARSE_SECONDS,
+                              LLM_REQUEST_SECONDS, VALIDATE_SECONDS, timed)
+from analyzer.parsing import parse_json_object, validate_analysis, validate_field
+from analyzer.prescore import LOCAL_FIELDS, prescore_resume
+from analyzer.routing import ModelRouter
+from analyzer.sections import section_inputs
+from analyzer.singleflight import SingleFlight
+from analyzer.streaming import stream_analysis
+
+# ===========================
+# API Configuration & Resume Analysis
+# ===========================
+# The analysis pipeline lives here, free of Streamlit, so the dashboard, the
+# batch runner and other entry points all share one implementation.
+
+# OPENROUTER_API_URL lets the app be pointed at a local stub server
+API_URL = os.environ.get("OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions")
+# Models in order of preference, with per-model timeouts (LLM_MODELS, see
+# analyzer.routing); the first one names cache entries
+model_router = ModelRouter.from_env()
+MODEL_NAME = model_router.models[0].name
+# Bump whenever the prompt below changes so stale cached analyses are not reused
+PROMPT_VERSION = "2"
+
+# Estimated tokens of resume text allowed into the prompt; longer CVs are
+# trimmed section by section (see analyzer.compaction)
+PROMPT_TOKEN_BUDGET = int(os.environ.get("PROMPT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+
+# "full": LLM for everything; "hybrid": local pre-scoring plus LLM for generated
+# sections only; "fast": local pre-scoring only, no LLM call; "sections": one
+# LLM prompt per section, run in parallel and cached section by section
+ANALYSIS_MODES = ("full", "hybrid", "fast", "sections")
+DEFAULT_ANALYSIS_MODE = os.environ.get("ANALYSIS_MODE", "full")
+# Sections that need generation; everything else comes from analyzer.prescore
+HYBRID_LLM_FIELDS = (
+    "recommended_skills", "course_recommendations", "appreciation", "resume_tips",
+    "ai_resume_summary", "matching_job_roles", "project_suggestions",
+)
+
+# Added to every result: the model(s) that produced it ("local" for the fast
+# mode) and how long this analysis took
+ANALYSIS_META_KEYS = ("model", "latency_ms")
+
+# How many times fields missing or invalid in an answer are asked for again
+MAX_SECTION_RETRIES = int(os.environ.get("MAX_SECTION_RETRIES", 1))
+
+# Parallel per-section prompts, shared by all analyses so the number of
+# concurrent upstream requests stays bounded
+SECTION_WORKERS = int(os.environ.get("SECTION_WORKERS", 4))
+section_pool = ThreadPoolExecutor(max_workers=SECTION_WORKERS, thread_name_prefix="section")
+
+# Process-wide; its stats() count how many analyses were coalesced
+analysis_flights = SingleFlight()
+
+
+@timed(JSON_PARSE_SECONDS)
+def extract_json(response_text):
+    """
+    Extracts the JSON answer from the model's output, skipping reasoning and
+    repairing small syntax errors (see analyzer.parsing). Returns {} if none
+    is found.
+    """
+    return parse_json_object(response_text)
+
+
+@timed(VALIDATE_SECONDS)
+def validate_resume(text):
+    """
+    Checks if the extracted text contains common resume keywords.
+    """
+    keywords = ["education", "experience", "skills", "projects", "certifications"]
+    return any(keyword in text.lower() for keyword in keywords)
+
+
+def parse_resume_score(resume_score_raw):
+    """
+    Converts the model's "XX/100" score into an integer, defaulting to 70.
+    """
+    if isinstance(resume_score_raw, int):
+        return resume_score_raw
+    if isinstance(resume_score_raw, str):
+        resume_score_match = re.search(r'\d+', resume_score_raw)
+        return int(resume_score_match.group()) if resume_score_match else 70
+    return 70
+
+
+PROMPT_INTRO = """
+You are an expert resume analyzer. You must produce valid JSON output and ensure all URLs are valid and relevant to the recommended courses. Additionally, you must tailor job roles to the candidate’s experience level. For example, if the resume indicates an entry-level or student background, include junior- or intern-level job roles (e.g., 'Data Science Intern', 'Junior Data Scientist', 'Machine Learning Intern') rather than exclusively senior positions.
+
+"""
+
+SCORE_CRITERIA = """Evaluation Criteria for Resume Score:
+- Formatting and structure (clear sections, bullet points)
+- ATS Optimization (use of industry-relevant keywords)
+- Content Quality (clarity, conciseness, grammar)
+- Relevance (matching skills and experience)
+- Readability and presentation
+
+"""
+
+# Specification of each top-level field in the JSON the model must return
+RESPONSE_FIELDS = {
+    "basic_info": """    "basic_info": {
+        "name": string,
+        "email": string,
+        "mobile": string,
+        "address": string
+    }""",
+    "skills": """    "skills": {
+        "current_skills": list of at least 5 key skills,
+        "recommended_skills": list of at least 5 skills for improvement
+    }""",
+    "course_recommendations": """    "course_recommendations": list of at least 5 courses with details as:
+    {
+        "platform": string,
+        "course_name": string,
+        "link": valid URL (ensure this is an active, relevant course URL)
+    }""",
+    "appreciation": """    "appreciation": list of at least 5 personalized positive comments""",
+    "resume_tips": """    "resume_tips": list of at least 5 suggestions for improvement""",
+    "resume_score": """    "resume_score": string (score in "XX/100" format)""",
+    "ai_resume_summary": """    "ai_resume_summary": string (a concise summary for ATS optimization)""",
+    "matching_job_roles": """    "matching_job_roles": list of 2-3 job roles specifically relevant to the candidate’s experience level""",
+    "ats_keywords": """    "ats_keywords": list of at least 5 industry-relevant keywords""",
+    "project_suggestions": """    "project_suggestions": {
+        "improvement_tips": list of 2-3 tips to enhance existing projects,
+        "new_project_recommendations": list of 2-3 suggested projects
+    }""",
+    # Only requested on its own when current skills are detected locally
+    "recommended_skills": """    "recommended_skills": list of at least 5 skills for improvement""",
+}
+
+FULL_RESPONSE_FIELDS = (
+    "basic_info", "skills", "course_recommendations", "appreciation", "resume_tips", "resume_score",
+    "ai_resume_summary", "matching_job_roles", "ats_keywords", "project_suggestions",
+)
+
+
+def build_prompt(resume_text, fields=FULL_RESPONSE_FIELDS):
+    """
+    Builds the analysis prompt for a resume, asking only for the given fields.
+    """
+    criteria = SCORE_CRITERIA if "resume_score" in fields else ""
+    structure = ",\n".join(RESPONSE_FIELDS[field] for field in fields)
+    return f"""{PROMPT_INTRO}{criteria}Return the JSON structure as follows:
+{{
+{structure}
+}}
+
+Ensure the JSON is valid before outputting.
+
+Here is the resume text:
+\"\"\"{resume_text}\"\"\"
+"""
+
+
+def request_analysis(prompt, api_key, on_section=None, fields=None):
+    """
+    Streams the model's answer to an analysis prompt, routed to the first
+    available model (see analyzer.routing). Returns the parsed JSON with the
+    answering model under "model", or a dict with an "error" message if every
+    model failed. fields are the keys the prompt asks for (see stream_completion).
+    """
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+
+    def send(model, emit, token, breaker, fail_fast):
+        payload = {
+            "model": model.name,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": True
+        }
+        # Without retries a rate-limited model hands over to the next one at once
+        options = {"timeout": (get_http_client().timeout[0], model.timeout), "breaker": breaker}
+        if fail_fast:
+            options["max_retries"] = 0
+        started = time.perf_counter()
+        data = stream_completion(payload, headers, emit, token, expected=fields, **options)
+        LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, model=model.name,
+                                    outcome="error" if "error" in data else "ok")
+        return data
+
+    data, model = model_router.complete(send, on_section)
+    if model is not None:
+        data["model"] = model
+    return data
+
+
+def stream_completion(payload, headers, on_section=None, cancel=None, expected=None, **post_options):
+    """
+    Posts a streaming chat completion and parses the JSON it returns,
+    counting API errors and JSON parse failures. cancel is an optional
+    CancelToken that lets another thread abort the request. When the object
+    parsed while streaming is empty or has none of the expected keys, the
+    whole text is parsed again with extract_json.
+    """
+    # Pooled session with timeouts, automatic retries on 429/5xx, a circuit breaker
+    # and the host-wide rate limit
+    try:
+        response = get_http_client().post(API_URL, headers=headers, json=payload, stream=True,
+                                          rate_limiter=get_admission(), **post_options)
+    except CircuitOpenError as e:
+        API_ERRORS.inc(status="circuit_open")
+        return {"error": str(e)}
+    except requests.RequestException as e:
+        API_ERRORS.inc(status="connection")
+        return {"error": f"Could not reach the API: {e}"}
+    if cancel is not None:
+        cancel.bind(response)
+    if response.status_code != 200:
+        API_ERRORS.inc(status=str(response.status_code))
+        return {"error": f"API Error {response.status_code}: {response.text}"}
+    try:
+        raw_response, data = stream_analysis(response, on_section)
+        if not data or (expected and not any(key in data for key in expected)):
+            # The streaming parser saw an aside (or nothing); the full-text parser picks the answer
+            data = extract_json(raw_response)
+        if cancel is not None and cancel.cancelled:
+            return {"error": "Request cancelled."}
+        if not data:
+            JSON_PARSE_FAILURES.inc()
+            return {"error": "No valid JSON found in API response."}
+        return data
+    except Exception as e:
+        # Closing the response from another thread surfaces as an arbitrary read error
+        if cancel is not None and cancel.cancelled:
+            return {"error": "Request cancelled."}
+        if isinstance(e, requests.RequestException):
+            API_ERRORS.inc(status="stream_interrupted")
+            return {"error": f"Streaming interrupted: {e}"}
+        JSON_PARSE_FAILURES.inc()
+        return {"error": f"Invalid JSON response from API: {e}"}
+    finally:
+        # Streamed responses hold their pooled connection until closed
+        response.close()
+
+
+def request_fields(resume_text, api_key, fields, on_section=None):
+    """
+    Asks the model for the given fields and keeps every one that passes
+    validation. Fields that are missing or malformed are requested again on
+    their own, up to MAX_SECTION_RETRIES times, instead of repeating the whole
+    analysis. on_section only sees validated values.
+    Returns the valid fields, or a dict with an "error" message if none were
+    obtained.
+    """
+    emit = on_section or (lambda key, value: None)
+    data, missing, models = {}, list(fields), []
+    for _ in range(MAX_SECTION_RETRIES + 1):
+        requested = set(missing)
+
+        def emit_valid(key, value):
+            if key in requested:
+                try:
+                    emit(key, validate_field(key, value))
+                except ValueError:
+                    pass
+
+        response = request_analysis(build_prompt(resume_text, missing), api_key, emit_valid, fields=missing)
+        if "error" in response:
+            if not data:
+                return response
+            break
+        valid, missing = validate_analysis(response, missing)
+        data.update(valid)
+        models.append(response.get("model"))
+        for field in missing:
+            INVALID_SECTIONS.inc(field=field)
+        if not missing:
+            break
+    if not data:
+        JSON_PARSE_FAILURES.inc()
+        return {"error": "The API response did not contain any valid analysis sections."}
+    data["model"] = join_models(models)
+    return data
+
+
+def join_models(names):
+    """
+    Joins the distinct model names that contributed to a result.
+    """
+    return ", ".join(dict.fromkeys(name for name in names if name))
+
+
+def analyze_sections(resume_text, api_key, cache=None, on_section=None, fields=FULL_RESPONSE_FIELDS,
+                     refresh=(), admit=None):
+    """
+    Generates each field with its own prompt, in parallel, from the parts of
+    the resume it reads (see analyzer.sections). Every field is cached under a
+    hash of its own input, so after a small edit only the fields whose input
+    changed are requested again; fields listed in refresh skip the cache.
+    Returns (data, requested): the fields obtained, or a dict with an "error"
+    message if none were, and the names of the fields sent to the LLM.
+    admit() returns the context manager held while fields are requested
+    (see analyze_resume).
+    """
+    emit = on_section or (lambda key, value: None)
+    inputs = section_inputs(resume_text, fields)
+    data, keys, models = {}, {}, []
+    for field in fields:
+        keys[field] = make_cache_key(inputs[field], MODEL_NAME, f"{PROMPT_VERSION}-section-{field}")
+        cached = cache.get(keys[field]) if cache is not None and field not in refresh else None
+        if cached is not None:
+            data[field] = cached[field]
+            models.append(cached.get("model"))
+            emit(field, cached[field])
+    requested = [field for field in fields if field not in data]
+
+    # Sections stream in from several threads at once
+    emit_lock = threading.Lock()
+
+    def emit_section(key, value):
+        with emit_lock:
+            emit(key, value)
+
+    def run(field):
+        def fetch(emit):
+            return request_fields(inputs[field], api_key, (field,), emit)
+
+        result, shared = analysis_flights.do(keys[field], fetch, emit_section)
+        if field in result and cache is not None and not shared:
+            cache.put(keys[field], {field: result[field], "model": result.get("model")})
+        return copy.deepcopy(result) if shared else result
+
+    errors, results = [], []
+    if requested:
+        # One admission slot covers all of the analysis's parallel section prompts
+        with (admit or contextlib.nullcontext)():
+            futures = [(field, section_pool.submit(run, field)) for field in requested]
+            results = [(field, future.result()) for field, future in futures]
+    for field, result in results:
+        if field in result:
+            data[field] = result[field]
+            models.append(result.get("model"))
+        else:
+            errors.append(result.get("error", f"No valid {field} in API response."))
+    if not data:
+        return {"error": errors[0]}, requested
+    data["model"] = join_models(models)
+    return data, requested
+
+
+def refresh_section(resume_text, field, api_key, cache=None, admit=None):
+    """
+    Regenerates one field of an analysis, ignoring (and then replacing) its
+    cached value. Returns the new value, or a dict with an "error" message.
+    """
+    compacted, _ = compact_resume(resume_text, PROMPT_TOKEN_BUDGET)
+    data, _ = analyze_sections(compacted, api_key, cache, fields=(field,), refresh=(field,), admit=admit)
+    return data.get(field, data)
+
+
+def analyze_resume(resume_text, api_key, cache=None, on_section=None, mode=DEFAULT_ANALYSIS_MODE,
+                   on_prompt=None, admit=None):
+    """
+    Analyzes resume text and returns the analysis result, or a dict with an
+    "error" message if the analysis failed.
+
+    mode "full" asks the LLM for every section; "hybrid" computes contact
+    details, current skills, ATS keywords and the score locally and asks the
+    LLM only for generated sections; "fast" skips the LLM entirely;
+    "sections" asks for every section with its own parallel prompt and caches
+    each one separately (see analyze_sections).
+    The result also records the answering model(s) and the latency in
+    milliseconds under ANALYSIS_META_KEYS.
+    on_section(key, value) is called for each top-level section as soon as it
+    is available. LLM results are served from the cache when the same resume
+    was already analyzed with the current model, prompt version and mode.
+    on_prompt(usage) receives the token estimates and latency of every
+    LLM-backed analysis (cache hits included). Concurrent calls for the same
+    resume and mode share a single upstream request.
+    admit() returns a context manager held around the upstream request,
+    typically an AdmissionControl slot (see analyzer.admission); only calls
+    that actually go upstream enter it.
+    """
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"Unknown analysis mode {mode!r}")
+    admit = admit or contextlib.nullcontext
+    started = time.perf_counter()
+    emit = on_section or (lambda key, value: None)
+    local = prescore_resume(resume_text) if mode in ("hybrid", "fast") else None
+    if mode == "fast":
+        for key in LOCAL_FIELDS:
+            emit(key, local[key])
+        return dict(local, model="local", latency_ms=elapsed_ms(started))
+
+    # The prompt carries cleaned, budgeted text; prescoring above used the raw text
+    compacted, usage = compact_resume(resume_text, PROMPT_TOKEN_BUDGET)
+    fields = HYBRID_LLM_FIELDS if mode == "hybrid" else FULL_RESPONSE_FIELDS
+    prompt = build_prompt(compacted, fields)
+    usage.update(mode=mode, prompt_tokens=estimate_tokens(prompt), cached=False)
+    report = on_prompt or (lambda usage: None)
+
+    if mode == "sections":
+        data, requested = analyze_sections(compacted, api_key, cache, on_section, fields, admit=admit)
+        inputs = section_inputs(compacted, fields)
+        usage["prompt_tokens"] = sum(estimate_tokens(build_prompt(inputs[field], (field,))) for field in fields)
+        if "error" not in data:
+            data["latency_ms"] = elapsed_ms(started)
+        report(dict(usage, cached=not requested, latency_ms=elapsed_ms(started), ok="error" not in data))
+        return data
+
+    cache_key = make_cache_key(compacted, MODEL_NAME, f"{PROMPT_VERSION}-{mode}")
+    cached = cache.get(cache_key) if cache is not None else None
+    if cached is not None:
+        report(dict(usage, cached=True, latency_ms=0, ok=True))
+        for key, value in cached.items():
+            if key not in ANALYSIS_META_KEYS:
+                emit(key, value)
+        cached["latency_ms"] = elapsed_ms(started)
+        return cached
+
+    def fetch(emit):
+        with admit():
+            return request_fields(compacted, api_key, fields, emit)
+
+    # Identical concurrent analyses share one upstream request (see analyzer.singleflight)
+    requested_at = time.perf_counter()
+    if mode == "full":
+        data, shared = analysis_flights.do(cache_key, fetch, on_section)
+        if shared:
+            data = copy.deepcopy(data)
+        generated = data
+    else:
+        result = dict(local, skills=dict(local["skills"]))
+        for key in LOCAL_FIELDS:
+            emit(key, result[key])
+
+        def merge_section(key, value):
+            # Generated recommended skills complete the locally detected skills section
+            if key == "recommended_skills":
+                result["skills"]["recommended_skills"] = value
+                emit("skills", result["skills"])
+            elif key in HYBRID_LLM_FIELDS:
+                emit(key, value)
+
+        generated, shared = analysis_flights.do(cache_key, fetch, merge_section)
+        generated = copy.deepcopy(generated) if shared else generated
+        if "error" in generated:
+            data = generated
+        else:
+            result["skills"]["recommended_skills"] = generated.get("recommended_skills", [])
+            result.update({key: value for key, value in generated.items()
+                           if key in HYBRID_LLM_FIELDS and key != "recommended_skills"})
+            result["model"] = generated.get("model")
+            data = result
+    # A coalesced call cost nothing upstream, so it is logged like a cache hit
+    report(dict(usage, cached=shared, latency_ms=elapsed_ms(requested_at), ok="error" not in data))
+    if "error" in data:
+        return data
+    data["latency_ms"] = elapsed_ms(started)
+    # Partial answers are returned but not cached, so the next run can complete them
+    if all(key in generated for key in fields) and cache is not None and not shared:
+        cache.put(cache_key, data)
+    return data
+
+
+def elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000)
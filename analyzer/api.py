@@ -0,0 +1,337 @@
+import argparse
+import asyncio
+import hmac
+import io
+import json
+import os
+import sys
+import zipfile
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from analyzer.analysis import ANALYSIS_MODES, DEFAULT_ANALYSIS_MODE
+from analyzer.batch import MAX_ZIP_TOTAL_BYTES, ArchiveLimitError, iter_zip_resumes, load_api_key
+from analyzer.pdf import PdfExtractionError
+from analyzer.service import get_service
+from analyzer.storage import DB_PATH
+
+# ===========================
+# Headless HTTP API
+# ===========================
+# The analysis pipeline as an ASGI app, for systems that cannot drive the
+# Streamlit UI. Uploads are analyzed as background jobs (the same queue and
+# database the dashboard uses), so a request only extracts the text and
+# returns a job id; clients poll the job or ask for an NDJSON stream of its
+# sections as they arrive. Every worker process opens its own connections
+# to the shared database, so the app scales out with uvicorn --workers:
+#
+#     python -m analyzer.api --workers 4 --port 8000
+#
+# Set RESUME_API_TOKEN to require "Authorization: Bearer <token>". Callers
+# share the LLM fairly per X-Client-Id header (or per address without one);
+# a queued job reports its position and estimated wait.
+
+DB_FILE = os.environ.get("RESUME_DB", DB_PATH)
+API_TOKEN = os.environ.get("RESUME_API_TOKEN")
+# Largest accepted upload (a ZIP of resumes in a batch request)
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", 50 * 1024 * 1024))
+# Seconds between job status checks while streaming
+STREAM_POLL_SECONDS = 0.2
+FINISHED_STATUSES = ("done", "error")
+
+
+class PayloadTooLargeError(Exception):
+    """
+    Raised when an upload, or what its ZIP archives expand to, exceeds the limits (HTTP 413).
+    """
+
+
+def error_response(status_code, message):
+    return JSONResponse({"error": message}, status_code=status_code)
+
+
+def ndjson_response(events):
+    async def lines():
+        async for event in events:
+            yield json.dumps(event) + "\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def request_mode(request):
+    mode = request.query_params.get("mode", DEFAULT_ANALYSIS_MODE)
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"mode must be one of {', '.join(ANALYSIS_MODES)}")
+    return mode
+
+
+def client_id(request):
+    """
+    Names the caller for the fair upstream queue: the X-Client-Id header, else its address.
+    """
+    return request.headers.get("x-client-id") or (request.client.host if request.client else "anonymous")
+
+
+def query_flag(request, name, default):
+    value = request.query_params.get(name)
+    return default if value is None else value.lower() in ("1", "true", "yes")
+
+
+async def read_uploads(request, field):
+    """
+    Returns [(name, bytes)] for the multipart file parts of a field,
+    expanding ZIP archives into the PDFs they contain. Raises
+    PayloadTooLargeError when an upload is over MAX_UPLOAD_BYTES or the
+    expanded PDFs of the request are over MAX_ZIP_TOTAL_BYTES in all.
+    """
+    form = await request.form()
+    sources = []
+    total = 0
+    for upload in form.getlist(field):
+        if isinstance(upload, str):
+            continue
+        if upload.size is not None and upload.size > MAX_UPLOAD_BYTES:
+            raise PayloadTooLargeError(f"{upload.filename} is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB.")
+        data = await upload.read()
+        if upload.filename.lower().endswith(".zip"):
+            try:
+                # The archives of one request share the expansion budget
+                members = list(iter_zip_resumes(io.BytesIO(data), max_total_bytes=MAX_ZIP_TOTAL_BYTES - total))
+            except zipfile.BadZipFile:
+                raise PdfExtractionError(f"{upload.filename} is not a valid ZIP archive.")
+            except ArchiveLimitError as e:
+                raise PayloadTooLargeError(f"{upload.filename}: {e}")
+        else:
+            members = [(upload.filename, data)]
+        total += sum(len(member) for _, member in members)
+        if total > MAX_ZIP_TOTAL_BYTES:
+            raise PayloadTooLargeError(f"The uploads add up to more than {MAX_ZIP_TOTAL_BYTES // (1024 * 1024)} MB.")
+        sources.extend(members)
+    return sources
+
+
+async def job_events(service, job_id):
+    """
+    Yields {"event": "queue", "position", "eta_seconds"} whenever the job's
+    place in the upstream queue changes, {"event": "section", "key", "value"}
+    for every section of a job as it streams in, then one final "done" (with
+    result and record_id) or "error" event.
+    """
+    sent, queue = set(), None
+    while True:
+        job = await run_in_threadpool(service.job, job_id)
+        if job is None:
+            yield {"event": "error", "job_id": job_id, "error": "Unknown job."}
+            return
+        if job["queue"] and job["queue"] != queue:
+            queue = job["queue"]
+            yield dict(queue, event="queue", job_id=job_id)
+        for key, value in job["sections"].items():
+            if key not in sent:
+                sent.add(key)
+                yield {"event": "section", "job_id": job_id, "key": key, "value": value}
+        if job["status"] in FINISHED_STATUSES:
+            yield {"event": job["status"], "job_id": job_id, "result": job["result"], "error": job["error"],
+                   "record_id": job["record_id"]}
+            return
+        await asyncio.sleep(STREAM_POLL_SECONDS)
+
+
+async def health(request):
+    return JSONResponse({"status": "ok"})
+
+
+async def extract(request):
+    """
+    POST /v1/extract with a "file" part: the validated resume text.
+    """
+    service = request.app.state.service
+    try:
+        sources = await read_uploads(request, "file")
+        if len(sources) != 1:
+            return error_response(400, "Upload exactly one PDF as the \"file\" field.")
+        text = await run_in_threadpool(service.extract_text, sources[0][1])
+    except PayloadTooLargeError as e:
+        return error_response(413, str(e))
+    except PdfExtractionError as e:
+        return error_response(422, str(e))
+    return JSONResponse({"file": sources[0][0], "text": text})
+
+
+async def analyze(request):
+    """
+    POST /v1/analyses with a "file" part or a JSON {"text": ...} body.
+    Query: mode, save (default true) and stream (NDJSON events instead of
+    202 with the job id).
+    """
+    service = request.app.state.service
+    try:
+        mode = request_mode(request)
+        if request.headers.get("content-type", "").startswith("application/json"):
+            body = await request.json()
+            text = body.get("text") if isinstance(body, dict) else None
+            if not isinstance(text, str) or not text.strip():
+                return error_response(400, "The JSON body needs a non-empty \"text\".")
+            service.check_text(text)
+        else:
+            sources = await read_uploads(request, "file")
+            if len(sources) != 1:
+                return error_response(400, "Upload exactly one PDF as the \"file\" field.")
+            text = await run_in_threadpool(service.extract_text, sources[0][1])
+    except PayloadTooLargeError as e:
+        return error_response(413, str(e))
+    except (ValueError, PdfExtractionError) as e:
+        return error_response(422, str(e))
+    job_id = await run_in_threadpool(service.submit, text, mode, query_flag(request, "save", True),
+                                     client_id(request))
+    if query_flag(request, "stream", False):
+        return ndjson_response(job_events(service, job_id))
+    return JSONResponse({"job_id": job_id, "status_url": f"/v1/jobs/{job_id}"}, status_code=202)
+
+
+async def analyze_batch(request):
+    """
+    POST /v1/batch with any number of "files" parts (PDFs or ZIP archives).
+    Returns 202 with one {"file", "job_id"} or {"file", "error"} per
+    resume; with stream=true, an NDJSON stream of those lines followed by
+    each job's final event as it finishes.
+    """
+    service = request.app.state.service
+    try:
+        mode = request_mode(request)
+        sources = await read_uploads(request, "files")
+    except PayloadTooLargeError as e:
+        return error_response(413, str(e))
+    except (ValueError, PdfExtractionError) as e:
+        return error_response(422, str(e))
+    if not sources:
+        return error_response(400, "Upload PDFs or ZIP archives as \"files\" fields.")
+    save = query_flag(request, "save", True)
+    client = client_id(request)
+
+    async def submit(name, data):
+        try:
+            text = await run_in_threadpool(service.extract_text, data)
+        except PdfExtractionError as e:
+            return {"file": name, "error": str(e)}
+        return {"file": name, "job_id": await run_in_threadpool(service.submit, text, mode, save, client)}
+
+    submitted = await asyncio.gather(*(submit(name, data) for name, data in sources))
+    if not query_flag(request, "stream", False):
+        return JSONResponse({"jobs": submitted}, status_code=202)
+
+    async def events():
+        for item in submitted:
+            yield dict(item, event="submitted")
+        pending = {item["job_id"]: item["file"] for item in submitted if "job_id" in item}
+        while pending:
+            for job_id, name in list(pending.items()):
+                job = await run_in_threadpool(service.job, job_id)
+                if job is None or job["status"] in FINISHED_STATUSES:
+                    del pending[job_id]
+                    yield {"event": job["status"] if job else "error", "file": name, "job_id": job_id,
+                           "result": job and job["result"], "error": job["error"] if job else "Unknown job.",
+                           "record_id": job and job["record_id"]}
+            if pending:
+                await asyncio.sleep(STREAM_POLL_SECONDS)
+
+    return ndjson_response(events())
+
+
+async def job_status(request):
+    job = await run_in_threadpool(request.app.state.service.job, request.path_params["job_id"])
+    if job is None:
+        return error_response(404, "Unknown job.")
+    return JSONResponse(dict(job, job_id=request.path_params["job_id"]))
+
+
+async def job_stream(request):
+    return ndjson_response(job_events(request.app.state.service, request.path_params["job_id"]))
+
+
+async def stored_analysis(request):
+    """
+    GET /v1/analyses/{record_id}: a saved analysis with its result and resume
+    text, from the database or the archive.
+    """
+    stored = await run_in_threadpool(request.app.state.service.stored_analysis, request.path_params["record_id"])
+    if stored is None:
+        return error_response(404, "No stored analysis for this id.")
+    return JSONResponse(stored)
+
+
+async def feedback(request):
+    """
+    POST /v1/analyses/{record_id}/feedback with {"feedback": "..."}.
+    """
+    try:
+        text = str((await request.json())["feedback"])
+    except (ValueError, KeyError, TypeError):
+        return error_response(400, "The JSON body needs a \"feedback\" string.")
+    updated = await run_in_threadpool(request.app.state.service.update_feedback,
+                                      request.path_params["record_id"], text)
+    if not updated:
+        return error_response(404, "No stored analysis for this id.")
+    return Response(status_code=204)
+
+
+class BearerTokenMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        # Constant-time comparison, so response timing does not reveal how much of a guess matched
+        authorized = hmac.compare_digest(request.headers.get("authorization", "").encode(),
+                                         f"Bearer {API_TOKEN}".encode())
+        if request.url.path != "/health" and not authorized:
+            return error_response(401, "Missing or invalid bearer token.")
+        return await call_next(request)
+
+
+def create_app(db_path=DB_FILE, api_key=None):
+    """
+    Builds the ASGI app. The service (database, cache, job queue) is opened
+    at startup, inside each worker process.
+    """
+    @asynccontextmanager
+    async def lifespan(app):
+        app.state.service = get_service(db_path, api_key or load_api_key())
+        yield
+
+    routes = [
+        Route("/health", health),
+        Route("/v1/extract", extract, methods=["POST"]),
+        Route("/v1/analyses", analyze, methods=["POST"]),
+        Route("/v1/analyses/{record_id:int}", stored_analysis),
+        Route("/v1/analyses/{record_id:int}/feedback", feedback, methods=["POST"]),
+        Route("/v1/batch", analyze_batch, methods=["POST"]),
+        Route("/v1/jobs/{job_id}", job_status),
+        Route("/v1/jobs/{job_id}/stream", job_stream),
+    ]
+    middleware = [Middleware(BearerTokenMiddleware)] if API_TOKEN else []
+    return Starlette(routes=routes, middleware=middleware, lifespan=lifespan)
+
+
+app = create_app()
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the resume analysis pipeline over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--db", help="SQLite database file (default: RESUME_DB or resume_data.db)")
+    args = parser.parse_args(argv)
+    if args.db:
+        # Worker processes import the app afresh and read the path from the environment
+        os.environ["RESUME_DB"] = args.db
+    uvicorn.run("analyzer.api:app", host=args.host, port=args.port, workers=args.workers, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import zlib
+from array import array
+
+# ===========================
+# Analysis Payloads & Retention
+# ===========================
+# user_data holds the flattened columns the dashboards need; the complete
+# analysis JSON and the extracted resume text are kept beside it in
+# analysis_payload as one zlib stream per record. The streams are
+# compressed with a preset dictionary of the JSON keys and phrases every
+# analysis repeats, which is most of what a small record contains, so
+# each record still decompresses on its own.
+#
+# Retention moves payloads older than a cutoff out of SQLite into
+# append-only archive segments (one file per month, next to the
+# database), leaving only a locator row behind; a second, later cutoff
+# can drop the user_data rows themselves once they are archived. An
+# archived analysis stays retrievable by id without another LLM call.
+
+DEFAULT_ARCHIVE_DIR = "archive"
+# Retention defaults: payloads move to the archive after ARCHIVE_AFTER_DAYS;
+# PURGE_AFTER_DAYS (unset: never) also drops the archived user_data rows
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "30"))
+PURGE_AFTER_DAYS = int(os.environ["PURGE_AFTER_DAYS"]) if os.environ.get("PURGE_AFTER_DAYS") else None
+# user_data rows moved per retention step
+RETENTION_BATCH = 1000
+
+PAYLOAD_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS analysis_payload (
+        analysis_id INTEGER PRIMARY KEY REFERENCES user_data(id) ON DELETE CASCADE,
+        dictionary INTEGER NOT NULL,
+        payload BLOB,
+        segment TEXT
+    )
+'''
+
+# Preset compression dictionaries by version. A version is never changed
+# once released: stored payloads name the version they were written with.
+# zlib uses the end of the dictionary best, so the most common strings go last.
+DICTIONARIES = {
+    1: (
+        ' with experience in developing building designing scalable data pipelines machine learning models '
+        'web applications REST APIs cloud infrastructure. Consider adding quantifiable achievements, '
+        'metrics and results to your experience section. Use consistent formatting, bullet points and '
+        'action verbs. Tailor your resume to the job description. Strong technical skills in '
+        'Python, Java, JavaScript, SQL, React, AWS, Docker, Kubernetes, Git, Linux, Machine Learning, '
+        'Data Analysis, Data Engineering, Data Science, Software Engineer, Developer, Analyst, Intern, '
+        'Junior, Senior, Coursera, Udemy, edX, LinkedIn Learning, https://www.coursera.org/learn/, '
+        'https://www.udemy.com/course/, https://www.edx.org/course/, Excellent, Impressive, Great job '
+        'Your resume demonstrates a strong background in the candidate has hands-on experience '
+        '"resume_text": "EXPERIENCE EDUCATION SKILLS PROJECTS CERTIFICATIONS SUMMARY '
+        '{"result": {"basic_info": {"name": "", "email": "@gmail.com", "mobile": "+1 ", "address": ""}, '
+        '"skills": {"current_skills": ["", ""], "recommended_skills": ["", ""]}, '
+        '"course_recommendations": [{"platform": "", "course_name": "", "link": "https://"}, '
+        '{"platform": "", "course_name": "", "link": "https://"}], '
+        '"appreciation": ["", ""], "resume_tips": ["", ""], "resume_score": "/100", '
+        '"ai_resume_summary": "", "matching_job_roles": ["", ""], "ats_keywords": ["", ""], '
+        '"project_suggestions": {"improvement_tips": ["", ""], "new_project_recommendations": ["", ""]}, '
+        '"model": "", "latency_ms": '
+    ).encode("utf-8"),
+}
+CURRENT_DICTIONARY = max(DICTIONARIES)
+
+
+def encode_payload(data, dictionary=CURRENT_DICTIONARY):
+    """
+    Serializes a JSON-compatible dict to a zlib stream primed with a preset dictionary.
+    """
+    compressor = zlib.compressobj(level=6, zdict=DICTIONARIES[dictionary])
+    raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return compressor.compress(raw) + compressor.flush()
+
+
+def decode_payload(blob, dictionary):
+    decompressor = zlib.decompressobj(zdict=DICTIONARIES[dictionary])
+    return json.loads(decompressor.decompress(blob) + decompressor.flush())
+
+
+def hot_payload(result, resume_text=None):
+    """
+    Encodes the payload stored with a new analysis; returns (dictionary, blob).
+    """
+    return CURRENT_DICTIONARY, encode_payload({"result": result, "resume_text": resume_text})
+
+
+class Archive:
+    """
+    Append-only monthly segment files of compressed analysis records, each
+    with an index of (id, offset, length, dictionary) rows. Retention runs
+    write from one process at a time; reads are safe from anywhere.
+    """
+
+    def __init__(self, directory=DEFAULT_ARCHIVE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        # segment -> (index file stamp, {analysis_id: (offset, length, dictionary)})
+        self._indexes = {}
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def next_to(cls, db_path, **kwargs):
+        """
+        Opens the archive stored in the same directory as the given database file.
+        """
+        directory = os.path.dirname(os.path.abspath(db_path))
+        return cls(os.path.join(directory, DEFAULT_ARCHIVE_DIR), **kwargs)
+
+    def _path(self, segment, suffix):
+        return os.path.join(self.directory, f"{segment}{suffix}")
+
+    def segments(self):
+        return sorted(name[:-4] for name in os.listdir(self.directory) if name.endswith(".seg"))
+
+    def _read_index(self, segment):
+        """
+        Returns a segment's index; the index file holds int64 (id, offset,
+        length, dictionary) rows, and a later row for the same id (a record
+        appended twice) wins.
+        """
+        path = self._path(segment, ".idx")
+        try:
+            status = os.stat(path)
+        except OSError:
+            return {}
+        # Another process may have appended since: the index file is replaced, never edited
+        stamp = (status.st_ino, status.st_mtime_ns)
+        cached = self._indexes.get(segment)
+        if cached is None or cached[0] != stamp:
+            values = array("q")
+            with open(path, "rb") as f:
+                values.frombytes(f.read())
+            cached = (stamp, {values[i]: tuple(values[i + 1:i + 4]) for i in range(0, len(values), 4)})
+            self._indexes[segment] = cached
+        return cached[1]
+
+    def append(self, segment, records):
+        """
+        Appends {"id", ...} records to a segment. The data is flushed to disk
+        before the index that points at it is replaced, so a crash in between
+        leaves unreferenced bytes, never a dangling index entry.
+        """
+        with self._lock:
+            rows = array("q")
+            with open(self._path(segment, ".seg"), "ab") as f:
+                offset = f.tell()
+                for record in records:
+                    blob = encode_payload(record)
+                    f.write(blob)
+                    rows.extend((record["id"], offset, len(blob), CURRENT_DICTIONARY))
+                    offset += len(blob)
+                f.flush()
+                os.fsync(f.fileno())
+            path = self._path(segment, ".idx")
+            temporary = path + ".tmp"
+            with open(temporary, "wb") as f:
+                if os.path.exists(path):
+                    with open(path, "rb") as current:
+                        f.write(current.read())
+                f.write(rows.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, path)
+
+    def get(self, analysis_id, segment=None):
+        """
+        Returns an archived record by id, or None. Without a segment every
+        segment index is searched, newest first.
+        """
+        with self._lock:
+            for name in [segment] if segment else reversed(self.segments()):
+                entry = self._read_index(name).get(analysis_id)
+                if entry is not None:
+                    offset, length, dictionary = entry
+                    with open(self._path(name, ".seg"), "rb") as f:
+                        f.seek(offset)
+                        return decode_payload(f.read(length), dictionary)
+        return None
+
+    def stats(self):
+        with self._lock:
+            segments = self.segments()
+            return {
+                "segments": len(segments),
+                "records": sum(len(self._read_index(name)) for name in segments),
+                "bytes": sum(os.path.getsize(self._path(name, ".seg")) for name in segments),
+            }
+
+
+def load_analysis(db, archive, analysis_id):
+    """
+    Returns the stored analysis {"id", "result", "resume_text", ...} from the
+    database or the archive, or None when nothing was kept for the id.
+    """
+    rows = db.query('''
+        SELECT p.dictionary, p.payload, p.segment, u.timestamp, u.feedback
+        FROM analysis_payload AS p JOIN user_data AS u ON u.id = p.analysis_id
+        WHERE p.analysis_id = ?
+    ''', (analysis_id,))
+    if rows and rows[0][1] is not None:
+        dictionary, payload, _, timestamp, feedback = rows[0]
+        return dict(decode_payload(payload, dictionary), id=analysis_id, timestamp=timestamp, feedback=feedback)
+    # Archived (the locator names the segment) or purged from user_data
+    record = archive.get(analysis_id, rows[0][2] if rows else None)
+    if record is not None and rows:
+        # Feedback can still change while the user_data row is kept
+        record["feedback"] = rows[0][4]
+    return record
+
+
+def apply_retention(db, archive, archive_days=ARCHIVE_AFTER_DAYS, purge_days=PURGE_AFTER_DAYS,
+                    batch=RETENTION_BATCH):
+    """
+    Moves user_data records older than archive_days into the archive (full
+    payload plus the flattened row), then deletes user_data rows older than
+    purge_days that are archived. Returns {"archived", "purged"} counts.
+    """
+    from analyzer.storage import USER_DATA_COLUMNS
+
+    archived = 0
+    after = 0
+    while True:
+        rows = db.query(f'''
+            SELECT {", ".join("u." + column for column in USER_DATA_COLUMNS)}, p.dictionary, p.payload
+            FROM user_data AS u LEFT JOIN analysis_payload AS p ON p.analysis_id = u.id
+            WHERE u.timestamp < datetime('now', ?) AND p.segment IS NULL AND u.id > ?
+            ORDER BY u.id LIMIT ?
+        ''', (f"-{archive_days} days", after, batch))
+        if not rows:
+            break
+        segments = {}
+        for row in rows:
+            record = dict(zip(USER_DATA_COLUMNS, row[:len(USER_DATA_COLUMNS)]))
+            dictionary, payload = row[len(USER_DATA_COLUMNS):]
+            # Rows saved before payloads were kept archive their flattened columns only
+            stored = decode_payload(payload, dictionary) if payload is not None else {}
+            segment = (record["timestamp"] or "unknown")[:7]
+            segments.setdefault(segment, []).append({
+                "id": record["id"], "timestamp": record["timestamp"], "feedback": record["feedback"],
+                "record": record, "result": stored.get("result"), "resume_text": stored.get("resume_text"),
+            })
+        for segment, records in segments.items():
+            archive.append(segment, records)
+        locators = [(record["id"], CURRENT_DICTIONARY, segment)
+                    for segment, records in segments.items() for record in records]
+        # The segment data is durable before the SQLite copies are dropped
+        db.writer.submit(lambda conn: conn.executemany('''
+            INSERT INTO analysis_payload (analysis_id, dictionary, payload, segment) VALUES (?, ?, NULL, ?)
+            ON CONFLICT (analysis_id) DO UPDATE SET payload = NULL, segment = excluded.segment
+        ''', locators)).result()
+        archived += len(rows)
+        after = rows[-1][0]
+
+    purged = 0
+    if purge_days is not None:
+        purged = db.writer.submit(lambda conn: conn.execute('''
+            DELETE FROM user_data WHERE timestamp < datetime('now', ?)
+            AND id IN (SELECT analysis_id FROM analysis_payload WHERE segment IS NOT NULL)
+        ''', (f"-{purge_days} days",)).rowcount).result()
+    return {"archived": archived, "purged": purged}
+
+
+def payload_stats(db):
+    """
+    Counts and compressed size of the payloads still kept in the database.
+    """
+    rows, archived, size = db.query('''
+        SELECT COUNT(*), COUNT(segment), COALESCE(SUM(LENGTH(payload)), 0) FROM analysis_payload
+    ''')[0]
+    return {"hot": rows - archived, "archived": archived, "hot_bytes": size}
+
+
+def main(argv=None):
+    from analyzer.storage import DB_PATH, connect, get_database
+
+    parser = argparse.ArgumentParser(description="Archive old analyses and read stored analysis payloads.")
+    parser.add_argument("command", choices=["retain", "get", "stats"],
+                        help="retain: apply the retention tiers; get: print one stored analysis; stats: sizes")
+    parser.add_argument("id", nargs="?", type=int, help="analysis id (for get)")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database file")
+    parser.add_argument("--archive-days", type=int, default=ARCHIVE_AFTER_DAYS,
+                        help="move payloads of analyses older than this into the archive")
+    parser.add_argument("--purge-days", type=int, default=PURGE_AFTER_DAYS,
+                        help="also delete archived user_data rows older than this")
+    parser.add_argument("--vacuum", action="store_true", help="shrink the database file afterwards")
+    args = parser.parse_args(argv)
+
+    db = get_database(args.db)
+    archive = Archive.next_to(args.db)
+    if args.command == "retain":
+        counts = apply_retention(db, archive, args.archive_days, args.purge_days)
+        if args.vacuum:
+            # Freed pages are reused by later inserts anyway; VACUUM returns them to the file system
+            conn = connect(args.db)
+            conn.execute("VACUUM")
+            conn.close()
+        print(f"Archived {counts['archived']} analyses, purged {counts['purged']} from user_data.")
+        return 0
+    if args.command == "get":
+        if args.id is None:
+            parser.error("get needs an analysis id")
+        stored = load_analysis(db, archive, args.id)
+        if stored is None:
+            print(f"No stored analysis for id {args.id}.", file=sys.stderr)
+            return 1
+        print(json.dumps(stored, ensure_ascii=False, indent=2))
+        return 0
+    print(json.dumps(dict(payload_stats(db), archive=archive.stats())))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
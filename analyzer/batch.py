@@ -0,0 +1,265 @@
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from analyzer.admission import get_admission
+from analyzer.analysis import ANALYSIS_MODES, DEFAULT_ANALYSIS_MODE, analyze_resume, parse_resume_score, validate_resume
+from analyzer.pdf import extract_pdf_text
+from analyzer.storage import DB_PATH, get_database
+
+# ===========================
+# Batch Resume Analysis
+# ===========================
+# Analyzes a folder or ZIP of resumes: PDF extraction fans out across a
+# process pool (pdfminer is CPU-bound) and the API calls across a thread pool
+# whose size is the allowed request concurrency. Results are saved to
+# user_data and reported as they finish, not in submission order.
+
+DEFAULT_CONCURRENCY = 4
+# What one ZIP archive may expand to, so a small upload cannot inflate into gigabytes in memory
+MAX_ZIP_MEMBERS = int(os.environ.get("MAX_ZIP_MEMBERS", 2000))
+MAX_ZIP_MEMBER_BYTES = int(os.environ.get("MAX_ZIP_MEMBER_BYTES", 20 * 1024 * 1024))
+MAX_ZIP_TOTAL_BYTES = int(os.environ.get("MAX_ZIP_TOTAL_BYTES", 500 * 1024 * 1024))
+
+
+class ArchiveLimitError(ValueError):
+    """
+    Raised when a ZIP archive holds too many PDFs or expands beyond the size limits.
+    """
+
+
+def zip_pdf_members(archive, max_members=MAX_ZIP_MEMBERS, max_member_bytes=MAX_ZIP_MEMBER_BYTES,
+                    max_total_bytes=MAX_ZIP_TOTAL_BYTES):
+    """
+    Returns the ZipInfo of every PDF in an open ZipFile, from its directory
+    alone. Raises ArchiveLimitError when the archive lists more than
+    max_members PDFs, a PDF over max_member_bytes or more than
+    max_total_bytes in all.
+    """
+    mb = 1024 * 1024
+    members = [info for info in archive.infolist()
+               if not info.is_dir() and info.filename.lower().endswith(".pdf")]
+    if len(members) > max_members:
+        raise ArchiveLimitError(f"The archive holds {len(members)} PDFs; at most {max_members} are accepted.")
+    if sum(info.file_size for info in members) > max_total_bytes:
+        raise ArchiveLimitError(f"The archive expands to more than {max_total_bytes // mb} MB.")
+    for info in members:
+        if info.file_size > max_member_bytes:
+            raise ArchiveLimitError(f"{info.filename} expands to more than {max_member_bytes // mb} MB.")
+    return members
+
+
+def iter_zip_resumes(source, **limits):
+    """
+    Yields (name, bytes) for every PDF inside a ZIP archive (path or file object).
+    Raises ArchiveLimitError before inflating anything when the archive is
+    over the limits (keyword arguments of zip_pdf_members).
+    """
+    with zipfile.ZipFile(source) as archive:
+        members = zip_pdf_members(archive, **limits)
+        # zipfile stops inflating a member at its declared size (and fails its CRC check if it
+        # holds more), so the sizes checked above bound what is read
+        for info in members:
+            yield info.filename, archive.read(info)
+
+
+def iter_resume_files(path):
+    """
+    Yields (name, bytes) for a single PDF, every PDF under a folder, or every PDF in a ZIP.
+    """
+    path = Path(path)
+    if path.is_dir():
+        for pdf_path in sorted(path.rglob("*")):
+            if pdf_path.is_file() and pdf_path.suffix.lower() == ".pdf":
+                yield str(pdf_path.relative_to(path)), pdf_path.read_bytes()
+    elif zipfile.is_zipfile(path):
+        yield from iter_zip_resumes(path)
+    else:
+        yield path.name, path.read_bytes()
+
+
+def iter_uploaded_resumes(uploaded_files):
+    """
+    Yields (name, bytes) for Streamlit uploads, expanding any ZIP archives.
+    """
+    for uploaded_file in uploaded_files:
+        if uploaded_file.name.lower().endswith(".zip"):
+            yield from iter_zip_resumes(io.BytesIO(uploaded_file.getvalue()))
+        else:
+            yield uploaded_file.name, uploaded_file.getvalue()
+
+
+def count_uploaded_resumes(uploaded_files):
+    """
+    Counts the PDFs iter_uploaded_resumes would yield, reading only the
+    directories of ZIP archives (and checking their limits) so nothing is inflated.
+    """
+    count = 0
+    for uploaded_file in uploaded_files:
+        if uploaded_file.name.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(uploaded_file.getvalue())) as archive:
+                count += len(zip_pdf_members(archive))
+        else:
+            count += 1
+    return count
+
+
+class RequestPacer:
+    """
+    Spaces out request starts so no more than requests_per_minute begin per minute.
+    """
+
+    def __init__(self, requests_per_minute=None):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        time.sleep(start - now)
+
+
+def run_batch(sources, api_key, db, concurrency=DEFAULT_CONCURRENCY, extract_workers=None,
+              requests_per_minute=None, cache=None, mode=DEFAULT_ANALYSIS_MODE):
+    """
+    Analyzes (name, pdf_bytes) pairs and yields one result dict per resume as it finishes.
+    Successful analyses are saved to user_data through the database's background writer.
+    Upstream requests queue as the "batch" client (see analyzer.admission), so
+    a batch takes its fair share of the LLM next to interactive users.
+    """
+    extract_workers = extract_workers or min(4, os.cpu_count() or 1)
+    pacer = RequestPacer(requests_per_minute)
+    sources = iter(sources)
+
+    def analyze(text):
+        if mode != "fast":
+            pacer.wait()
+        return text, analyze_resume(text, api_key, cache=cache, mode=mode, on_prompt=db.log_prompt,
+                                    admit=lambda: get_admission().slot("batch"))
+
+    with ProcessPoolExecutor(max_workers=extract_workers) as extract_pool, \
+            ThreadPoolExecutor(max_workers=concurrency) as request_pool:
+        pending = {}
+
+        def fill_extraction_queue():
+            # Keep only a couple of PDFs per worker in flight to bound memory
+            in_flight = sum(1 for stage, _ in pending.values() if stage == "extract")
+            while in_flight < extract_workers * 2:
+                source = next(sources, None)
+                if source is None:
+                    break
+                name, data = source
+                pending[extract_pool.submit(extract_pdf_text, data)] = ("extract", name)
+                in_flight += 1
+
+        fill_extraction_queue()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, name = pending.pop(future)
+                if stage == "extract":
+                    try:
+                        text = future.result()
+                    except Exception as e:
+                        yield {"file": name, "status": "error", "error": str(e)}
+                        continue
+                    if not validate_resume(text):
+                        yield {"file": name, "status": "invalid",
+                               "error": "The document does not appear to be a valid resume."}
+                        continue
+                    pending[request_pool.submit(analyze, text)] = ("analyze", name)
+                    continue
+                try:
+                    text, result = future.result()
+                except Exception as e:
+                    result = {"error": str(e)}
+                if "error" in result:
+                    yield {"file": name, "status": "error", "error": result["error"]}
+                    continue
+                yield {
+                    "file": name,
+                    "status": "saved",
+                    "record_id": db.insert_analysis(result, resume_text=text).result(),
+                    "name": result.get("basic_info", {}).get("name", "Null"),
+                    "resume_score": parse_resume_score(result.get("resume_score", "70/100")),
+                }
+            fill_extraction_queue()
+
+
+def load_api_key():
+    """
+    Reads the API key from OPENROUTER_API_KEY/API_KEY or .streamlit/secrets.toml.
+    """
+    api_key = os.environ.get("OPENROUTER_API_KEY") or os.environ.get("API_KEY")
+    if api_key:
+        return api_key
+    secrets_path = Path(".streamlit") / "secrets.toml"
+    if secrets_path.exists():
+        import tomllib
+        with open(secrets_path, "rb") as f:
+            return tomllib.load(f).get("API_KEY")
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Analyze a PDF, a folder of PDFs or a ZIP of PDFs and save the results to user_data."
+    )
+    parser.add_argument("path", help="PDF file, folder or ZIP archive of resumes")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database to save results to")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="maximum number of API requests in flight")
+    parser.add_argument("--rpm", type=float, default=None,
+                        help="maximum API requests started per minute")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="PDF extraction processes (default: up to 4)")
+    parser.add_argument("--no-cache", action="store_true", help="skip the analysis cache")
+    parser.add_argument("--mode", choices=ANALYSIS_MODES, default=DEFAULT_ANALYSIS_MODE,
+                        help="full: LLM only; hybrid: local scoring + LLM text; fast: local scoring only")
+    args = parser.parse_args(argv)
+
+    api_key = load_api_key()
+    if not api_key and args.mode != "fast":
+        parser.error("set OPENROUTER_API_KEY or add API_KEY to .streamlit/secrets.toml")
+
+    cache = None
+    if not args.no_cache:
+        from analyzer.cache import AnalysisCache
+        cache = AnalysisCache.next_to(args.db)
+
+    db = get_database(args.db)
+    counts = {"saved": 0, "invalid": 0, "error": 0}
+    started = time.monotonic()
+    try:
+        for item in run_batch(iter_resume_files(args.path), api_key, db,
+                              concurrency=args.concurrency, extract_workers=args.workers,
+                              requests_per_minute=args.rpm, cache=cache, mode=args.mode):
+            counts[item["status"]] += 1
+            print(json.dumps(item), flush=True)
+            print(f"[{sum(counts.values())}] {item['file']}: {item['status']}", file=sys.stderr)
+    except ArchiveLimitError as e:
+        parser.exit(1, f"{e} Raise MAX_ZIP_MEMBERS / MAX_ZIP_MEMBER_BYTES / MAX_ZIP_TOTAL_BYTES or unpack it.\n")
+    elapsed = time.monotonic() - started
+    total = sum(counts.values())
+    print(
+        f"Processed {total} resumes in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.2f}/s): "
+        f"{counts['saved']} saved, {counts['invalid']} invalid, {counts['error']} failed",
+        file=sys.stderr,
+    )
+    return 1 if counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from analyzer.metrics import CACHE_REQUESTS
+
+# ===========================
+# Content-Addressed Analysis Cache
+# ===========================
+# Analyses are keyed by a hash of the normalized resume text, the model name
+# and the prompt version, so re-uploading the same PDF never pays for a second
+# LLM round trip while the prompt and model stay unchanged.
+
+DEFAULT_CACHE_PATH = "analysis_cache.db"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def normalize_resume_text(text):
+    """
+    Normalizes resume text so trivially different extractions hash the same.
+    """
+    text = unicodedata.normalize("NFKC", text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def make_cache_key(resume_text, model, prompt_version):
+    """
+    Builds the cache key from the normalized text, model name and prompt version.
+    """
+    digest = hashlib.sha256()
+    for part in (normalize_resume_text(resume_text), model, str(prompt_version)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """
+    SQLite-backed cache of analysis results with TTL and LRU size-based eviction.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                cache_key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_access ON analysis_cache (last_access)"
+        )
+        self._conn.commit()
+
+    @classmethod
+    def next_to(cls, db_path, **kwargs):
+        """
+        Creates a cache stored in the same directory as the given database file.
+        """
+        directory = os.path.dirname(os.path.abspath(db_path))
+        return cls(os.path.join(directory, DEFAULT_CACHE_PATH), **kwargs)
+
+    def get(self, key):
+        """
+        Returns the cached result for a key, or None if missing or expired.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created_at FROM analysis_cache WHERE cache_key=?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc(result="miss")
+                return None
+            result, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM analysis_cache WHERE cache_key=?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                CACHE_REQUESTS.inc(result="expired")
+                return None
+            self._conn.execute(
+                "UPDATE analysis_cache SET last_access=? WHERE cache_key=?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        CACHE_REQUESTS.inc(result="hit")
+        return json.loads(result)
+
+    def put(self, key, result):
+        """
+        Stores a result under a key and evicts expired and least recently used entries.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute('''
+                INSERT OR REPLACE INTO analysis_cache (cache_key, result, created_at, last_access)
+                VALUES (?, ?, ?, ?)
+            ''', (key, json.dumps(result), now, now))
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        if self.ttl_seconds:
+            self._conn.execute(
+                "DELETE FROM analysis_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+        if self.max_entries:
+            self._conn.execute('''
+                DELETE FROM analysis_cache WHERE cache_key IN (
+                    SELECT cache_key FROM analysis_cache
+                    ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries,))
+
+    def clear(self):
+        """
+        Removes every cached entry.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM analysis_cache")
+            self._conn.commit()
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the current number of cached entries.
+        """
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
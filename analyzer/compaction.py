@@ -0,0 +1,159 @@
+import math
+import re
+import unicodedata
+
+from analyzer.prescore import SECTION_RE
+
+# ===========================
+# Prompt Compaction & Token Budgeting
+# ===========================
+# pdfminer output is noisy: runs of spaces, hyphenated line breaks, and the
+# same header/footer on every page. It is cleaned up before it goes into the
+# prompt, and long CVs are cut down section by section (least important
+# sections first) so the prompt stays within a fixed token budget.
+
+DEFAULT_TOKEN_BUDGET = 3000
+# Rough tokens-per-character ratio of BPE tokenizers on English text; close
+# enough for budgeting and for tracking savings without loading a tokenizer.
+CHARS_PER_TOKEN = 4
+
+PAGE_NUMBER_RE = re.compile(r"^(?:page\s*)?\d{1,3}(?:\s*(?:/|of)\s*\d{1,3})?$", re.IGNORECASE)
+HYPHENATION_RE = re.compile(r"(\w)-\n(?=[a-z])")
+BULLET_GLYPH_RE = re.compile(r"^[•●▪◦■□►▸‣⁃∙·➢✓✔*]\s*")
+CONTROL_RE = re.compile(r"[^\S\n\f]+|[\x00-\x08\x0b\x0e-\x1f\x7f\u200b-\u200f\ufeff]")
+
+# Sections kept longest when a resume is over budget; later ones are trimmed first
+SECTION_PRIORITY = (
+    "header", "experience", "skills", "summary", "education", "projects",
+    "certifications", "achievements", "languages", "publications",
+)
+# Lines a trimmed section keeps (its heading plus the first few entries)
+MIN_SECTION_LINES = 4
+TRUNCATION_MARKER = "[...]"
+
+
+def estimate_tokens(text):
+    """
+    Estimates the number of tokens the model will see for the text.
+    """
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def repeated_page_lines(pages):
+    """
+    Returns the lines that appear on at least half of the pages (headers,
+    footers, running names); only meaningful for multi-page documents.
+    """
+    pages = [page for page in pages if page.strip()]
+    if len(pages) < 2:
+        return set()
+    counts = {}
+    for page in pages:
+        for line in {line.strip() for line in page.splitlines() if line.strip()}:
+            counts[line] = counts.get(line, 0) + 1
+    threshold = max(2, math.ceil(len(pages) / 2))
+    return {line for line, count in counts.items() if count >= threshold and len(line) <= 80}
+
+
+def clean_resume_text(text):
+    """
+    Normalizes extracted resume text: unicode forms, whitespace, hyphenated
+    line breaks, bullet glyphs, page numbers and repeated headers/footers.
+    """
+    text = unicodedata.normalize("NFKC", text or "").replace("\r\n", "\n").replace("\r", "\n")
+    text = CONTROL_RE.sub(lambda match: " " if match.group().isspace() else "", text)
+    text = HYPHENATION_RE.sub(r"\1", text)
+    pages = text.split("\f")
+    repeated = repeated_page_lines(pages)
+    seen_repeated = set()
+    lines = []
+    for page in pages:
+        for line in page.splitlines():
+            line = BULLET_GLYPH_RE.sub("- ", line.strip())
+            if PAGE_NUMBER_RE.match(line):
+                continue
+            if line in repeated:
+                # Keep the first occurrence: on page one it is usually the name/contact header
+                if line in seen_repeated:
+                    continue
+                seen_repeated.add(line)
+            if not line and (not lines or not lines[-1]):
+                continue
+            if line and lines and line == lines[-1]:
+                continue
+            lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def split_sections(text):
+    """
+    Splits resume text into [(section, lines)] at recognised headings.
+    Text before the first heading is the "header"; unrecognised headings stay
+    with the section above them.
+    """
+    sections = [("header", [])]
+    for line in text.split("\n"):
+        name = next((name for name, pattern in SECTION_RE.items() if pattern.match(line)), None)
+        if name is not None:
+            sections.append((name, []))
+        sections[-1][1].append(line)
+    return sections
+
+
+def fit_to_budget(text, max_tokens=DEFAULT_TOKEN_BUDGET):
+    """
+    Shortens text to at most max_tokens (estimated), trimming the tails of the
+    lowest-priority sections first, then dropping them, keeping the original
+    section order. Returns (text, truncated).
+    """
+    budget = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= budget:
+        return text, False
+    sections = split_sections(text)
+    size = len(text)
+    trimmed = set()
+
+    def priority(index):
+        name = sections[index][0]
+        rank = SECTION_PRIORITY.index(name) if name in SECTION_PRIORITY else len(SECTION_PRIORITY)
+        return (rank, index)
+
+    order = sorted(range(len(sections)), key=priority, reverse=True)
+    # First shorten sections to their opening lines, then drop whole sections
+    for keep in (MIN_SECTION_LINES, 0):
+        for index in order:
+            name, lines = sections[index]
+            if name == "header" and keep == 0:
+                continue
+            while size > budget and len(lines) > keep:
+                size -= len(lines.pop()) + 1
+                if index not in trimmed:
+                    trimmed.add(index)
+                    size += len(TRUNCATION_MARKER) + 1
+            if size <= budget:
+                break
+        if size <= budget:
+            break
+    parts = []
+    for index, (_, lines) in enumerate(sections):
+        if lines:
+            parts.extend(lines)
+            if index in trimmed:
+                parts.append(TRUNCATION_MARKER)
+    compacted = "\n".join(parts)
+    # A header alone larger than the budget is cut outright
+    return compacted[:budget], True
+
+
+def compact_resume(text, max_tokens=DEFAULT_TOKEN_BUDGET):
+    """
+    Cleans the resume text and fits it into the token budget. Returns
+    (compacted_text, stats) where stats holds raw_tokens, resume_tokens and truncated.
+    """
+    cleaned = clean_resume_text(text)
+    compacted, truncated = fit_to_budget(cleaned, max_tokens)
+    return compacted, {
+        "raw_tokens": estimate_tokens(text),
+        "resume_tokens": estimate_tokens(compacted),
+        "truncated": truncated,
+    }
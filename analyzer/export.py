@@ -0,0 +1,194 @@
+import argparse
+import csv
+import io
+import json
+import sys
+import tempfile
+
+from analyzer.storage import DB_PATH, USER_DATA_COLUMNS, get_database, user_data_filters
+
+# ===========================
+# Streaming Data Export
+# ===========================
+# Exports read user_data through a cursor in fixed-size chunks and yield the
+# encoded output chunk by chunk, so memory use does not grow with the table.
+
+EXPORT_CHUNK_ROWS = 1000
+# Spooled exports stay in memory up to this size, then move to a temporary file
+EXPORT_SPOOL_BYTES = 8 * 1024 * 1024
+
+EXPORT_FORMATS = {
+    "jsonl": ("user_data.jsonl", "application/x-ndjson"),
+    "csv": ("user_data.csv", "text/csv"),
+    "parquet": ("user_data.parquet", "application/vnd.apache.parquet"),
+}
+
+
+def iter_row_chunks(db, filters=None, chunk_size=EXPORT_CHUNK_ROWS):
+    """
+    Yields lists of user_data rows (in id order) matching the filters.
+    """
+    where, params = user_data_filters(filters)
+    with db.read() as conn:
+        cursor = conn.execute(
+            f"SELECT {', '.join(USER_DATA_COLUMNS)} FROM user_data WHERE {where} ORDER BY id", params
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+
+def iter_jsonl(db, filters=None, chunk_size=EXPORT_CHUNK_ROWS):
+    """
+    Yields the export as JSON Lines, one encoded chunk of rows at a time.
+    """
+    for rows in iter_row_chunks(db, filters, chunk_size):
+        yield "".join(json.dumps(dict(zip(USER_DATA_COLUMNS, row))) + "\n" for row in rows).encode("utf-8")
+
+
+def iter_csv(db, filters=None, chunk_size=EXPORT_CHUNK_ROWS):
+    """
+    Yields the export as CSV (with a header row), one encoded chunk of rows at a time.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(USER_DATA_COLUMNS)
+    for rows in iter_row_chunks(db, filters, chunk_size):
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file object that collects bytes until they are drained.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_parquet(db, filters=None, chunk_size=EXPORT_CHUNK_ROWS):
+    """
+    Yields the export as Parquet with one row group per chunk. Requires pyarrow.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow).") from e
+    # Every exported column is text except these
+    integer_columns = {"id", "resume_score", "latency_ms"}
+    schema = pa.schema([(column, pa.int64() if column in integer_columns else pa.string())
+                        for column in USER_DATA_COLUMNS])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for rows in iter_row_chunks(db, filters, chunk_size):
+            columns = list(zip(*rows))
+            # strict: a row whose width differs from the schema raises instead of silently losing columns
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema, strict=True)],
+                schema=schema
+            ))
+            yield sink.drain()
+    yield sink.drain()
+
+
+EXPORTERS = {"jsonl": iter_jsonl, "csv": iter_csv, "parquet": iter_parquet}
+
+
+def iter_export(db, fmt, filters=None, chunk_size=EXPORT_CHUNK_ROWS):
+    """
+    Yields the encoded export in the given format ("jsonl", "csv" or "parquet").
+    """
+    return EXPORTERS[fmt](db, filters, chunk_size)
+
+
+class _SpooledExport(io.RawIOBase):
+    """
+    Read-only raw file over a SpooledTemporaryFile, the kind of file object
+    st.download_button accepts.
+    """
+
+    def __init__(self, spool):
+        self.spool = spool
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self.spool.seek(offset, whence)
+
+    def readinto(self, buffer):
+        return self.spool.readinto(buffer)
+
+    def close(self):
+        self.spool.close()
+        super().close()
+
+
+def spool_export(db, fmt, filters=None, chunk_size=EXPORT_CHUNK_ROWS):
+    """
+    Writes the export chunk by chunk to a temporary file (kept in memory up
+    to EXPORT_SPOOL_BYTES) and returns it rewound, as a raw file object.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+    for chunk in iter_export(db, fmt, filters, chunk_size):
+        spool.write(chunk)
+    spool.seek(0)
+    return _SpooledExport(spool)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream user_data to JSON Lines, CSV or Parquet.")
+    parser.add_argument("--format", choices=sorted(EXPORTERS), default="jsonl")
+    parser.add_argument("--out", default="-", help="output file (default: stdout)")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database file")
+    parser.add_argument("--min-score", type=int)
+    parser.add_argument("--max-score", type=int)
+    parser.add_argument("--date-from", help="YYYY-MM-DD")
+    parser.add_argument("--date-to", help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--skill")
+    args = parser.parse_args(argv)
+
+    filters = {
+        "min_score": args.min_score, "max_score": args.max_score,
+        "date_from": args.date_from, "date_to": args.date_to, "skill": args.skill,
+    }
+    out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+    try:
+        for chunk in iter_export(get_database(args.db), args.format, filters):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
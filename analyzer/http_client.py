@@ -0,0 +1,180 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ===========================
+# Pooled HTTP Client for the LLM API
+# ===========================
+# One process-wide requests.Session keeps TLS connections to OpenRouter alive
+# across analyses. Every call is bounded by connect/read timeouts, retried with
+# jittered exponential backoff on 429/5xx, and guarded by a circuit breaker so a
+# dead upstream fails fast instead of pinning Streamlit script threads. An
+# optional rate limiter spaces attempts out across processes.
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when the circuit breaker is open and the upstream call is skipped.
+    """
+
+
+class CircuitBreaker:
+    """
+    Opens after a run of consecutive failures and lets one probe through after a cooldown.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now):
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        """
+        Raises CircuitOpenError unless a call is currently allowed.
+        """
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "open" or (state == "half_open" and self._probing):
+                remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+                raise CircuitOpenError(
+                    f"Upstream API is unavailable; retrying in {max(remaining, 0):.0f}s."
+                )
+            if state == "half_open":
+                self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def cancel_call(self):
+        """
+        Gives up a call allowed by before_call() without an outcome (it never
+        reached the upstream), so the half-open probe slot is free again.
+        """
+        with self._lock:
+            self._probing = False
+
+
+class HttpClient:
+    """
+    Thread-safe HTTP client with a keep-alive connection pool, timeouts,
+    bounded retries and a circuit breaker.
+    """
+
+    def __init__(self, connect_timeout=5.0, read_timeout=120.0, max_retries=3,
+                 backoff_base=0.5, backoff_max=8.0, pool_size=20,
+                 failure_threshold=5, reset_timeout=30.0):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _backoff(self, attempt, response=None):
+        """
+        Returns the delay before the next attempt: Retry-After if given, otherwise full jitter.
+        """
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def post(self, url, breaker=None, max_retries=None, rate_limiter=None, **kwargs):
+        """
+        POSTs with retries. Returns the final response (which may still be an
+        error status) or raises the last connection error / CircuitOpenError.
+        breaker and max_retries override the client's own for this call.
+        rate_limiter (see analyzer.admission) is acquired before every attempt;
+        a 429 penalizes it for the backoff delay instead of sleeping here, so
+        every caller sharing the limiter backs off together.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        breaker = breaker or self.breaker
+        max_retries = self.max_retries if max_retries is None else max_retries
+        for attempt in range(max_retries + 1):
+            breaker.before_call()
+            try:
+                if rate_limiter is not None:
+                    rate_limiter.acquire()
+            except BaseException:
+                breaker.cancel_call()
+                raise
+            last_attempt = attempt == max_retries
+            try:
+                response = self.session.post(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                breaker.record_failure()
+                if last_attempt:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            except BaseException:
+                # Anything else (an invalid URL, too many redirects, ...) still ends the call,
+                # or a half-open breaker would wait for its probe forever
+                breaker.record_failure()
+                raise
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                return response
+            delay = self._backoff(attempt, response)
+            response.close()
+            if rate_limiter is not None and response.status_code == 429:
+                rate_limiter.penalize(delay)
+            else:
+                time.sleep(delay)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """
+    Returns the process-wide HTTP client, creating it on first use.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
@@ -0,0 +1,374 @@
+import json
+import os
+import threading
+import uuid
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from analyzer.admission import MAX_CONCURRENT, get_admission, process_alive
+from analyzer.analysis import DEFAULT_ANALYSIS_MODE, MODEL_NAME, PROMPT_VERSION, analyze_resume, refresh_section
+from analyzer.cache import make_cache_key
+
+# ===========================
+# Background Analysis Jobs
+# ===========================
+# "Analyze Resume" only enqueues a job and gets its id back; a worker pool
+# runs the LLM call off the Streamlit script thread. Jobs are rows in
+# resume_data.db, so a rerun, a websocket reconnect or even a server restart
+# does not lose a paid request: the dashboard just looks the job up again.
+# Several processes (API workers, Streamlit) can share one database: each
+# job records the pid running it, only jobs whose process is gone are
+# picked up again at startup, and a resume already queued or running in
+# any live process is joined rather than analyzed twice. The sections
+# received so far and the job's place in the upstream queue are copied to
+# its row, so every process can report them. Jobs belong to a client (a dashboard session,
+# an API caller); workers take them round-robin across clients, and each job
+# waits for its upstream slot in the host-wide fair queue (analyzer/admission.py).
+# Regenerating one section of an analysis is a job too, of mode
+# "refresh:<field>"; it updates the saved analysis it belongs to.
+
+# Workers mostly wait on the LLM or for an upstream slot; the admission queue,
+# not this pool, bounds upstream concurrency, so there are enough to fill it
+JOB_WORKERS = max(4, 2 * MAX_CONCURRENT)
+# Statuses of jobs that have not finished yet
+ACTIVE_STATUSES = ("queued", "running")
+# Mode of a job that regenerates one field of an analysis, followed by the field name
+REFRESH_MODE_PREFIX = "refresh:"
+
+ANALYSIS_JOB_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS analysis_job (
+        id TEXT PRIMARY KEY,
+        resume_key TEXT NOT NULL,
+        mode TEXT NOT NULL,
+        resume_text TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        result TEXT,
+        error TEXT,
+        created_at TEXT NOT NULL DEFAULT (datetime('now')),
+        finished_at TEXT,
+        owner INTEGER,
+        save INTEGER NOT NULL DEFAULT 0,
+        record_id INTEGER,
+        sections TEXT,
+        queue TEXT
+    )''',
+    "CREATE INDEX IF NOT EXISTS idx_analysis_job_key_status ON analysis_job (resume_key, status)",
+)
+
+# Columns added to analysis_job after its original release, with their types
+ANALYSIS_JOB_ADDED_COLUMNS = (
+    ("owner", "INTEGER"), ("save", "INTEGER NOT NULL DEFAULT 0"), ("record_id", "INTEGER"),
+    ("sections", "TEXT"), ("queue", "TEXT"),
+)
+
+
+def job_key(resume_text, mode):
+    """
+    Identifies a job by what it would send upstream: the normalized resume
+    text, model, prompt version and mode.
+    """
+    return make_cache_key(resume_text, MODEL_NAME, f"{PROMPT_VERSION}-{mode}")
+
+
+class JobQueue:
+    """
+    Runs analysis jobs on a thread pool and records them in the analysis_job table.
+    Submitting a resume that already has a queued or running job returns that job.
+    """
+
+    def __init__(self, db, api_key, cache=None, workers=JOB_WORKERS):
+        self.db = db
+        self.api_key = api_key
+        self.cache = cache
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis-job")
+        self._lock = threading.Lock()
+        self._submit_lock = threading.Lock()
+        # job id -> sections streamed so far, and resume_key -> active job id
+        self._sections = {}
+        self._active = {}
+        # job id -> {"position", "eta_seconds"} while the job waits for an upstream slot
+        self._queue_positions = {}
+        # client -> jobs waiting for a worker, and client -> jobs running in this process
+        self._pending = {}
+        self._running = Counter()
+        self._resume_unfinished()
+
+    def _resume_unfinished(self):
+        # Jobs cut off by a restart are run again from their stored resume text
+        rows = self.db.query(
+            f"SELECT id, resume_key, mode, resume_text, owner, save FROM analysis_job "
+            f"WHERE status IN ({', '.join('?' * len(ACTIVE_STATUSES))}) ORDER BY created_at",
+            ACTIVE_STATUSES,
+        )
+        for job_id, resume_key, mode, resume_text, owner, save in rows:
+            if process_alive(owner) and owner != os.getpid():
+                continue
+            # Claim the job; of several processes starting at once only one succeeds
+            claimed = self.db.writer.submit(lambda conn, job_id=job_id, owner=owner: conn.execute(
+                "UPDATE analysis_job SET owner = ? WHERE id = ? AND owner IS ?", (os.getpid(), job_id, owner)
+            ).rowcount).result()
+            if claimed:
+                self._start(job_id, resume_key, mode, resume_text, bool(save))
+
+    def _start(self, job_id, resume_key, mode, resume_text, save):
+        with self._lock:
+            self._sections[job_id] = {}
+            self._active[resume_key] = job_id
+        self._enqueue(f"job:{job_id}", (job_id, resume_key, mode, resume_text, save))
+
+    def _enqueue(self, client, job):
+        with self._lock:
+            self._pending.setdefault(client, deque()).append(job)
+        self._pool.submit(self._run_next)
+
+    def _next_job(self):
+        """
+        Returns (client, job) for a free worker, from the client with the fewest
+        jobs running in this process, or None. Clients at the per-client cap
+        are skipped: their jobs would only hold a worker while they wait.
+        """
+        cap = get_admission().max_per_client
+        with self._lock:
+            # Ties go to the client that has been waiting longest (dict order)
+            eligible = [client for client in self._pending if cap <= 0 or self._running[client] < cap]
+            if not eligible:
+                return None
+            client = min(eligible, key=lambda client: self._running[client])
+            jobs = self._pending[client]
+            job = jobs.popleft()
+            if not jobs:
+                del self._pending[client]
+            self._running[client] += 1
+            return client, job
+
+    def _run_next(self):
+        # Every enqueue and every finished job schedules one pick, so skipped jobs are picked later
+        picked = self._next_job()
+        if picked is None:
+            return
+        client, job = picked
+        try:
+            self._run(*job, client)
+        finally:
+            with self._lock:
+                self._running[client] -= 1
+                if not self._running[client]:
+                    del self._running[client]
+                pending = bool(self._pending)
+            if pending:
+                self._pool.submit(self._run_next)
+
+    def submit(self, resume_text, mode=DEFAULT_ANALYSIS_MODE, save=False, client=None):
+        """
+        Enqueues an analysis and returns its job id right away, or the id of the
+        in-flight job for the same resume and mode. With save, the finished
+        analysis is also stored in user_data and its id kept as the job's record_id.
+        client names who asked for it (a session or API caller id) for the
+        fair queue; without one the job is a client of its own.
+        """
+        resume_key = job_key(resume_text, mode)
+        # One submission at a time, so a resume is never registered twice while its row is being written
+        with self._submit_lock:
+            with self._lock:
+                job_id = self._active.get(resume_key)
+            # Asking for a save only counts while the job is unfinished; one that finished
+            # unsaved in the meantime is not joined
+            if job_id is not None and (not save or self.db.writer.submit(lambda conn: conn.execute(
+                f"UPDATE analysis_job SET save = 1 "
+                f"WHERE id = ? AND status IN ({', '.join('?' * len(ACTIVE_STATUSES))})",
+                (job_id, *ACTIVE_STATUSES),
+            ).rowcount).result()):
+                return job_id
+            job_id = uuid.uuid4().hex
+            # Wait for the row so a poll right after submit always finds the job
+            other_id = self.db.writer.submit(
+                lambda conn: self._insert_or_join(conn, job_id, resume_key, mode, resume_text, save)
+            ).result()
+            if other_id is not None:
+                return other_id
+            with self._lock:
+                self._sections[job_id] = {}
+                self._active[resume_key] = job_id
+        self._enqueue(client or f"job:{job_id}", (job_id, resume_key, mode, resume_text, save))
+        return job_id
+
+    def submit_refresh(self, resume_text, field, record_id=None, client=None):
+        """
+        Enqueues regenerating one field of an analysis and returns the job id;
+        the job's result is {field: new value}. With record_id, the saved
+        analysis is updated with the new value when the job finishes.
+        Refreshes are never joined: each one asks for a new value.
+        """
+        job_id = uuid.uuid4().hex
+        mode = REFRESH_MODE_PREFIX + field
+        resume_key = job_key(resume_text, mode)
+        self.db.write(
+            "INSERT INTO analysis_job (id, resume_key, mode, resume_text, owner, save, record_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, resume_key, mode, resume_text, os.getpid(), int(record_id is not None), record_id),
+        ).result()
+        with self._lock:
+            self._sections[job_id] = {}
+        self._enqueue(client or f"job:{job_id}", (job_id, resume_key, mode, resume_text, record_id is not None))
+        return job_id
+
+    def _insert_or_join(self, conn, job_id, resume_key, mode, resume_text, save):
+        """
+        Runs in one write transaction, so processes submitting the same resume
+        at once agree on a single job. Returns the id of a queued or running job
+        for the resume in a live process (asking it to save its result if
+        needed), or inserts the new job and returns None.
+        """
+        rows = conn.execute(
+            f"SELECT id, owner FROM analysis_job "
+            f"WHERE resume_key = ? AND status IN ({', '.join('?' * len(ACTIVE_STATUSES))})",
+            (resume_key, *ACTIVE_STATUSES),
+        ).fetchall()
+        for other_id, owner in rows:
+            if process_alive(owner):
+                if save:
+                    conn.execute("UPDATE analysis_job SET save = 1 WHERE id = ?", (other_id,))
+                return other_id
+        conn.execute(
+            "INSERT INTO analysis_job (id, resume_key, mode, resume_text, owner, save) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, resume_key, mode, resume_text, os.getpid(), int(save)),
+        )
+        return None
+
+    def _run(self, job_id, resume_key, mode, resume_text, save, client):
+        admission = get_admission()
+
+        def on_section(key, value):
+            self._sections[job_id][key] = value
+            # Best effort, for polls served by other processes; the final result does not depend on it
+            self.db.write("UPDATE analysis_job SET sections = ? WHERE id = ?",
+                          (json.dumps(self._sections[job_id]), job_id))
+
+        def on_wait(position, eta):
+            queue = {"position": position, "eta_seconds": round(eta)} if position else None
+            if queue == self._queue_positions.get(job_id):
+                return
+            if queue:
+                self._queue_positions[job_id] = queue
+            else:
+                self._queue_positions.pop(job_id, None)
+            self.db.write("UPDATE analysis_job SET queue = ? WHERE id = ?",
+                          (json.dumps(queue) if queue else None, job_id))
+
+        def admit():
+            return admission.slot(client, on_wait)
+
+        try:
+            try:
+                self.db.write("UPDATE analysis_job SET status = 'running' WHERE id = ?", (job_id,))
+                if mode.startswith(REFRESH_MODE_PREFIX):
+                    result = self._refresh(mode[len(REFRESH_MODE_PREFIX):], resume_text, on_section, admit)
+                else:
+                    result = analyze_resume(resume_text, self.api_key, cache=self.cache, on_section=on_section,
+                                            mode=mode, on_prompt=self.db.log_prompt, admit=admit)
+            except Exception as e:
+                result = {"error": f"Analysis failed: {e}"}
+            record_id = None
+            if "error" in result:
+                status, payload, error = "error", None, result["error"]
+            else:
+                status, payload, error = "done", json.dumps(result), None
+            with self._lock:
+                # Free the resume before the job reads as finished, so a resubmit right after starts anew
+                if self._active.get(resume_key) == job_id:
+                    del self._active[resume_key]
+            try:
+                # Submissions joining the job until it is finished may ask for the result to be
+                # saved, so an unsaved finish only goes through while save is still 0
+                finished = status == "done" and not save and self._finish(
+                    job_id, status, payload, error, record_id, unless_saved=True)
+                if not finished:
+                    if status == "done":
+                        try:
+                            record_id = self._save(job_id, mode, result, resume_text)
+                        except Exception as e:
+                            status, error = "error", f"Saving the analysis failed: {e}"
+                    self._finish(job_id, status, payload, error, record_id)
+            except Exception as e:
+                # Never leave the row 'running': a later poll would wait on it forever
+                self._finish(job_id, "error", None, f"Recording the result failed: {e}", None)
+        finally:
+            with self._lock:
+                self._sections.pop(job_id, None)
+                self._queue_positions.pop(job_id, None)
+                if self._active.get(resume_key) == job_id:
+                    del self._active[resume_key]
+
+    def _refresh(self, field, resume_text, on_section, admit):
+        value = refresh_section(resume_text, field, self.api_key, self.cache, admit=admit)
+        if isinstance(value, dict) and set(value) == {"error"}:
+            return value
+        on_section(field, value)
+        return {field: value}
+
+    def _save(self, job_id, mode, result, resume_text):
+        """
+        Stores a finished job's result and returns its record id: a new
+        analysis, or for a refresh the saved analysis it updated (None if
+        that one is gone or archived).
+        """
+        if not mode.startswith(REFRESH_MODE_PREFIX):
+            return self.db.insert_analysis(result, resume_text=resume_text).result()
+        (record_id,) = self.db.query("SELECT record_id FROM analysis_job WHERE id = ?", (job_id,))[0]
+        return record_id if self.db.update_analysis_fields(record_id, result).result() else None
+
+    def _finish(self, job_id, status, payload, error, record_id, unless_saved=False):
+        """
+        Records the outcome of a job; returns whether the row was updated,
+        which with unless_saved is only while nobody asked for a save.
+        """
+        # The resume text is only kept while it may be needed to rerun the job
+        return bool(self.db.writer.submit(lambda conn: conn.execute(f'''
+            UPDATE analysis_job SET status = ?, result = ?, error = ?, record_id = ?, resume_text = '',
+                sections = NULL, queue = NULL, finished_at = datetime('now')
+            WHERE id = ?{" AND save = 0" if unless_saved else ""}
+        ''', (status, payload, error, record_id, job_id)).rowcount).result())
+
+    def get(self, job_id):
+        """
+        Returns {"status", "sections", "result", "error", "record_id", "queue"}
+        for a job, or None if the id is unknown. sections holds what has
+        streamed in so far while the job is running; queue is
+        {"position", "eta_seconds"} while it waits for an upstream slot, else None.
+        Both come from memory when the job runs in this process, else from its row.
+        """
+        rows = self.db.query(
+            "SELECT status, result, error, record_id, sections, queue FROM analysis_job WHERE id = ?", (job_id,))
+        if not rows:
+            return None
+        status, result, error, record_id, sections, queue = rows[0]
+        local = self._sections.get(job_id)
+        if local is not None:
+            sections, queue = dict(local), self._queue_positions.get(job_id)
+        else:
+            sections, queue = json.loads(sections) if sections else {}, json.loads(queue) if queue else None
+        return {
+            "status": status,
+            "sections": sections,
+            "result": json.loads(result) if result else None,
+            "error": error,
+            "record_id": record_id,
+            "queue": queue,
+        }
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_job_queue(db, api_key, cache=None):
+    """
+    Returns the process-wide JobQueue for a database, creating it on first use.
+    """
+    with _queues_lock:
+        if db.path not in _queues:
+            _queues[db.path] = JobQueue(db, api_key, cache)
+        return _queues[db.path]
@@ -0,0 +1,284 @@
+import argparse
+import json
+import math
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+
+import numpy as np
+
+from analyzer.admission import get_admission
+from analyzer.analysis import ANALYSIS_MODES, DEFAULT_ANALYSIS_MODE, analyze_resume, parse_resume_score, validate_resume
+from analyzer.batch import DEFAULT_CONCURRENCY, ArchiveLimitError, iter_resume_files, load_api_key
+from analyzer.pdf import extract_pdf_text
+from analyzer.prescore import find_keywords, prescore_resume
+from analyzer.search import DEFAULT_DIM, SearchIndex, hashed_counts, normalize_term
+from analyzer.storage import DB_PATH, get_database, split_joined
+
+# ===========================
+# Job-Description Matching
+# ===========================
+# "Rank these 500 applicants for this job" without 500 LLM calls: the job
+# description is turned into weighted skills and hashed term counts once,
+# every applicant is scored against it in one vectorized pass over their
+# locally extracted (or stored) skills, ATS keywords and text, and only the
+# top-K shortlist is sent to the LLM for the full critique. The cost of a
+# ranking then grows with K, not with the number of applicants.
+
+# Share of the match score that comes from skill coverage; the rest is text similarity
+SKILL_WEIGHT = 0.7
+DEFAULT_SHORTLIST = 10
+
+
+class JobProfile:
+    """
+    A job description preprocessed once: the skills it asks for, weighted by
+    how many of its lines mention them, and its hashed term counts.
+    """
+
+    def __init__(self, text, dim=DEFAULT_DIM):
+        self.text = text
+        self.dim = dim
+        mentions = {}
+        for line in text.splitlines():
+            for skill in find_keywords(line):
+                mentions[skill] = mentions.get(skill, 0) + 1
+        self.skills = list(mentions)
+        self.weights = np.array([1.0 + math.log(count) for count in mentions.values()], dtype=np.float32)
+        self.slots = hashed_counts(text, dim)
+
+    def term_weights(self):
+        return dict(zip(self.skills, self.weights.tolist()))
+
+    def match_scores(self, coverage, similarity):
+        """
+        Combines skill coverage and text similarity (arrays in 0..1) into
+        match scores out of 100. A description without recognised skills is
+        matched on text alone.
+        """
+        skill_weight = SKILL_WEIGHT if self.skills else 0.0
+        return 100.0 * (skill_weight * coverage + (1.0 - skill_weight) * np.clip(similarity, 0.0, None))
+
+
+def rank_applicants(profile, applicants):
+    """
+    Scores applicant dicts (with "skills" and "text") against the profile and
+    returns them best first, each with match, matched_skills and
+    missing_skills added.
+    """
+    columns = {normalize_term(skill): j for j, skill in enumerate(profile.skills)}
+    has_skill = np.zeros((len(applicants), len(profile.skills)), dtype=np.float32)
+    counts = np.zeros((len(applicants), profile.dim), dtype=np.float32)
+    for i, applicant in enumerate(applicants):
+        for skill in applicant["skills"]:
+            j = columns.get(normalize_term(skill))
+            if j is not None:
+                has_skill[i, j] = 1.0
+        slots = hashed_counts(applicant["text"], profile.dim)
+        counts[i, list(slots)] = list(slots.values())
+
+    total = profile.weights.sum()
+    coverage = has_skill @ profile.weights / total if total else np.zeros(len(applicants), dtype=np.float32)
+    # IDF over the applicant pool: terms every applicant uses say little about fit
+    document_freq = (counts != 0).sum(axis=0)
+    idf = np.log((1.0 + len(applicants)) / (1.0 + document_freq)) + 1.0
+    documents = counts * idf
+    documents /= np.maximum(np.linalg.norm(documents, axis=1, keepdims=True), 1e-12)
+    query = np.zeros(profile.dim, dtype=np.float32)
+    query[list(profile.slots)] = list(profile.slots.values())
+    query *= idf
+    query /= max(np.linalg.norm(query), 1e-12)
+    match = profile.match_scores(coverage, documents @ query)
+
+    ranked = []
+    for i in np.argsort(-match, kind="stable"):
+        ranked.append(dict(
+            applicants[i],
+            match=round(float(match[i]), 1),
+            matched_skills=[skill for j, skill in enumerate(profile.skills) if has_skill[i, j]],
+            missing_skills=[skill for j, skill in enumerate(profile.skills) if not has_skill[i, j]],
+        ))
+    return ranked
+
+
+def local_applicant(name, text):
+    """
+    Builds an applicant from resume text with the local pre-scoring only (no LLM).
+    """
+    local = prescore_resume(text)
+    return {
+        "file": name,
+        "name": local["basic_info"]["name"],
+        "resume_score": parse_resume_score(local["resume_score"]),
+        "skills": local["ats_keywords"],
+        "text": text,
+    }
+
+
+def extract_applicants(sources, workers=None):
+    """
+    Extracts and pre-scores (name, pdf_bytes) resumes on a process pool.
+    Returns (applicants, rejected) where rejected holds {"file", "error"} dicts.
+    sources is consumed lazily, so only a few PDFs are held in memory at once.
+    """
+    applicants, rejected = [], []
+    workers = workers or min(4, os.cpu_count() or 1)
+    sources = iter(sources)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+
+        def fill():
+            # Keep only a couple of PDFs per worker in flight to bound memory, as run_batch does
+            while len(pending) < workers * 2:
+                source = next(sources, None)
+                if source is None:
+                    break
+                name, data = source
+                pending[pool.submit(extract_pdf_text, data)] = name
+
+        fill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    text = future.result()
+                except Exception as e:
+                    rejected.append({"file": name, "error": str(e)})
+                    continue
+                if not validate_resume(text):
+                    rejected.append({"file": name, "error": "The document does not appear to be a valid resume."})
+                    continue
+                applicants.append(local_applicant(name, text))
+            fill()
+    # Completion order is arbitrary; keep rankings with equal scores reproducible
+    applicants.sort(key=lambda applicant: applicant["file"])
+    return applicants, rejected
+
+
+def rank_stored(profile, index, db, k=DEFAULT_SHORTLIST):
+    """
+    Ranks the analyses already in user_data through the search index and
+    returns the top k as dicts with record_id, name, resume_score, match and
+    matched/missing skills.
+    """
+    index.sync(db)
+    ids, coverage, similarity = index.score_all(profile.term_weights(), profile.text)
+    if not len(ids):
+        return []
+    match = profile.match_scores(coverage, similarity)
+    top = np.argpartition(-match, min(k, len(match)) - 1)[:k]
+    top = top[np.argsort(-match[top], kind="stable")]
+    top_ids = [int(analysis_id) for analysis_id in ids[top]]
+    rows = db.query(f'''
+        SELECT id, name, resume_score, skills, ats_keywords FROM user_data
+        WHERE id IN ({", ".join("?" * len(top_ids))})
+    ''', top_ids)
+    records = {row[0]: row for row in rows}
+    ranked = []
+    for analysis_id, score in zip(top_ids, match[top]):
+        if analysis_id not in records:
+            continue
+        _, name, resume_score, skills, keywords = records[analysis_id]
+        listed = {normalize_term(term) for term in split_joined(skills) + split_joined(keywords)}
+        ranked.append({
+            "record_id": analysis_id,
+            "name": name,
+            "resume_score": resume_score,
+            "match": round(float(score), 1),
+            "matched_skills": [skill for skill in profile.skills if normalize_term(skill) in listed],
+            "missing_skills": [skill for skill in profile.skills if normalize_term(skill) not in listed],
+        })
+    return ranked
+
+
+def analyze_shortlist(shortlist, api_key, db, concurrency=DEFAULT_CONCURRENCY, cache=None,
+                      mode=DEFAULT_ANALYSIS_MODE):
+    """
+    Runs the full analysis for shortlisted applicants (dicts from
+    rank_applicants), saves each result to user_data and yields one status
+    dict per applicant as it finishes. Upstream requests queue as the
+    "matching" client (see analyzer.admission).
+    """
+    def analyze(applicant):
+        return analyze_resume(applicant["text"], api_key, cache=cache, mode=mode, on_prompt=db.log_prompt,
+                              admit=lambda: get_admission().slot("matching"))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(analyze, applicant): applicant for applicant in shortlist}
+        for future in as_completed(futures):
+            applicant = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"error": str(e)}
+            if "error" in result:
+                yield {"file": applicant["file"], "match": applicant["match"], "status": "error",
+                       "error": result["error"]}
+                continue
+            yield {
+                "file": applicant["file"],
+                "match": applicant["match"],
+                "status": "saved",
+                "record_id": db.insert_analysis(result, resume_text=applicant["text"]).result(),
+                "name": result.get("basic_info", {}).get("name", "Null"),
+                "resume_score": parse_resume_score(result.get("resume_score", "70/100")),
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Rank resumes against a job description and analyze only the best matches."
+    )
+    parser.add_argument("job", help="text file with the job description")
+    parser.add_argument("path", nargs="?", help="PDF file, folder or ZIP archive of resumes")
+    parser.add_argument("--stored", action="store_true", help="rank the analyses already in the database instead")
+    parser.add_argument("--top", type=int, default=DEFAULT_SHORTLIST, help="shortlist size")
+    parser.add_argument("--analyze", action="store_true",
+                        help="run the full LLM analysis for the shortlist and save it to user_data")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database file")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="maximum number of API requests in flight")
+    parser.add_argument("--mode", choices=ANALYSIS_MODES, default=DEFAULT_ANALYSIS_MODE,
+                        help="analysis mode for the shortlist")
+    parser.add_argument("--no-cache", action="store_true", help="skip the analysis cache")
+    args = parser.parse_args(argv)
+    if not args.stored and not args.path:
+        parser.error("give a resume path or --stored")
+    api_key = load_api_key()
+    if args.analyze and not api_key and args.mode != "fast":
+        parser.error("set OPENROUTER_API_KEY or add API_KEY to .streamlit/secrets.toml")
+
+    with open(args.job, encoding="utf-8") as f:
+        profile = JobProfile(f.read())
+    db = get_database(args.db)
+    if args.stored:
+        for item in rank_stored(profile, SearchIndex.next_to(args.db), db, args.top):
+            print(json.dumps(item), flush=True)
+        return 0
+
+    try:
+        applicants, rejected = extract_applicants(iter_resume_files(args.path))
+    except ArchiveLimitError as e:
+        parser.exit(1, f"{e} Raise MAX_ZIP_MEMBERS / MAX_ZIP_MEMBER_BYTES / MAX_ZIP_TOTAL_BYTES or unpack it.\n")
+    for item in rejected:
+        print(json.dumps(dict(item, status="invalid")), flush=True)
+    shortlist = rank_applicants(profile, applicants)[:args.top]
+    for rank, applicant in enumerate(shortlist, start=1):
+        shown = {key: value for key, value in applicant.items() if key not in ("text", "skills")}
+        print(json.dumps(dict(shown, rank=rank)), flush=True)
+    if not args.analyze:
+        return 0
+    cache = None
+    if not args.no_cache:
+        from analyzer.cache import AnalysisCache
+        cache = AnalysisCache.next_to(args.db)
+    failures = 0
+    for item in analyze_shortlist(shortlist, api_key, db, args.concurrency, cache=cache, mode=args.mode):
+        failures += item["status"] != "saved"
+        print(json.dumps(item), flush=True)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
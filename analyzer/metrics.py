@@ -0,0 +1,266 @@
+import bisect
+import functools
+import math
+import os
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ===========================
+# Hot-Path Instrumentation
+# ===========================
+# In-process latency histograms and counters for the analysis pipeline,
+# rendered in the Prometheus text format (METRICS_PORT) and on the Admin
+# "Performance" panel. Set METRICS_ENABLED=0 to turn them off: decorated
+# functions are then left unwrapped and timers are a shared no-op context.
+
+ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+# The /metrics endpoint has no auth, so it only listens locally unless METRICS_HOST says otherwise
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+
+# Seconds; spans sub-millisecond parsing up to slow LLM round trips
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+                   math.inf)
+
+NULL_TIMER = nullcontext()
+REGISTRY = []
+
+
+def label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{str(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """
+    Monotonic counter, optionally split by labels.
+    """
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        if not ENABLED:
+            return
+        key = label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return dict(self._values)
+
+    def render(self):
+        return [f"{self.name}{format_labels(key)} {value}" for key, value in sorted(self.samples().items())]
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Histogram:
+    """
+    Latency histogram with fixed cumulative buckets, optionally split by labels.
+    """
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        # labels -> [per-bucket counts..., sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        if not ENABLED:
+            return
+        key = label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def time(self, **labels):
+        """
+        Context manager that observes the elapsed time of its block.
+        """
+        return _Timer(self, labels) if ENABLED else NULL_TIMER
+
+    def samples(self):
+        with self._lock:
+            return {key: list(series) for key, series in self._series.items()}
+
+    def quantile(self, series, q):
+        """
+        Estimates a quantile from bucket counts (linear within the bucket).
+        """
+        count = series[-1]
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        lower = 0.0
+        for i, bound in enumerate(self.buckets):
+            if seen + series[i] >= rank:
+                if math.isinf(bound):
+                    return lower
+                return lower + (bound - lower) * (rank - seen) / series[i]
+            seen += series[i]
+            lower = bound
+        return lower
+
+    def render(self):
+        lines = []
+        for key, series in sorted(self.samples().items()):
+            cumulative = 0
+            for i, bound in enumerate(self.buckets):
+                cumulative += series[i]
+                le = "+Inf" if math.isinf(bound) else repr(bound)
+                lines.append(f"{self.name}_bucket{format_labels(key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(key)} {series[-2]}")
+            lines.append(f"{self.name}_count{format_labels(key)} {series[-1]}")
+        return lines
+
+
+def counter(name, help_text):
+    metric = Counter(name, help_text)
+    REGISTRY.append(metric)
+    return metric
+
+
+def histogram(name, help_text, buckets=DEFAULT_BUCKETS):
+    metric = Histogram(name, help_text, buckets)
+    REGISTRY.append(metric)
+    return metric
+
+
+def timed(metric, **labels):
+    """
+    Decorator recording each call's duration in a histogram. When metrics are
+    disabled the function is returned unwrapped.
+    """
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Timer(metric, labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# Metrics of the analysis pipeline, shared by every module that records them
+PDF_EXTRACT_SECONDS = histogram("resume_pdf_extract_seconds", "PDF text extraction time")
+VALIDATE_SECONDS = histogram("resume_validate_seconds", "validate_resume time")
+LLM_REQUEST_SECONDS = histogram("resume_llm_request_seconds", "LLM round trip including streaming, by model and outcome")
+JSON_PARSE_SECONDS = histogram("resume_json_parse_seconds", "extract_json time on a full response")
+DB_INSERT_SECONDS = histogram("resume_db_insert_seconds", "Time to insert an analysis and its links")
+DB_LOCK_WAIT_SECONDS = histogram("resume_db_lock_wait_seconds",
+                                 "Wait for the SQLite write lock or a pooled read connection, by kind")
+ADMIN_RENDER_SECONDS = histogram("resume_admin_render_seconds", "Admin DataFrame and chart building, by section")
+SEARCH_SECONDS = histogram("resume_search_seconds", "Candidate search queries and index syncs, by kind")
+ADMISSION_WAIT_SECONDS = histogram("resume_admission_wait_seconds",
+                                   "Wait for an upstream slot or a rate-limit token, by kind")
+API_ERRORS = counter("resume_llm_api_errors_total", "Failed LLM requests by status code or error kind")
+JSON_PARSE_FAILURES = counter("resume_json_parse_failures_total", "LLM responses without valid JSON")
+INVALID_SECTIONS = counter("resume_invalid_sections_total", "Response fields missing or failing validation, by field")
+MODEL_FAILURES = counter("resume_llm_model_failures_total",
+                         "Failed LLM requests by model; the next model is tried if one is left")
+HEDGED_REQUESTS = counter("resume_llm_hedged_requests_total", "Requests raced against a second model, by winner")
+CACHE_REQUESTS = counter("resume_analysis_cache_requests_total", "Analysis cache lookups by result")
+
+
+def render_prometheus():
+    """
+    Returns every registered metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def summary():
+    """
+    Returns (histogram_rows, counter_rows) for display: one row per labelled
+    series, with count, mean and estimated p50/p95/p99 in milliseconds.
+    """
+    timings, counts = [], []
+    for metric in REGISTRY:
+        for key, value in sorted(metric.samples().items()):
+            labels = ", ".join(f"{name}={label}" for name, label in key)
+            if metric.kind == "counter":
+                counts.append({"metric": metric.name, "labels": labels, "value": value})
+                continue
+            count = value[-1]
+            timings.append({
+                "metric": metric.name,
+                "labels": labels,
+                "count": count,
+                "mean_ms": 1000 * value[-2] / count if count else None,
+                **{f"p{int(q * 100)}_ms": 1000 * metric.quantile(value, q) for q in (0.5, 0.95, 0.99)},
+            })
+    return timings, counts
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port, host=METRICS_HOST):
+    """
+    Serves /metrics on a background thread; later calls reuse the first server.
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
@@ -0,0 +1,247 @@
+import json
+import re
+
+# ===========================
+# Structured Output Parsing & Validation
+# ===========================
+# The model wraps its JSON in reasoning text (which may itself contain
+# braces), code fences or chatter, and sometimes emits slightly invalid JSON
+# or stops mid-object. The answer is located with one brace-aware pass,
+# lightly repaired if needed, and then checked field by field against the
+# documented response structure so that every valid section is kept and only
+# the missing ones have to be asked for again.
+
+THINK_BLOCK_RE = re.compile(r"<think>.*?(?:</think>|$)", re.DOTALL)
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "„": '"'})
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+SCORE_RE = re.compile(r"\d+")
+STRUCTURE_RE = re.compile(r'\\.|[{}"]', re.DOTALL)
+WORD_RE = re.compile(r"\w+")
+
+
+def iter_json_objects(text):
+    """
+    Yields (start, end) spans of top-level {...} objects in one pass, ignoring
+    braces inside strings. A final unterminated object yields (start, None).
+    """
+    depth = 0
+    start = None
+    in_string = False
+    # Only braces, quotes and escapes matter; the regex skips everything else
+    for match in STRUCTURE_RE.finditer(text):
+        token = match.group()
+        if in_string:
+            if token == '"':
+                in_string = False
+        elif token == "{":
+            if depth == 0:
+                start = match.start()
+            depth += 1
+        elif token == '"' and depth:
+            in_string = True
+        elif token == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                yield start, match.end()
+    if depth:
+        yield start, None
+
+
+def repair_json(fragment):
+    """
+    Fixes the usual model mistakes in a JSON object: smart quotes, Python
+    literals, raw newlines in strings, trailing commas, and a truncated tail
+    (cut back to the last complete member, then brackets closed).
+    """
+    out = []
+    stack = []
+    in_string = False
+    escape = False
+    # Where the text can be cut and still be closed into valid JSON
+    safe_length, safe_stack = 0, []
+    text = fragment.translate(SMART_QUOTES)
+    pos = 0
+    while pos < len(text):
+        ch = text[pos]
+        pos += 1
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            elif ch == "\n":
+                ch = "\\n"
+            out.append(ch)
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch.isalpha():
+            # \w, not [A-Za-z]: isalpha() is true for non-ASCII letters too
+            match = WORD_RE.match(text, pos - 1)
+            word = match.group() if match else ch
+            ch = PYTHON_LITERALS.get(word, word)
+            pos += len(word) - 1
+        elif ch == ",":
+            safe_length, safe_stack = len(out), list(stack)
+        elif ch in ("}", "]"):
+            # Drop a trailing comma before the closing bracket
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+        out.append(ch)
+        if ch in ("{", "["):
+            stack.append("}" if ch == "{" else "]")
+            safe_length, safe_stack = len(out), list(stack)
+        elif ch in ("}", "]") and stack:
+            stack.pop()
+            safe_length, safe_stack = len(out), list(stack)
+    repaired = "".join(out)
+    if stack or in_string:
+        repaired = "".join(out[:safe_length]) + "".join(reversed(safe_stack))
+    return repaired
+
+
+def load_object(fragment):
+    """
+    Parses a JSON object, repairing it if needed. Returns a dict or None.
+    """
+    for candidate in (fragment, None):
+        try:
+            value = json.loads(candidate if candidate is not None else repair_json(fragment))
+        except (ValueError, AttributeError, RecursionError):
+            # A fragment the repair cannot handle is simply not an object
+            continue
+        return value if isinstance(value, dict) else None
+    return None
+
+
+def parse_json_object(text):
+    """
+    Extracts the model's JSON answer from free-form output. Reasoning blocks
+    are skipped; of the objects found, the one with the most top-level keys
+    wins (the answer, not a brace-y aside). Returns {} if none parses.
+    """
+    text = THINK_BLOCK_RE.sub("", text or "")
+    best = {}
+    for start, end in iter_json_objects(text):
+        value = load_object(text[start:end] if end is not None else text[start:])
+        if value is not None and len(value) >= len(best):
+            best = value
+    return best
+
+
+# ---------------------------
+# Response schema
+# ---------------------------
+# One normalizer per documented field: it returns the cleaned value or raises
+# ValueError when the value cannot be used.
+
+def _text(value):
+    if isinstance(value, (dict, list)) or value is None:
+        raise ValueError("expected text")
+    return str(value).strip()
+
+
+def _text_list(value, minimum=1):
+    if isinstance(value, str):
+        value = [item for item in re.split(r"\s*[,;\n]\s*", value) if item]
+    if not isinstance(value, list):
+        raise ValueError("expected a list")
+    items = [_text(item) for item in value if item not in (None, "") and not isinstance(item, (dict, list))]
+    if len(items) < minimum:
+        raise ValueError("list is empty")
+    return items
+
+
+def _basic_info(value):
+    if not isinstance(value, dict):
+        raise ValueError("expected an object")
+    return {key: _text(value.get(key) or "Null") for key in ("name", "email", "mobile", "address")}
+
+
+def _skills(value):
+    if not isinstance(value, dict):
+        raise ValueError("expected an object")
+    return {
+        "current_skills": _text_list(value.get("current_skills", [])),
+        "recommended_skills": _text_list(value.get("recommended_skills", []), minimum=0),
+    }
+
+
+def _courses(value):
+    if not isinstance(value, list):
+        raise ValueError("expected a list")
+    courses = []
+    for course in value:
+        if isinstance(course, dict) and course.get("course_name"):
+            courses.append({key: _text(course.get(key) or "") for key in ("platform", "course_name", "link")})
+        elif isinstance(course, str) and course.strip():
+            courses.append({"platform": "", "course_name": course.strip(), "link": ""})
+    if not courses:
+        raise ValueError("no courses")
+    return courses
+
+
+def _score(value):
+    match = SCORE_RE.search(str(value)) if not isinstance(value, (dict, list)) else None
+    if match is None:
+        raise ValueError("expected a score")
+    return f"{min(int(match.group()), 100)}/100"
+
+
+def _summary(value):
+    summary = _text(value)
+    if not summary:
+        raise ValueError("empty summary")
+    return summary
+
+
+def _projects(value):
+    if not isinstance(value, dict):
+        raise ValueError("expected an object")
+    return {
+        "improvement_tips": _text_list(value.get("improvement_tips", []), minimum=0),
+        "new_project_recommendations": _text_list(value.get("new_project_recommendations", []), minimum=0),
+    }
+
+
+RESPONSE_SCHEMA = {
+    "basic_info": _basic_info,
+    "skills": _skills,
+    "course_recommendations": _courses,
+    "appreciation": _text_list,
+    "resume_tips": _text_list,
+    "resume_score": _score,
+    "ai_resume_summary": _summary,
+    "matching_job_roles": _text_list,
+    "ats_keywords": _text_list,
+    "project_suggestions": _projects,
+    "recommended_skills": _text_list,
+}
+
+
+def validate_field(key, value):
+    """
+    Returns the normalized value of one response field, or raises ValueError.
+    """
+    if key not in RESPONSE_SCHEMA:
+        raise ValueError(f"unexpected field {key!r}")
+    return RESPONSE_SCHEMA[key](value)
+
+
+def validate_analysis(data, fields):
+    """
+    Checks a parsed response against the schema for the requested fields.
+    Returns (valid, missing): the normalized valid fields and the names of
+    fields that were absent or invalid.
+    """
+    valid, missing = {}, []
+    for field in fields:
+        try:
+            valid[field] = validate_field(field, data[field])
+        except (KeyError, ValueError):
+            missing.append(field)
+    return valid, missing
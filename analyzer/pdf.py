@@ -0,0 +1,78 @@
+import hashlib
+import io
+
+from analyzer.metrics import PDF_EXTRACT_SECONDS, timed
+
+# ===========================
+# In-Memory PDF Text Extraction
+# ===========================
+# PDFs are parsed straight from the upload buffer instead of a shared temp
+# file, so concurrent sessions cannot clobber each other's resume. Size and
+# page limits stop a long scanned CV from monopolizing a worker.
+
+MAX_PDF_BYTES = 10 * 1024 * 1024
+MAX_PDF_PAGES = 10
+
+# Resumes are mostly single-column text: skipping the advanced layout pass
+# (boxes_flow=None) and vertical text detection makes pdfminer much faster
+# while keeping reading order good enough for the analysis prompt.
+RESUME_LAYOUT = dict(
+    line_margin=0.5,
+    char_margin=2.0,
+    word_margin=0.1,
+    boxes_flow=None,
+    detect_vertical=False,
+    all_texts=False,
+)
+
+
+class PdfExtractionError(Exception):
+    """
+    Raised when a PDF is rejected or cannot be parsed.
+    """
+
+
+def file_digest(buffer):
+    """
+    Returns the SHA-256 hex digest of a bytes-like object without copying it.
+    """
+    return hashlib.sha256(memoryview(buffer)).hexdigest()
+
+
+@timed(PDF_EXTRACT_SECONDS)
+def extract_pdf_text(buffer, max_bytes=MAX_PDF_BYTES, max_pages=MAX_PDF_PAGES,
+                     laparams=None):
+    """
+    Extracts text from PDF bytes (bytes, bytearray, memoryview or a BytesIO),
+    reading at most max_pages pages. laparams defaults to RESUME_LAYOUT.
+    bytes and a BytesIO are read in place; a bytearray or memoryview is
+    copied once, since BytesIO can only share an immutable bytes object.
+    """
+    # pdfminer is only loaded once a PDF actually has to be read
+    from pdfminer.high_level import extract_text
+    from pdfminer.layout import LAParams
+
+    if isinstance(buffer, io.BytesIO):
+        stream = buffer
+        size = buffer.getbuffer().nbytes
+    else:
+        size = memoryview(buffer).nbytes
+        # BytesIO(bytes) shares the object's memory until written to; anything else is copied
+        stream = io.BytesIO(buffer if isinstance(buffer, bytes) else bytes(buffer))
+    if max_bytes and size > max_bytes:
+        raise PdfExtractionError(
+            f"The PDF is {size / (1024 * 1024):.1f} MB; the limit is {max_bytes / (1024 * 1024):.0f} MB."
+        )
+    stream.seek(0)
+    try:
+        return extract_text(stream, maxpages=max_pages or 0, laparams=laparams or LAParams(**RESUME_LAYOUT))
+    except Exception as e:
+        raise PdfExtractionError(f"Could not read the PDF: {e}") from e
+
+
+def extract_pdf_file(path, **kwargs):
+    """
+    Extracts text from a PDF on disk with the same limits as extract_pdf_text.
+    """
+    with open(path, "rb") as f:
+        return extract_pdf_text(f.read(), **kwargs)
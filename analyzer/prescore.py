@@ -0,0 +1,172 @@
+import re
+
+# ===========================
+# Local Deterministic Pre-Scoring
+# ===========================
+# Everything that can be read straight off the resume text is computed here in
+# a few milliseconds: contact details, section structure, ATS keyword coverage
+# and a rule-based score. The LLM is then needed only for generated content
+# (summary, tips, courses, ...), or not at all in "fast" mode.
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_RE = re.compile(r"(?<!\w)(?:\+?\d{1,3}[\s.-]?)?(?:\(\d{2,4}\)[\s.-]?)?\d{3,4}[\s.-]?\d{3,4}(?:[\s.-]?\d{2,4})?(?!\w)")
+BULLET_RE = re.compile(r"^\s*(?:[-•●▪◦*·]|\d+[.)])\s+", re.MULTILINE)
+QUANTIFIED_RE = re.compile(r"\d+(?:\.\d+)?\s*(?:%|percent|x\b|k\b|\+)|[$€£]\s?\d", re.IGNORECASE)
+
+# Section name -> heading pattern (matched against whole, short lines)
+SECTION_PATTERNS = {
+    "summary": r"(?:professional\s+)?(?:summary|profile|objective|about\s+me)",
+    "education": r"education(?:al\s+background)?|academics?|qualifications",
+    "experience": r"(?:work\s+|professional\s+)?experience|employment(?:\s+history)?|work\s+history|internships?",
+    "skills": r"(?:technical\s+|core\s+|key\s+)?skills|competencies|technologies|tech\s+stack",
+    "projects": r"(?:academic\s+|personal\s+|key\s+)?projects",
+    "certifications": r"certifications?|licen[cs]es|courses",
+    "achievements": r"achievements|awards|honou?rs|accomplishments",
+    "publications": r"publications|research",
+    "languages": r"languages",
+}
+SECTION_RE = {
+    name: re.compile(rf"^\s*(?:{pattern})\s*:?\s*$", re.IGNORECASE | re.MULTILINE)
+    for name, pattern in SECTION_PATTERNS.items()
+}
+
+ACTION_VERBS = (
+    "achieved", "analyzed", "automated", "built", "created", "delivered", "deployed", "designed",
+    "developed", "implemented", "improved", "increased", "launched", "led", "managed", "optimized",
+    "reduced", "streamlined", "trained",
+)
+ACTION_VERB_RE = re.compile(rf"\b(?:{'|'.join(ACTION_VERBS)})\b", re.IGNORECASE)
+
+# Industry keywords recognised for skills and ATS coverage (display form)
+ATS_KEYWORDS = (
+    "Python", "Java", "JavaScript", "TypeScript", "C++", "C#", "Go", "Rust", "Kotlin", "Swift", "R",
+    "SQL", "NoSQL", "PostgreSQL", "MySQL", "MongoDB", "Redis", "SQLite", "Oracle",
+    "HTML", "CSS", "React", "Angular", "Vue", "Node.js", "Django", "Flask", "FastAPI", "Spring",
+    "REST", "GraphQL", "Microservices",
+    "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Terraform", "CI/CD", "Jenkins", "Git", "Linux",
+    "Machine Learning", "Deep Learning", "Data Science", "Data Analysis", "Data Engineering",
+    "Statistics", "NLP", "Computer Vision", "TensorFlow", "PyTorch", "Keras", "Scikit-learn",
+    "Pandas", "NumPy", "Matplotlib", "Spark", "Hadoop", "Airflow", "Kafka", "ETL", "Tableau",
+    "Power BI", "Excel", "LLM", "Generative AI",
+    "Agile", "Scrum", "Jira", "Project Management", "Product Management", "Stakeholder Management",
+    "Leadership", "Communication", "Teamwork", "Problem Solving",
+    "Unit Testing", "Selenium", "Cybersecurity", "Networking", "Figma", "UI/UX", "SEO",
+    "Digital Marketing", "Salesforce", "SAP", "Financial Analysis", "Accounting",
+)
+
+
+# Keywords are matched as token n-grams through a dict lookup, which is linear
+# in the resume length no matter how large the vocabulary grows.
+TOKEN_RE = re.compile(r"[A-Za-z0-9+#]+(?:[./][A-Za-z0-9+#]+)*")
+KEYWORD_INDEX = {
+    tuple(token.lower() for token in TOKEN_RE.findall(keyword)): i for i, keyword in enumerate(ATS_KEYWORDS)
+}
+MAX_KEYWORD_TOKENS = max(len(tokens) for tokens in KEYWORD_INDEX)
+# Short keywords that are also common words only count with their exact casing
+CASE_SENSITIVE_KEYWORDS = {"R", "Go"}
+
+# Fields the local engine fills in; the rest need generation by the LLM
+LOCAL_FIELDS = ("basic_info", "skills", "resume_score", "ats_keywords")
+
+
+def find_keywords(text):
+    """
+    Returns the ATS keywords present in the text, in vocabulary order.
+    """
+    tokens = TOKEN_RE.findall(text)
+    lowered = [token.lower() for token in tokens]
+    found = set()
+    for size in range(1, MAX_KEYWORD_TOKENS + 1):
+        for start in range(len(lowered) - size + 1):
+            index = KEYWORD_INDEX.get(tuple(lowered[start:start + size]))
+            if index is None:
+                continue
+            keyword = ATS_KEYWORDS[index]
+            if keyword in CASE_SENSITIVE_KEYWORDS and tokens[start] != keyword:
+                continue
+            found.add(index)
+    return [ATS_KEYWORDS[i] for i in sorted(found)]
+
+
+def detect_sections(text):
+    """
+    Returns the names of the resume sections whose headings appear in the text.
+    """
+    return [name for name, pattern in SECTION_RE.items() if pattern.search(text)]
+
+
+def guess_name(lines):
+    """
+    Picks the first short, mostly alphabetic line near the top as the candidate's name.
+    """
+    for line in lines[:8]:
+        words = line.split()
+        if (2 <= len(words) <= 4 and not EMAIL_RE.search(line) and not any(ch.isdigit() for ch in line)
+                and all(word[:1].isupper() for word in words if word.isalpha())
+                and not any(pattern.match(line) for pattern in SECTION_RE.values())):
+            return line.strip()
+    return "Null"
+
+
+def extract_contact(text):
+    """
+    Extracts name, email and mobile from the resume text ("Null" when not found).
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    email = EMAIL_RE.search(text)
+    phone = next((match.group().strip() for match in PHONE_RE.finditer(text)
+                  if sum(ch.isdigit() for ch in match.group()) >= 7), None)
+    return {
+        "name": guess_name(lines),
+        "email": email.group() if email else "Null",
+        "mobile": phone or "Null",
+        "address": "Null",
+    }
+
+
+def score_resume(text, contact, sections, keywords):
+    """
+    Rule-based structure/keyword score out of 100, with its breakdown.
+    """
+    contact_score = sum(5 for key in ("name", "email", "mobile") if contact[key] != "Null")
+    section_weights = {"experience": 10, "education": 8, "skills": 8, "projects": 5,
+                       "summary": 2, "certifications": 2}
+    section_score = sum(weight for name, weight in section_weights.items() if name in sections)
+    keyword_score = min(25.0, 2.5 * len(keywords))
+    words = len(text.split())
+    if 300 <= words <= 1200:
+        length_score = 10.0
+    elif words < 300:
+        length_score = 10.0 * words / 300
+    else:
+        length_score = max(0.0, 10.0 - (words - 1200) / 120)
+    bullets = len(BULLET_RE.findall(text))
+    quantified = len(QUANTIFIED_RE.findall(text))
+    verbs = len(ACTION_VERB_RE.findall(text))
+    content_score = (length_score + min(5.0, bullets) + min(5.0, 5.0 * quantified / 3)
+                     + min(5.0, float(verbs)))
+    breakdown = {
+        "contact": contact_score,
+        "structure": section_score,
+        "keywords": round(keyword_score, 1),
+        "content": round(content_score, 1),
+    }
+    return int(round(contact_score + section_score + keyword_score + content_score)), breakdown
+
+
+def prescore_resume(text):
+    """
+    Computes the locally derivable analysis fields: basic_info, current skills,
+    ats_keywords and a rule-based resume_score (plus its breakdown).
+    """
+    contact = extract_contact(text)
+    sections = detect_sections(text)
+    keywords = find_keywords(text)
+    score, breakdown = score_resume(text, contact, sections, keywords)
+    return {
+        "basic_info": contact,
+        "skills": {"current_skills": keywords, "recommended_skills": []},
+        "resume_score": f"{score}/100",
+        "ats_keywords": keywords,
+        "score_breakdown": dict(breakdown, sections=sections),
+    }
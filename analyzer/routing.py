@@ -0,0 +1,295 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from analyzer.http_client import CircuitBreaker
+from analyzer.metrics import HEDGED_REQUESTS, MODEL_FAILURES
+
+# ===========================
+# Model Routing & Fallback
+# ===========================
+# Analyses are not tied to a single model: LLM_MODELS lists models in order of
+# preference, each with its own timeout and circuit breaker. Every request
+# updates a rolling window of latency and errors per model; models that keep
+# failing or are slower than their timeout drop to the back of the list, and
+# a failed request falls through to the next model. With LLM_HEDGE=1 a slow
+# first model is raced against the second and the loser is cancelled.
+
+# "name@timeout_seconds,name@timeout_seconds"; the timeout is optional
+DEFAULT_MODELS = "deepseek/deepseek-r1-distill-llama-70b:free"
+DEFAULT_MODEL_TIMEOUT = 120.0
+# Requests per model the rolling statistics cover
+STATS_WINDOW = 50
+# A model needs this many recent requests before its statistics are trusted
+MIN_SAMPLES = 5
+# Models failing more often than this are tried last
+MAX_ERROR_RATE = 0.5
+# Seconds before the hedge request starts when the primary has no latency history yet
+DEFAULT_HEDGE_DELAY = 10.0
+
+
+class ModelConfig:
+    """
+    One routable model: its OpenRouter name and read timeout in seconds.
+    """
+
+    def __init__(self, name, timeout=DEFAULT_MODEL_TIMEOUT):
+        self.name = name
+        self.timeout = timeout
+
+    def __repr__(self):
+        return f"ModelConfig({self.name!r}, timeout={self.timeout})"
+
+
+def parse_models(spec):
+    """
+    Parses an LLM_MODELS value ("name@timeout,...") into ModelConfigs.
+    """
+    models = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, separator, timeout = item.rpartition("@")
+        if not separator:
+            name, timeout = item, DEFAULT_MODEL_TIMEOUT
+        models.append(ModelConfig(name, float(timeout)))
+    if not models:
+        raise ValueError("LLM_MODELS does not name any model")
+    return models
+
+
+class ModelStats:
+    """
+    Rolling latency and error rate over a model's most recent requests.
+    """
+
+    def __init__(self, window=STATS_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency, ok):
+        with self._lock:
+            self._samples.append((latency, ok))
+
+    def snapshot(self):
+        """
+        Returns requests, error_rate and p50/p95 latency (seconds, successful
+        requests only) over the window.
+        """
+        with self._lock:
+            samples = list(self._samples)
+        latencies = sorted(latency for latency, ok in samples if ok)
+        errors = sum(1 for _, ok in samples if not ok)
+
+        def percentile(q):
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else None
+
+        return {
+            "requests": len(samples),
+            "error_rate": errors / len(samples) if samples else 0.0,
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+        }
+
+
+class CancelToken:
+    """
+    Lets another thread abort a streaming request by closing its response.
+    """
+
+    def __init__(self):
+        self._response = None
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def bind(self, response):
+        """
+        Attaches the response to close on cancel; closes it at once if already cancelled.
+        """
+        with self._lock:
+            self._response = response
+            cancelled = self._cancelled
+        if cancelled:
+            response.close()
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            response = self._response
+        if response is not None:
+            response.close()
+
+
+class ModelRouter:
+    """
+    Sends a request to the best available model, falling back down the list
+    on errors and optionally hedging the first model with the second.
+    """
+
+    def __init__(self, models, hedge=False, hedge_delay=None):
+        self.models = list(models)
+        self.hedge = hedge
+        # None: use the primary's rolling p95 latency
+        self.hedge_delay = hedge_delay
+        self._stats = {model.name: ModelStats() for model in self.models}
+        self._breakers = {model.name: CircuitBreaker() for model in self.models}
+
+    @classmethod
+    def from_env(cls):
+        """
+        Builds a router from LLM_MODELS, LLM_HEDGE and LLM_HEDGE_DELAY.
+        """
+        delay = os.environ.get("LLM_HEDGE_DELAY")
+        return cls(parse_models(os.environ.get("LLM_MODELS", DEFAULT_MODELS)),
+                   hedge=os.environ.get("LLM_HEDGE", "0") == "1",
+                   hedge_delay=float(delay) if delay else None)
+
+    def healthy(self, model, snapshot=None):
+        """
+        A model is healthy unless its circuit is open or, with enough recent
+        requests, it fails too often or its median latency exceeds its timeout.
+        """
+        if self._breakers[model.name].state == "open":
+            return False
+        snapshot = snapshot or self._stats[model.name].snapshot()
+        if snapshot["requests"] < MIN_SAMPLES:
+            return True
+        if snapshot["error_rate"] > MAX_ERROR_RATE:
+            return False
+        return snapshot["p50"] is None or snapshot["p50"] <= model.timeout
+
+    def ranked(self):
+        """
+        Returns the models to try, healthy ones first, each group in configured order.
+        """
+        healthy = [model for model in self.models if self.healthy(model)]
+        return healthy + [model for model in self.models if model not in healthy]
+
+    def stats(self):
+        """
+        Returns one row per model for display.
+        """
+        rows = []
+        for model in self.models:
+            snapshot = self._stats[model.name].snapshot()
+            rows.append({
+                "model": model.name,
+                "timeout_s": model.timeout,
+                "requests": snapshot["requests"],
+                "error_rate": snapshot["error_rate"],
+                "p50_ms": 1000 * snapshot["p50"] if snapshot["p50"] is not None else None,
+                "p95_ms": 1000 * snapshot["p95"] if snapshot["p95"] is not None else None,
+                "circuit": self._breakers[model.name].state,
+                "healthy": self.healthy(model, snapshot),
+            })
+        return rows
+
+    def _hedge_delay(self, model):
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        snapshot = self._stats[model.name].snapshot()
+        if snapshot["requests"] >= MIN_SAMPLES and snapshot["p95"] is not None:
+            return snapshot["p95"]
+        return DEFAULT_HEDGE_DELAY
+
+    def _call(self, model, send, emit, token, fail_fast):
+        started = time.perf_counter()
+        data = send(model, emit, token, breaker=self._breakers[model.name], fail_fast=fail_fast)
+        # A hedge loser was cancelled on purpose; that says nothing about the model
+        if not token.cancelled:
+            self._stats[model.name].record(time.perf_counter() - started, "error" not in data)
+        return data
+
+    def complete(self, send, on_section=None):
+        """
+        Runs send(model, emit, token, breaker=..., fail_fast=...) against the
+        ranked models until one succeeds and returns (data, model_name).
+        send returns the parsed answer or a dict with an "error" message;
+        fail_fast is True while another model is left to fall back to, so
+        send can skip its own retries. Returns the last error if all fail.
+        """
+        emit = on_section or (lambda key, value: None)
+        models = self.ranked()
+        data = {"error": "No model is configured."}
+        start = 0
+        if self.hedge and len(models) >= 2:
+            data, winner = self._race(models[0], models[1], send, emit, fail_fast=len(models) > 2)
+            if winner is not None:
+                return data, winner
+            start = 2
+        for index in range(start, len(models)):
+            model = models[index]
+            data = self._call(model, send, emit, CancelToken(), fail_fast=index < len(models) - 1)
+            if "error" not in data:
+                return data, model.name
+            MODEL_FAILURES.inc(model=model.name)
+        return data, None
+
+    def _race(self, primary, backup, send, emit, fail_fast):
+        """
+        Starts primary, adds backup if primary has not answered within the
+        hedge delay, and returns (data, winner) for the first success,
+        cancelling the other request. winner is None if both failed.
+        """
+        results = queue.Queue()
+        tokens = {primary.name: CancelToken(), backup.name: CancelToken()}
+        # Sections are shown from one model at a time: whichever streams first
+        owner = []
+        owner_lock = threading.Lock()
+
+        def start(model):
+            def emit_section(key, value):
+                with owner_lock:
+                    if not owner:
+                        owner.append(model.name)
+                    if owner[0] != model.name:
+                        return
+                emit(key, value)
+
+            def run():
+                data = self._call(model, send, emit_section, tokens[model.name], fail_fast=True)
+                if "error" in data:
+                    with owner_lock:
+                        if owner == [model.name]:
+                            owner.clear()
+                results.put((model, data))
+
+            threading.Thread(target=run, name=f"llm-{model.name}", daemon=True).start()
+
+        start(primary)
+        running = 1
+        try:
+            finished = [results.get(timeout=self._hedge_delay(primary))]
+        except queue.Empty:
+            start(backup)
+            running = 2
+            finished = [results.get()]
+        while True:
+            model, data = finished[-1]
+            if "error" not in data:
+                for name, token in tokens.items():
+                    if name != model.name:
+                        token.cancel()
+                if running == 2:
+                    HEDGED_REQUESTS.inc(winner="primary" if model is primary else "backup")
+                return data, model.name
+            MODEL_FAILURES.inc(model=model.name)
+            if len(finished) < running:
+                finished.append(results.get())
+                continue
+            if running == 2:
+                HEDGED_REQUESTS.inc(winner="none")
+                return data, None
+            # The primary failed before the hedge was due: plain fallback to the backup
+            data = self._call(backup, send, emit, tokens[backup.name], fail_fast=fail_fast)
+            if "error" not in data:
+                return data, backup.name
+            MODEL_FAILURES.inc(model=backup.name)
+            return data, None
@@ -0,0 +1,561 @@
+import argparse
+import contextlib
+import json
+import math
+import os
+import re
+import sys
+import threading
+import zlib
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the threads of one process are serialized
+    fcntl = None
+
+from analyzer.metrics import SEARCH_SECONDS
+
+# ===========================
+# Candidate Search Index
+# ===========================
+# "Candidates like this one" and "Python + Spark above 75" are answered from
+# a derived index instead of scanning user_data: an inverted index from every
+# skill and ATS keyword to the analyses that list it, plus one hashed TF-IDF
+# vector per analysis (summary, skills and keywords) for top-k cosine
+# similarity. The index is a directory of files next to the database. The
+# vectors are memory-mapped and stored in blocks of rows laid out slot by
+# slot, so a query only reads the hashed slots its own (sparse) vector
+# uses instead of the whole matrix. sync() catches up with
+# user_data by id, so analyses saved by any process are indexed
+# incrementally; SQLite stays the source of truth and the index can be
+# rebuilt from it at any time (python -m analyzer.search rebuild).
+# Several processes (Streamlit, API workers, the CLI) may share the directory:
+# changes are made under an exclusive lock on index.lock, and a process that
+# finds meta.json changed by another one reloads the index before writing.
+
+DEFAULT_INDEX_DIR = "search_index"
+# Hashed feature slots per vector; every analysis costs 4 bytes per slot on disk
+DEFAULT_DIM = int(os.environ.get("SEARCH_DIM", "256"))
+# user_data rows read per sync step
+SYNC_BATCH = 5000
+# Rows per block of the vector file; each block is stored as dim x BLOCK_ROWS
+BLOCK_ROWS = 1024
+# Bumped when the files change meaning; an index in an older format is rebuilt
+INDEX_FORMAT = 2
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were with "
+    "who will years year experience".split()
+)
+
+# One value per indexed analysis: file name -> dtype
+COLUMNS = {
+    "ids.i64": np.int64,
+    "scores.i16": np.int16,
+    "alive.u8": np.uint8,
+}
+
+
+def normalize_term(term):
+    """
+    Case- and whitespace-insensitive form of a skill or keyword.
+    """
+    return " ".join(str(term).lower().split())
+
+
+def tokenize(text):
+    return [token.rstrip(".") for token in TOKEN_RE.findall((text or "").lower())
+            if token.rstrip(".") not in STOPWORDS]
+
+
+def hashed_counts(text, dim):
+    """
+    Returns {slot: signed sublinear term frequency} for the text's tokens
+    hashed into dim slots (a stable CRC32, so slots agree across processes).
+    Slots where tokens of opposite sign cancel out are left out, so a
+    document counts toward a slot's frequency exactly when its vector is
+    nonzero there.
+    """
+    counts = {}
+    for token in tokenize(text):
+        counts[token] = counts.get(token, 0) + 1
+    slots = {}
+    for token, count in counts.items():
+        digest = zlib.crc32(token.encode("utf-8"))
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        slot = digest % dim
+        slots[slot] = slots.get(slot, 0.0) + sign * (1.0 + math.log(count))
+    return {slot: value for slot, value in slots.items() if value}
+
+
+def document_text(summary, skills, keywords):
+    return " ".join([summary or "", skills or "", keywords or ""])
+
+
+class _Column:
+    """
+    Append-only NumPy array with amortized growth.
+    """
+
+    def __init__(self, dtype, values=None):
+        values = np.asarray(values if values is not None else [], dtype=dtype)
+        self._data = np.empty(max(8, len(values)), dtype=dtype)
+        self._data[:len(values)] = values
+        self._size = len(values)
+
+    def __len__(self):
+        return self._size
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self._data.dtype)
+        if self._size + len(values) > len(self._data):
+            grown = np.empty(max(2 * len(self._data), self._size + len(values)), dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:self._size + len(values)] = values
+        self._size += len(values)
+
+    @property
+    def values(self):
+        return self._data[:self._size]
+
+
+class SearchIndex:
+    """
+    Inverted skill/keyword index and memory-mapped TF-IDF vectors of the
+    stored analyses. Thread-safe; one instance per index directory.
+    """
+
+    def __init__(self, directory=DEFAULT_INDEX_DIR, dim=DEFAULT_DIM):
+        self.directory = directory
+        self._lock = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+        self._meta = None
+        os.makedirs(directory, exist_ok=True)
+        with self._exclusive(reload=False):
+            self._load(dim)
+
+    @classmethod
+    def next_to(cls, db_path, **kwargs):
+        """
+        Opens the index stored in the same directory as the given database file.
+        """
+        directory = os.path.dirname(os.path.abspath(db_path))
+        return cls(os.path.join(directory, DEFAULT_INDEX_DIR), **kwargs)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    @contextlib.contextmanager
+    def _exclusive(self, reload=True):
+        """
+        Holds the thread lock and the cross-process lock on index.lock; on
+        first entry, reloads the index if another process has changed it.
+        """
+        with self._lock:
+            if not self._lock_depth:
+                self._lock_file = open(self._path("index.lock"), "a")
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                if reload and self._lock_depth == 1 and self._read_meta() != self._meta:
+                    self._load(self.dim)
+                yield
+            finally:
+                self._lock_depth -= 1
+                if not self._lock_depth:
+                    # Closing the file releases the lock
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def _read_meta(self):
+        try:
+            with open(self._path("meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _read(self, name, dtype, count):
+        """
+        Reads the first count values of a file; extra bytes (from a write cut
+        short before the metadata was updated) are truncated away.
+        """
+        path = self._path(name)
+        size = count * np.dtype(dtype).itemsize
+        if not count:
+            values = np.empty(0, dtype=dtype)
+        else:
+            values = np.fromfile(path, dtype=dtype, count=count)
+            if len(values) != count:
+                raise ValueError(f"{name} is shorter than the index metadata says")
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            os.truncate(path, size)
+        return values
+
+    def _load(self, dim):
+        try:
+            meta = self._read_meta()
+            if meta is None:
+                raise ValueError("meta.json is missing or damaged")
+            if meta["format"] != INDEX_FORMAT or meta["dim"] != dim:
+                raise ValueError("index was built with other settings")
+            rows = meta["rows"]
+            columns = {name: self._read(name, dtype, rows) for name, dtype in COLUMNS.items()}
+            if os.path.getsize(self._path("vectors.f32")) < self._blocks(rows) * self._block_bytes(dim):
+                raise ValueError("vectors.f32 is shorter than the index metadata says")
+            pairs = self._read("postings.i32", np.int32, 2 * meta["pairs"]).reshape(-1, 2)
+            document_freq = self._read("df.f64", np.float64, dim)
+            with open(self._path("terms.txt"), encoding="utf-8") as f:
+                terms = f.read().split("\n")[:meta["terms"]]
+            if len(terms) != meta["terms"]:
+                raise ValueError("terms.txt is shorter than the index metadata says")
+        except (OSError, ValueError, KeyError):
+            # Missing, outdated or damaged: start over; sync() refills it from user_data
+            self._reset(dim)
+            return
+        self.dim = dim
+        self.last_id = meta["last_id"]
+        self._meta = meta
+        self._ids = _Column(np.int64, columns["ids.i64"])
+        self._scores = _Column(np.int16, columns["scores.i16"])
+        self._alive = _Column(np.uint8, columns["alive.u8"])
+        self._df = document_freq.copy()
+        self._terms = terms
+        self._term_ids = {term: term_id for term_id, term in enumerate(terms)}
+        # Posting lists: pairs are (term_id, row) in insertion order, so each list comes out sorted
+        order = np.argsort(pairs[:, 0], kind="stable")
+        term_ids, rows_sorted = pairs[order, 0], pairs[order, 1]
+        bounds = np.searchsorted(term_ids, np.arange(len(terms) + 1))
+        self._postings = [_Column(np.int32, rows_sorted[bounds[i]:bounds[i + 1]]) for i in range(len(terms))]
+        self._pairs = len(pairs)
+        self._vectors = None
+
+    def _reset(self, dim):
+        self.dim = dim
+        self.last_id = 0
+        self._ids = _Column(np.int64)
+        self._scores = _Column(np.int16)
+        self._alive = _Column(np.uint8)
+        self._df = np.zeros(dim, dtype=np.float64)
+        self._terms = []
+        self._term_ids = {}
+        self._postings = []
+        self._pairs = 0
+        self._vectors = None
+        for name in list(COLUMNS) + ["vectors.f32", "postings.i32", "terms.txt"]:
+            # Replaced rather than truncated, so an existing memory map of the old file stays valid
+            if os.path.exists(self._path(name)):
+                os.remove(self._path(name))
+            open(self._path(name), "wb").close()
+        self._write_meta()
+
+    def _write_meta(self):
+        """
+        Saves the document frequencies and the row/term counts; the metadata
+        is replaced atomically and is what makes appended rows part of the index.
+        """
+        self._df.tofile(self._path("df.f64"))
+        # The version changes with every write, so tombstones alone are noticed by other processes too
+        version = self._meta.get("version", 0) + 1 if self._meta else 1
+        meta = {"format": INDEX_FORMAT, "dim": self.dim, "rows": len(self._ids), "pairs": self._pairs,
+                "terms": len(self._terms), "last_id": self.last_id, "version": version}
+        temporary = self._path("meta.json.tmp")
+        with open(temporary, "w") as f:
+            json.dump(meta, f)
+        os.replace(temporary, self._path("meta.json"))
+        self._meta = meta
+
+    @staticmethod
+    def _blocks(rows):
+        return -(-rows // BLOCK_ROWS)
+
+    @staticmethod
+    def _block_bytes(dim):
+        return dim * BLOCK_ROWS * np.dtype(np.float32).itemsize
+
+    def _matrix(self):
+        """
+        The vector file memory-mapped as (blocks, dim, BLOCK_ROWS); remapped
+        after it has grown by a block.
+        """
+        blocks = self._blocks(len(self._ids))
+        if self._vectors is None or len(self._vectors) != blocks:
+            self._vectors = (np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r+",
+                                       shape=(blocks, self.dim, BLOCK_ROWS))
+                             if blocks else np.zeros((0, self.dim, BLOCK_ROWS), dtype=np.float32))
+        return self._vectors
+
+    def _row_vectors(self, rows):
+        """
+        Returns the (len(rows), dim) vectors of the given row positions.
+        """
+        return self._matrix()[rows // BLOCK_ROWS, :, rows % BLOCK_ROWS]
+
+    def _idf(self):
+        return np.log((1.0 + self.alive_count) / (1.0 + self._df)) + 1.0
+
+    def _vector(self, slots, idf=None):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if slots:
+            vector[list(slots)] = list(slots.values())
+            vector *= self._idf() if idf is None else idf
+            norm = np.linalg.norm(vector)
+            if norm:
+                vector /= norm
+        return vector
+
+    @property
+    def alive_count(self):
+        return int(self._alive.values.sum(dtype=np.int64))
+
+    def add(self, rows):
+        """
+        Indexes (id, resume_score, skills, ats_keywords, summary) rows, with
+        skills and keywords ", "-joined as stored in user_data. Ids must be
+        ascending; rows another process has indexed already are skipped.
+        """
+        with self._exclusive():
+            rows = [row for row in rows if row[0] > self.last_id]
+            if not rows:
+                return
+            first_row = len(self._ids)
+            vectors = np.zeros((len(rows), self.dim), dtype=np.float32)
+            new_terms, pairs = [], []
+            documents = []
+            for offset, (analysis_id, score, skills, keywords, summary) in enumerate(rows):
+                for term in {normalize_term(item) for item in f"{skills or ''}, {keywords or ''}".split(", ")}:
+                    if not term:
+                        continue
+                    term_id = self._term_ids.get(term)
+                    if term_id is None:
+                        term_id = self._term_ids[term] = len(self._terms)
+                        self._terms.append(term)
+                        self._postings.append(_Column(np.int32))
+                        new_terms.append(term)
+                    self._postings[term_id].extend([first_row + offset])
+                    pairs.append((term_id, first_row + offset))
+                slots = hashed_counts(document_text(summary, skills, keywords), self.dim)
+                self._df[list(slots)] += 1
+                documents.append(slots)
+            self._alive.extend(np.ones(len(rows)))
+            # Weighted with the document frequencies known now; rebuild() re-weights everything
+            idf = self._idf()
+            for offset, slots in enumerate(documents):
+                vectors[offset] = self._vector(slots, idf)
+            self._ids.extend([row[0] for row in rows])
+            self._scores.extend([row[1] or 0 for row in rows])
+            self._pairs += len(pairs)
+            self.last_id = int(rows[-1][0])
+            # The file grows a whole (zero-filled) block at a time
+            size = self._blocks(len(self._ids)) * self._block_bytes(self.dim)
+            if os.path.getsize(self._path("vectors.f32")) < size:
+                os.truncate(self._path("vectors.f32"), size)
+            positions = np.arange(first_row, len(self._ids))
+            matrix = self._matrix()
+            matrix[positions // BLOCK_ROWS, :, positions % BLOCK_ROWS] = vectors
+            matrix.flush()
+            for name, column in (("ids.i64", self._ids), ("scores.i16", self._scores), ("alive.u8", self._alive)):
+                with open(self._path(name), "ab") as f:
+                    f.write(column.values[first_row:].tobytes())
+            with open(self._path("postings.i32"), "ab") as f:
+                f.write(np.asarray(pairs, dtype=np.int32).reshape(-1, 2).tobytes())
+            with open(self._path("terms.txt"), "a", encoding="utf-8") as f:
+                f.write("".join(term + "\n" for term in new_terms))
+            self._write_meta()
+
+    def remove(self, analysis_ids):
+        """
+        Drops analyses from the results (their rows stay in the files as
+        tombstones) and returns how many of them were indexed.
+        """
+        with self._exclusive():
+            positions = np.flatnonzero(np.isin(self._ids.values, np.asarray(analysis_ids, dtype=np.int64))
+                                       & (self._alive.values == 1))
+            if not len(positions):
+                return 0
+            self._df -= (self._row_vectors(positions) != 0).sum(axis=0)
+            self._alive.values[positions] = 0
+            with open(self._path("alive.u8"), "r+b") as f:
+                for row in positions:
+                    f.seek(int(row))
+                    f.write(b"\x00")
+            self._write_meta()
+            return len(positions)
+
+    def sync(self, db):
+        """
+        Indexes the analyses saved since the last sync and drops deleted ones.
+        Returns the number of analyses added.
+        """
+        added = 0
+        with self._exclusive(), SEARCH_SECONDS.time(kind="sync"):
+            while True:
+                rows = db.query('''
+                    SELECT id, resume_score, skills, ats_keywords, summary FROM user_data
+                    WHERE id > ? ORDER BY id LIMIT ?
+                ''', (self.last_id, SYNC_BATCH))
+                if not rows:
+                    break
+                self.add(rows)
+                added += len(rows)
+            (count,) = db.query("SELECT COALESCE(MAX(analyses), 0) FROM stats_totals")[0]
+            if count != self.alive_count:
+                # Rows were deleted (or the database was replaced): compare ids
+                live = np.array([row[0] for row in db.query("SELECT id FROM user_data")], dtype=np.int64)
+                indexed = self._ids.values[self._alive.values == 1]
+                self.remove(indexed[~np.isin(indexed, live)])
+                # Ids saved after the loop above are not missing, just not synced yet
+                missing = live[(live <= self.last_id) & ~np.isin(live, indexed)]
+                if len(missing) or self.alive_count < len(self._ids) // 2:
+                    # Ids below last_id the index has never seen, or mostly
+                    # tombstones: start over from user_data
+                    self._reset(self.dim)
+                    return self.sync(db)
+        return added
+
+    def rebuild(self, db):
+        """
+        Re-indexes every analysis from scratch (and re-weights the vectors).
+        """
+        with self._exclusive(reload=False):
+            self._vectors = None
+            self._reset(self.dim)
+            return self.sync(db)
+
+    def search(self, text=None, like=None, terms=(), min_score=None, max_score=None, k=10):
+        """
+        Returns up to k (analysis_id, similarity) pairs, best first; ranked
+        results with no similarity at all are left out.
+        terms: skills or ATS keywords every result must list.
+        text: free text to rank by cosine similarity of the TF-IDF vectors.
+        like: an analysis id whose vector is used as the query (it is itself
+        excluded; it takes precedence over text). Without text or like,
+        results are ordered by resume score and the similarity is None.
+        """
+        kind = "similar" if text or like is not None else "filter"
+        with self._lock, SEARCH_SECONDS.time(kind=kind):
+            candidates = None
+            postings = []
+            for term in terms:
+                term_id = self._term_ids.get(normalize_term(term))
+                if term_id is None:
+                    return []
+                postings.append(self._postings[term_id].values)
+            # Intersect the shortest posting lists first
+            for posting in sorted(postings, key=len):
+                candidates = posting if candidates is None else np.intersect1d(candidates, posting,
+                                                                               assume_unique=True)
+            alive, scores = self._alive.values, self._scores.values
+            keep = alive == 1 if candidates is None else alive[candidates] == 1
+            candidate_scores = scores if candidates is None else scores[candidates]
+            if min_score is not None:
+                keep &= candidate_scores >= min_score
+            if max_score is not None:
+                keep &= candidate_scores <= max_score
+            candidates = np.flatnonzero(keep) if candidates is None else candidates[keep]
+
+            query = None
+            if like is not None:
+                rows = np.flatnonzero(self._ids.values == like)
+                if not len(rows):
+                    return []
+                query = self._row_vectors(rows[:1])[0]
+                candidates = candidates[candidates != rows[0]]
+            elif text:
+                query = self._vector(hashed_counts(text, self.dim))
+            if not len(candidates):
+                return []
+            if query is None:
+                order = np.argsort(-scores[candidates], kind="stable")[:k]
+                return [(int(self._ids.values[row]), None) for row in candidates[order]]
+
+            slots = np.flatnonzero(query)
+            if not len(slots):
+                return []
+            weights = query[slots]
+            matrix = self._matrix()
+            # Only the query's slots are read: from every block once most rows
+            # qualify, otherwise just the candidates' columns
+            if len(candidates) > len(self._ids) // 4:
+                similarities = (weights @ matrix[:, slots, :]).reshape(-1)[candidates]
+            else:
+                blocks, offsets = (candidates // BLOCK_ROWS)[:, None], (candidates % BLOCK_ROWS)[:, None]
+                similarities = matrix[blocks, slots, offsets] @ weights
+            top = np.argpartition(-similarities, min(k, len(similarities)) - 1)[:k]
+            top = top[np.argsort(-similarities[top], kind="stable")]
+            # Nothing in common with the query is not a match
+            top = top[similarities[top] > 0]
+            return [(int(self._ids.values[candidates[i]]), float(similarities[i])) for i in top]
+
+    def score_all(self, term_weights, text=None):
+        """
+        Scores every live analysis in one pass, for job matching. Returns
+        (ids, coverage, similarity) arrays: the weighted share of term_weights
+        ({skill or keyword: weight}) each analysis lists, and its cosine
+        similarity to text (zeros without text).
+        """
+        with self._lock, SEARCH_SECONDS.time(kind="match"):
+            rows = len(self._ids)
+            coverage = np.zeros(rows, dtype=np.float32)
+            for term, weight in term_weights.items():
+                term_id = self._term_ids.get(normalize_term(term))
+                if term_id is not None:
+                    coverage[self._postings[term_id].values] += weight
+            total = sum(term_weights.values())
+            if total:
+                coverage /= total
+            similarity = np.zeros(rows, dtype=np.float32)
+            query = self._vector(hashed_counts(text, self.dim)) if text and rows else None
+            if query is not None and query.any():
+                slots = np.flatnonzero(query)
+                similarity = (query[slots] @ self._matrix()[:, slots, :]).reshape(-1)[:rows]
+            live = self._alive.values == 1
+            return self._ids.values[live], coverage[live], similarity[live]
+
+    def stats(self):
+        with self._lock:
+            return {"analyses": self.alive_count, "rows": len(self._ids), "terms": len(self._terms),
+                    "dim": self.dim, "last_id": self.last_id}
+
+
+def main(argv=None):
+    from analyzer.storage import DB_PATH, get_database
+
+    parser = argparse.ArgumentParser(description="Maintain and query the candidate search index.")
+    parser.add_argument("command", choices=["sync", "rebuild", "query"],
+                        help="sync: index new analyses; rebuild: re-index everything; query: search")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database file")
+    parser.add_argument("--text", help="rank by similarity to this text")
+    parser.add_argument("--like", type=int, help="rank by similarity to this analysis id")
+    parser.add_argument("--term", action="append", default=[], help="required skill or ATS keyword (repeatable)")
+    parser.add_argument("--min-score", type=int)
+    parser.add_argument("--max-score", type=int)
+    parser.add_argument("-k", type=int, default=10, help="number of results")
+    args = parser.parse_args(argv)
+
+    db = get_database(args.db)
+    index = SearchIndex.next_to(args.db)
+    if args.command == "rebuild":
+        print(f"Indexed {index.rebuild(db)} analyses.")
+        return 0
+    added = index.sync(db)
+    if args.command == "sync":
+        print(f"Indexed {added} new analyses ({index.stats()['analyses']} in total).")
+        return 0
+    results = index.search(args.text, args.like, args.term, args.min_score, args.max_score, args.k)
+    similarities = dict(results)
+    for record in db.get_analyses(list(similarities)):
+        analysis_id, name, _, resume_score, skills = record[:5]
+        similarity = similarities[analysis_id]
+        shown = f"{similarity:.3f}" if similarity is not None else "-"
+        print(f"{analysis_id}\t{shown}\t{resume_score}\t{name}\t{skills}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+from analyzer.compaction import split_sections
+
+# ===========================
+# Section-Level Analysis Inputs
+# ===========================
+# In "sections" mode every output field is generated by its own prompt that
+# only carries the parts of the resume the field is about. Each field is then
+# cached on a hash of exactly that input, so editing one part of a resume
+# only invalidates the fields that read it.
+
+# Output field -> resume sections it reads (None: the whole resume)
+SECTION_INPUTS = {
+    "basic_info": ("header",),
+    "skills": ("summary", "skills", "experience", "projects", "certifications"),
+    "course_recommendations": ("summary", "skills", "experience", "certifications"),
+    "appreciation": None,
+    "resume_tips": None,
+    "resume_score": None,
+    "ai_resume_summary": None,
+    "matching_job_roles": ("summary", "skills", "experience", "education"),
+    "ats_keywords": ("summary", "skills", "experience", "projects"),
+    "project_suggestions": ("summary", "skills", "experience", "projects"),
+    "recommended_skills": ("summary", "skills", "experience"),
+}
+
+
+def section_inputs(resume_text, fields):
+    """
+    Returns {field: text} with the resume text each field is generated from.
+    A field whose sections are all absent (e.g. no headings were recognised)
+    falls back to the whole resume.
+    """
+    sections = {}
+    for name, lines in split_sections(resume_text):
+        sections.setdefault(name, []).extend(lines)
+    inputs = {}
+    for field in fields:
+        names = SECTION_INPUTS.get(field)
+        if names is None:
+            inputs[field] = resume_text
+            continue
+        text = "\n".join(line for name in names for line in sections.get(name, ())).strip()
+        inputs[field] = text or resume_text
+    return inputs
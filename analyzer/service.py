@@ -0,0 +1,93 @@
+import threading
+
+from analyzer.analysis import DEFAULT_ANALYSIS_MODE, validate_resume
+from analyzer.archive import Archive, load_analysis
+from analyzer.cache import AnalysisCache
+from analyzer.jobs import get_job_queue
+from analyzer.pdf import PdfExtractionError, extract_pdf_text
+from analyzer.storage import DB_PATH, get_database
+
+# ===========================
+# Resume Analysis Service
+# ===========================
+# The pipeline behind both front ends, without any Streamlit: PDF text
+# extraction and validation, background analysis jobs, and the user_data
+# records they are saved to. The Streamlit script and the HTTP API
+# (analyzer/api.py) each hold one ResumeService per database; any number
+# of processes can share the same database file.
+
+
+class InvalidResumeError(PdfExtractionError):
+    """
+    Raised when a readable document does not look like a resume.
+    """
+
+
+class ResumeService:
+    """
+    Database, analysis cache, job queue and payload archive for one resume_data.db.
+    """
+
+    def __init__(self, db_path=DB_PATH, api_key=None):
+        self.db = get_database(db_path)
+        self.cache = AnalysisCache.next_to(db_path)
+        self.jobs = get_job_queue(self.db, api_key, cache=self.cache)
+        self.archive = Archive.next_to(db_path)
+
+    def extract_text(self, data):
+        """
+        Extracts and validates resume text from PDF bytes. Raises
+        PdfExtractionError (InvalidResumeError for documents that are not resumes).
+        """
+        return self.check_text(extract_pdf_text(data))
+
+    def check_text(self, text):
+        """
+        Returns the text if it looks like a resume, else raises InvalidResumeError.
+        """
+        if not validate_resume(text):
+            raise InvalidResumeError("The document does not appear to be a valid resume.")
+        return text
+
+    def submit(self, resume_text, mode=DEFAULT_ANALYSIS_MODE, save=True, client=None):
+        """
+        Enqueues an analysis and returns its job id; with save, the result is
+        stored in user_data when the job finishes. client identifies the caller
+        in the fair upstream queue (see analyzer.admission).
+        """
+        return self.jobs.submit(resume_text, mode, save=save, client=client)
+
+    def job(self, job_id):
+        return self.jobs.get(job_id)
+
+    def save(self, result, resume_text=None, feedback=""):
+        """
+        Stores an analysis result and returns its record id.
+        """
+        return self.db.insert_analysis(result, feedback, resume_text=resume_text).result()
+
+    def update_feedback(self, record_id, feedback):
+        """
+        Stores feedback for a saved analysis; returns False if there is no such record.
+        """
+        return bool(self.db.update_feedback(record_id, feedback).result())
+
+    def stored_analysis(self, record_id):
+        """
+        Returns the stored analysis of a record (from the database or the archive), or None.
+        """
+        return load_analysis(self.db, self.archive, record_id)
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_service(db_path=DB_PATH, api_key=None):
+    """
+    Returns the process-wide ResumeService for a database, creating it on first use.
+    """
+    with _services_lock:
+        if db_path not in _services:
+            _services[db_path] = ResumeService(db_path, api_key)
+        return _services[db_path]
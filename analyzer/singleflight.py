@@ -0,0 +1,100 @@
+import threading
+
+# ===========================
+# Single-Flight Request Coalescing
+# ===========================
+# When several sessions analyze the same resume at once (a class sharing a
+# template, a team reviewing one candidate), only the first caller sends the
+# upstream request; the others wait for it and share its result. Streamed
+# sections are fanned out to every waiter, and a late joiner is first
+# replayed what has already arrived.
+
+
+class _Flight:
+    def __init__(self, owner=None):
+        # owner is the leader's own callback; its errors propagate to the leader
+        self.owner = owner
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.events = []
+        self.listeners = []
+        self.result = None
+        self.error = None
+
+    def subscribe(self, listener):
+        # Replay and registration under one lock so no event is missed or repeated
+        with self.lock:
+            for event in self.events:
+                listener(*event)
+            self.listeners.append(listener)
+
+    def emit(self, *event):
+        with self.lock:
+            self.events.append(event)
+            for listener in self.listeners:
+                try:
+                    listener(*event)
+                except Exception:
+                    # A waiter's callback failing must not abort the shared request
+                    pass
+        if self.owner is not None:
+            self.owner(*event)
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls by key: do(key, func) runs func once per key
+    at a time and hands its result (or exception) to every concurrent caller.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, func, on_event=None):
+        """
+        Returns (result, shared). func(emit) is called only by the first caller
+        for a key; emit(*event) forwards events to every caller's on_event.
+        shared is True for callers that waited on another caller's request.
+        """
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight(on_event)
+                self.executions += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            if on_event is not None:
+                flight.subscribe(on_event)
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+        try:
+            flight.result = func(flight.emit)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+    def stats(self):
+        """
+        Returns counts of calls, upstream executions, coalesced calls and keys in flight.
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._flights),
+            }
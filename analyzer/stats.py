@@ -0,0 +1,197 @@
+import argparse
+import sys
+
+# ===========================
+# Materialized Admin Statistics
+# ===========================
+# The Admin dashboard reads these small tables instead of scanning user_data.
+# Triggers keep them in step with every INSERT, feedback UPDATE and DELETE
+# (including "Clear Results") inside the same transaction as the change, so
+# a dashboard render costs O(number of buckets), not O(rows).
+
+SCORE_BUCKET_SQL = "MIN(MAX(COALESCE({score}, 0), 0) / 10, 9) * 10"
+
+STATS_TABLES = (
+    '''CREATE TABLE IF NOT EXISTS stats_totals (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        analyses INTEGER NOT NULL DEFAULT 0,
+        score_sum INTEGER NOT NULL DEFAULT 0,
+        with_feedback INTEGER NOT NULL DEFAULT 0
+    )''',
+    '''CREATE TABLE IF NOT EXISTS stats_score_bucket (
+        bucket INTEGER PRIMARY KEY,
+        count INTEGER NOT NULL DEFAULT 0
+    )''',
+    '''CREATE TABLE IF NOT EXISTS stats_daily (
+        day TEXT PRIMARY KEY,
+        count INTEGER NOT NULL DEFAULT 0,
+        score_sum INTEGER NOT NULL DEFAULT 0
+    )''',
+    '''CREATE TABLE IF NOT EXISTS stats_skill (
+        kind TEXT NOT NULL,
+        skill_id INTEGER NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (kind, skill_id)
+    ) WITHOUT ROWID''',
+    "CREATE INDEX IF NOT EXISTS idx_stats_skill_count ON stats_skill (kind, count DESC)",
+)
+
+STATS_TRIGGERS = (
+    f'''CREATE TRIGGER IF NOT EXISTS stats_user_data_insert AFTER INSERT ON user_data BEGIN
+        UPDATE stats_totals SET
+            analyses = analyses + 1,
+            score_sum = score_sum + COALESCE(NEW.resume_score, 0),
+            with_feedback = with_feedback + (COALESCE(NEW.feedback, '') != '')
+        WHERE id = 1;
+        INSERT INTO stats_score_bucket (bucket, count) VALUES ({SCORE_BUCKET_SQL.format(score="NEW.resume_score")}, 1)
+            ON CONFLICT (bucket) DO UPDATE SET count = count + 1;
+        INSERT INTO stats_daily (day, count, score_sum)
+            VALUES (COALESCE(date(NEW.timestamp), ''), 1, COALESCE(NEW.resume_score, 0))
+            ON CONFLICT (day) DO UPDATE SET count = count + 1, score_sum = score_sum + excluded.score_sum;
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS stats_user_data_delete AFTER DELETE ON user_data BEGIN
+        UPDATE stats_totals SET
+            analyses = analyses - 1,
+            score_sum = score_sum - COALESCE(OLD.resume_score, 0),
+            with_feedback = with_feedback - (COALESCE(OLD.feedback, '') != '')
+        WHERE id = 1;
+        UPDATE stats_score_bucket SET count = count - 1
+            WHERE bucket = {SCORE_BUCKET_SQL.format(score="OLD.resume_score")};
+        UPDATE stats_daily SET count = count - 1, score_sum = score_sum - COALESCE(OLD.resume_score, 0)
+            WHERE day = COALESCE(date(OLD.timestamp), '');
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS stats_user_data_feedback AFTER UPDATE OF feedback ON user_data BEGIN
+        UPDATE stats_totals SET
+            with_feedback = with_feedback
+                + (COALESCE(NEW.feedback, '') != '') - (COALESCE(OLD.feedback, '') != '')
+        WHERE id = 1;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS stats_analysis_skill_insert AFTER INSERT ON analysis_skill BEGIN
+        INSERT INTO stats_skill (kind, skill_id, count) VALUES (NEW.kind, NEW.skill_id, 1)
+            ON CONFLICT (kind, skill_id) DO UPDATE SET count = count + 1;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS stats_analysis_skill_delete AFTER DELETE ON analysis_skill BEGIN
+        UPDATE stats_skill SET count = count - 1 WHERE kind = OLD.kind AND skill_id = OLD.skill_id;
+    END''',
+)
+
+
+def install_stats(conn):
+    """
+    Creates the statistics tables and triggers and fills them from the raw tables.
+    """
+    for statement in STATS_TABLES + STATS_TRIGGERS:
+        conn.execute(statement)
+    rebuild_stats(conn)
+
+
+def rebuild_stats(conn):
+    """
+    Recomputes every statistics table from user_data and analysis_skill (without committing).
+    """
+    for table in ("stats_totals", "stats_score_bucket", "stats_daily", "stats_skill"):
+        conn.execute(f"DELETE FROM {table}")
+    conn.execute('''
+        INSERT INTO stats_totals (id, analyses, score_sum, with_feedback)
+        SELECT 1, COUNT(*), COALESCE(SUM(resume_score), 0),
+               COALESCE(SUM(COALESCE(feedback, '') != ''), 0)
+        FROM user_data
+    ''')
+    conn.execute(f'''
+        INSERT INTO stats_score_bucket (bucket, count)
+        SELECT {SCORE_BUCKET_SQL.format(score="resume_score")} AS bucket, COUNT(*)
+        FROM user_data GROUP BY bucket
+    ''')
+    conn.execute('''
+        INSERT INTO stats_daily (day, count, score_sum)
+        SELECT COALESCE(date(timestamp), '') AS day, COUNT(*), COALESCE(SUM(resume_score), 0)
+        FROM user_data GROUP BY day
+    ''')
+    conn.execute('''
+        INSERT INTO stats_skill (kind, skill_id, count)
+        SELECT kind, skill_id, COUNT(*) FROM analysis_skill GROUP BY kind, skill_id
+    ''')
+
+
+def read_stats(conn, include_skills=False):
+    """
+    Returns the statistics tables as plain Python values (zero counts dropped).
+    """
+    analyses, score_sum, with_feedback = conn.execute(
+        "SELECT analyses, score_sum, with_feedback FROM stats_totals WHERE id = 1"
+    ).fetchone() or (0, 0, 0)
+    stats = {
+        "analyses": analyses,
+        "average_score": score_sum / analyses if analyses else None,
+        "with_feedback": with_feedback,
+        "score_buckets": conn.execute(
+            "SELECT bucket, count FROM stats_score_bucket WHERE count > 0 ORDER BY bucket"
+        ).fetchall(),
+        "daily": conn.execute(
+            "SELECT day, count, score_sum FROM stats_daily WHERE count > 0 ORDER BY day"
+        ).fetchall(),
+    }
+    if include_skills:
+        stats["skills"] = conn.execute(
+            "SELECT kind, skill_id, count FROM stats_skill WHERE count > 0 ORDER BY kind, skill_id"
+        ).fetchall()
+    return stats
+
+
+def data_version(conn):
+    """
+    Returns a stamp that changes whenever the statistics can change: the
+    totals plus the last user_data id ever assigned (AUTOINCREMENT ids are
+    never reused, so a delete followed by an insert still moves the stamp).
+    """
+    totals = conn.execute(
+        "SELECT analyses, score_sum, with_feedback FROM stats_totals WHERE id = 1"
+    ).fetchone() or (0, 0, 0)
+    (last_id,) = conn.execute(
+        "SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'user_data'"
+    ).fetchone()
+    return tuple(totals) + (last_id,)
+
+
+def verify_stats(conn):
+    """
+    Rebuilds the statistics in a rolled-back savepoint and returns the names of
+    any sections that differ from the incrementally maintained values.
+    """
+    current = read_stats(conn, include_skills=True)
+    conn.execute("SAVEPOINT verify_stats")
+    try:
+        rebuild_stats(conn)
+        rebuilt = read_stats(conn, include_skills=True)
+    finally:
+        conn.execute("ROLLBACK TO verify_stats")
+        conn.execute("RELEASE verify_stats")
+    return [key for key in current if current[key] != rebuilt[key]]
+
+
+def main(argv=None):
+    from analyzer.storage import DB_PATH, connect, migrate
+
+    parser = argparse.ArgumentParser(description="Maintain the Admin dashboard statistics tables.")
+    parser.add_argument("command", choices=["rebuild", "verify"],
+                        help="rebuild: recompute from user_data; verify: compare against a fresh rebuild")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database file")
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    migrate(conn)
+    if args.command == "rebuild":
+        rebuild_stats(conn)
+        conn.commit()
+        print(f"Rebuilt statistics for {read_stats(conn)['analyses']} analyses.")
+        return 0
+    mismatched = verify_stats(conn)
+    if mismatched:
+        print(f"Statistics out of date: {', '.join(mismatched)}. Run 'rebuild' to fix.")
+        return 1
+    print("Statistics match user_data.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,616 @@
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from analyzer.analysis import parse_resume_score
+from analyzer.archive import PAYLOAD_SCHEMA, decode_payload, hot_payload
+from analyzer.jobs import ANALYSIS_JOB_ADDED_COLUMNS, ANALYSIS_JOB_SCHEMA
+from analyzer.metrics import DB_INSERT_SECONDS, DB_LOCK_WAIT_SECONDS, timed
+from analyzer.stats import data_version, install_stats, read_stats
+
+# ===========================
+# Database Setup
+# ===========================
+# Every Streamlit session runs on its own thread, so connections are never
+# shared across threads: reads borrow a connection from a small pool, and all
+# writes go through one background writer thread that group-commits whatever
+# has queued up. With WAL, readers never block that writer.
+
+DB_PATH = 'resume_data.db'
+
+USER_DATA_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS user_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        email TEXT,
+        resume_score INTEGER,
+        skills TEXT,
+        recommended_skills TEXT,
+        courses TEXT,
+        timestamp TEXT,
+        feedback TEXT,
+        model TEXT,
+        latency_ms INTEGER,
+        summary TEXT,
+        ats_keywords TEXT
+    )
+'''
+
+# Columns added to user_data after its original release, with their types
+USER_DATA_ADDED_COLUMNS = (
+    ("model", "TEXT"), ("latency_ms", "INTEGER"), ("summary", "TEXT"), ("ats_keywords", "TEXT"),
+)
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    # NORMAL is durable across application crashes in WAL mode and avoids an fsync per commit
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    # Negative cache_size is in KiB: 16 MB page cache per connection
+    "PRAGMA cache_size=-16000",
+    "PRAGMA temp_store=MEMORY",
+    # Link rows are removed with their user_data row
+    "PRAGMA foreign_keys=ON",
+)
+
+# Skills and courses are also stored normalized, so the Admin aggregates are
+# indexed GROUP BY queries instead of re-splitting the comma-joined columns.
+SCHEMA_VERSION = 9
+
+NORMALIZED_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS skill (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE COLLATE NOCASE
+    )''',
+    '''CREATE TABLE IF NOT EXISTS course (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE COLLATE NOCASE
+    )''',
+    '''CREATE TABLE IF NOT EXISTS analysis_skill (
+        analysis_id INTEGER NOT NULL REFERENCES user_data(id) ON DELETE CASCADE,
+        kind TEXT NOT NULL CHECK (kind IN ('current', 'recommended')),
+        skill_id INTEGER NOT NULL REFERENCES skill(id),
+        PRIMARY KEY (analysis_id, kind, skill_id)
+    ) WITHOUT ROWID''',
+    '''CREATE TABLE IF NOT EXISTS analysis_course (
+        analysis_id INTEGER NOT NULL REFERENCES user_data(id) ON DELETE CASCADE,
+        course_id INTEGER NOT NULL REFERENCES course(id),
+        PRIMARY KEY (analysis_id, course_id)
+    ) WITHOUT ROWID''',
+    "CREATE INDEX IF NOT EXISTS idx_user_data_timestamp ON user_data (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_user_data_resume_score ON user_data (resume_score)",
+    "CREATE INDEX IF NOT EXISTS idx_analysis_skill_kind_skill ON analysis_skill (kind, skill_id)",
+    "CREATE INDEX IF NOT EXISTS idx_analysis_course_course ON analysis_course (course_id)",
+)
+
+# One row per LLM-backed analysis: estimated prompt size before and after
+# compaction, and the request latency, to measure what compaction saves.
+PROMPT_LOG_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS prompt_log (
+        id INTEGER PRIMARY KEY,
+        timestamp TEXT NOT NULL DEFAULT (datetime('now')),
+        mode TEXT NOT NULL,
+        raw_tokens INTEGER NOT NULL,
+        resume_tokens INTEGER NOT NULL,
+        prompt_tokens INTEGER NOT NULL,
+        truncated INTEGER NOT NULL,
+        cached INTEGER NOT NULL,
+        latency_ms INTEGER NOT NULL,
+        ok INTEGER NOT NULL
+    )
+'''
+
+
+def connect(path=DB_PATH, **kwargs):
+    """
+    Connects to (or creates) the SQLite database, applies the tuned pragmas
+    and ensures the schema exists.
+    """
+    conn = sqlite3.connect(path, **kwargs)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    conn.execute(USER_DATA_SCHEMA)
+    conn.commit()
+    return conn
+
+
+def migrate(conn):
+    """
+    Brings the database up to SCHEMA_VERSION. Safe to re-run.
+    1: backfills the normalized skill/course tables from existing user_data rows.
+    2: adds the incrementally maintained Admin statistics tables.
+    3: adds the prompt_log table.
+    4: adds the background analysis_job table.
+    5: adds the model and latency_ms columns to user_data.
+    6: adds the summary and ats_keywords columns (read by the search index).
+    7: adds the analysis_payload table (full results, compressed).
+    8: adds the owner, save and record_id columns to analysis_job.
+    9: adds the sections and queue columns to analysis_job.
+    """
+    (version,) = conn.execute("PRAGMA user_version").fetchone()
+    if version >= SCHEMA_VERSION:
+        return
+    if version < 1:
+        for statement in NORMALIZED_SCHEMA:
+            conn.execute(statement)
+        rows = conn.execute("SELECT id, skills, recommended_skills, courses FROM user_data").fetchall()
+        for analysis_id, skills, recommended_skills, courses in rows:
+            link_analysis(conn, analysis_id, split_joined(skills), split_joined(recommended_skills),
+                          split_joined(courses))
+    if version < 2:
+        install_stats(conn)
+    if version < 3:
+        conn.execute(PROMPT_LOG_SCHEMA)
+    if version < 4:
+        for statement in ANALYSIS_JOB_SCHEMA:
+            conn.execute(statement)
+    if version < 6:
+        # Databases created before the columns existed get them added
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(user_data)")}
+        for column, column_type in USER_DATA_ADDED_COLUMNS:
+            if column not in existing:
+                conn.execute(f"ALTER TABLE user_data ADD COLUMN {column} {column_type}")
+    if version < 7:
+        conn.execute(PAYLOAD_SCHEMA)
+    if version < 9:
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(analysis_job)")}
+        for column, column_type in ANALYSIS_JOB_ADDED_COLUMNS:
+            if column not in existing:
+                conn.execute(f"ALTER TABLE analysis_job ADD COLUMN {column} {column_type}")
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
+
+
+def split_joined(value):
+    """
+    Splits a ", "-joined user_data column back into its items.
+    """
+    return [item for item in (value or "").split(", ") if item.strip()]
+
+
+def unique_names(names):
+    """
+    Strips names and drops blanks and case-insensitive duplicates, keeping order.
+    """
+    seen = set()
+    unique = []
+    for name in names:
+        name = str(name).strip()
+        if name and name.lower() not in seen and name != "Null":
+            seen.add(name.lower())
+            unique.append(name)
+    return unique
+
+
+def link_analysis(conn, analysis_id, current_skills, recommended_skills, courses):
+    """
+    Writes the skill and course link rows for one analysis (without committing).
+    """
+    for kind, names in (("current", current_skills), ("recommended", recommended_skills)):
+        for name in unique_names(names):
+            conn.execute("INSERT OR IGNORE INTO skill (name) VALUES (?)", (name,))
+            conn.execute('''
+                INSERT OR IGNORE INTO analysis_skill (analysis_id, kind, skill_id)
+                SELECT ?, ?, id FROM skill WHERE name = ?
+            ''', (analysis_id, kind, name))
+    for name in unique_names(courses):
+        conn.execute("INSERT OR IGNORE INTO course (name) VALUES (?)", (name,))
+        conn.execute('''
+            INSERT OR IGNORE INTO analysis_course (analysis_id, course_id)
+            SELECT ?, id FROM course WHERE name = ?
+        ''', (analysis_id, name))
+
+
+def course_names(result):
+    return [course.get("course_name", "Null") if isinstance(course, dict) else str(course)
+            for course in result.get("course_recommendations", [])]
+
+
+def analysis_record(result):
+    """
+    Flattens an analysis result into the user_data column values
+    (name, email, resume_score, skills, recommended_skills, courses, model, latency_ms,
+    summary, ats_keywords).
+    """
+    basic_info = result.get("basic_info", {})
+    skills = result.get("skills", {})
+    return (
+        basic_info.get("name", "Null"),
+        basic_info.get("email", "Null"),
+        parse_resume_score(result.get("resume_score", "70/100")),
+        ", ".join(skills.get("current_skills", [])),
+        ", ".join(skills.get("recommended_skills", [])),
+        ", ".join(course_names(result)),
+        result.get("model"),
+        result.get("latency_ms"),
+        result.get("ai_resume_summary"),
+        ", ".join(result.get("ats_keywords", [])),
+    )
+
+
+INSERT_ANALYSIS_SQL = '''
+    INSERT INTO user_data (name, email, resume_score, skills, recommended_skills, courses, model, latency_ms,
+                           summary, ats_keywords, feedback, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+'''
+
+
+@timed(DB_INSERT_SECONDS)
+def write_analysis(conn, result, feedback="", payload=None):
+    """
+    Inserts an analysis row, its skill/course links and, if given, its
+    (dictionary, blob) payload from hot_payload (without committing), and
+    returns the new record id.
+    """
+    analysis_id = conn.execute(INSERT_ANALYSIS_SQL, analysis_record(result) + (feedback,)).lastrowid
+    skills = result.get("skills", {})
+    link_analysis(conn, analysis_id, skills.get("current_skills", []),
+                  skills.get("recommended_skills", []), course_names(result))
+    if payload is not None:
+        conn.execute("INSERT INTO analysis_payload (analysis_id, dictionary, payload) VALUES (?, ?, ?)",
+                     (analysis_id,) + payload)
+    return analysis_id
+
+
+REINSERT_ANALYSIS_SQL = '''
+    INSERT INTO user_data (id, name, email, resume_score, skills, recommended_skills, courses, model, latency_ms,
+                           summary, ats_keywords, feedback, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def update_analysis_fields(conn, analysis_id, fields):
+    """
+    Replaces some fields of a saved analysis (without committing) and returns
+    whether it was updated: False if the record is gone or its payload has
+    been archived. The id, timestamp, feedback and resume text are kept.
+    """
+    row = conn.execute('''
+        SELECT u.timestamp, u.feedback, p.dictionary, p.payload
+        FROM user_data AS u JOIN analysis_payload AS p ON p.analysis_id = u.id
+        WHERE u.id = ?
+    ''', (analysis_id,)).fetchone()
+    if row is None or row[3] is None:
+        return False
+    timestamp, feedback, dictionary, payload = row
+    stored = decode_payload(payload, dictionary)
+    result = dict(stored["result"], **fields)
+    # Deleted and inserted again under the same id, so the link rows and the statistics
+    # triggers follow the new values
+    conn.execute("DELETE FROM user_data WHERE id = ?", (analysis_id,))
+    conn.execute(REINSERT_ANALYSIS_SQL, (analysis_id,) + analysis_record(result) + (feedback, timestamp))
+    skills = result.get("skills", {})
+    link_analysis(conn, analysis_id, skills.get("current_skills", []),
+                  skills.get("recommended_skills", []), course_names(result))
+    conn.execute("INSERT INTO analysis_payload (analysis_id, dictionary, payload) VALUES (?, ?, ?)",
+                 (analysis_id,) + hot_payload(result, stored.get("resume_text")))
+    return True
+
+
+def insert_analysis(conn, result, feedback="", resume_text=None):
+    """
+    Saves an analysis result to user_data on the given connection and returns the new record id.
+    """
+    analysis_id = write_analysis(conn, result, feedback, hot_payload(result, resume_text))
+    conn.commit()
+    return analysis_id
+
+
+USER_DATA_COLUMNS = (
+    "id", "name", "email", "resume_score", "skills", "recommended_skills", "courses", "timestamp", "feedback",
+    "model", "latency_ms",
+)
+
+# Columns the Admin grid can sort by; each has an index ending in the rowid,
+# so keyset pagination on (column, id) never scans skipped rows.
+SORT_COLUMNS = ("id", "resume_score", "timestamp")
+
+
+def user_data_filters(filters):
+    """
+    Builds a WHERE clause and parameters from Admin filters:
+    min_score, max_score, date_from, date_to (YYYY-MM-DD, inclusive) and skill.
+    """
+    clauses, params = [], []
+    filters = filters or {}
+    if filters.get("min_score") is not None:
+        clauses.append("resume_score >= ?")
+        params.append(filters["min_score"])
+    if filters.get("max_score") is not None:
+        clauses.append("resume_score <= ?")
+        params.append(filters["max_score"])
+    if filters.get("date_from"):
+        clauses.append("timestamp >= ?")
+        params.append(str(filters["date_from"]))
+    if filters.get("date_to"):
+        clauses.append("timestamp < date(?, '+1 day')")
+        params.append(str(filters["date_to"]))
+    if filters.get("skill"):
+        clauses.append('''EXISTS (
+            SELECT 1 FROM analysis_skill JOIN skill ON skill.id = analysis_skill.skill_id
+            WHERE analysis_skill.analysis_id = user_data.id AND skill.name = ?
+        )''')
+        params.append(filters["skill"].strip())
+    return (" AND ".join(clauses) or "1"), params
+
+
+class BackgroundWriter:
+    """
+    Single writer thread that drains queued statements and commits them in
+    groups, resolving each caller's Future with the statement's lastrowid.
+    """
+
+    def __init__(self, path, max_batch=256):
+        self.path = path
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, func):
+        """
+        Queues func(conn) to run inside the next group commit and returns a Future of its result.
+        func must not commit; the writer commits the whole group at once.
+        """
+        future = Future()
+        self._queue.put((func, future))
+        return future
+
+    def execute(self, sql, params=()):
+        """
+        Queues a single statement and returns a Future of its lastrowid.
+        """
+        return self.submit(lambda conn: conn.execute(sql, params).lastrowid)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        # Autocommit mode: transactions are managed explicitly per group
+        conn = connect(self.path, isolation_level=None)
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            # Group commit: take everything that queued up while the last commit ran
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            self._commit(conn, batch)
+        conn.close()
+
+    def _commit(self, conn, batch):
+        results = []
+        try:
+            # BEGIN IMMEDIATE waits (up to busy_timeout) while another process holds the write lock
+            with DB_LOCK_WAIT_SECONDS.time(kind="write"):
+                conn.execute("BEGIN IMMEDIATE")
+            for func, _ in batch:
+                # A failing statement only rolls back its own savepoint, not the whole group
+                conn.execute("SAVEPOINT item")
+                try:
+                    results.append((func(conn), None))
+                    conn.execute("RELEASE item")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO item")
+                    conn.execute("RELEASE item")
+                    results.append((None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            results = [(None, e)] * len(batch)
+        for (_, future), (value, error) in zip(batch, results):
+            if error is None:
+                future.set_result(value)
+            else:
+                future.set_exception(error)
+
+
+class Database:
+    """
+    Pooled read connections plus a background writer for one SQLite file.
+    """
+
+    def __init__(self, path=DB_PATH, pool_size=8):
+        self.path = path
+        # Create the file, schema and WAL mode before any reader or writer starts
+        conn = connect(path)
+        migrate(conn)
+        conn.close()
+        self._pool = queue.LifoQueue()
+        self._pool_size = pool_size
+        self._created = 0
+        self._pool_lock = threading.Lock()
+        self.writer = BackgroundWriter(path)
+
+    @contextmanager
+    def read(self):
+        """
+        Borrows a read connection from the pool.
+        """
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                create = self._created < self._pool_size
+                if create:
+                    self._created += 1
+            if create:
+                conn = connect(self.path, check_same_thread=False)
+            else:
+                # Every pooled connection is busy: wait for one to come back
+                with DB_LOCK_WAIT_SECONDS.time(kind="read_pool"):
+                    conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            # End any implicit read transaction so the WAL can be checkpointed
+            conn.rollback()
+            self._pool.put(conn)
+
+    def query(self, sql, params=()):
+        """
+        Runs a read query and returns all rows.
+        """
+        with self.read() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def write(self, sql, params=()):
+        """
+        Queues a write and returns a Future of its lastrowid.
+        """
+        return self.writer.execute(sql, params)
+
+    def insert_analysis(self, result, feedback="", resume_text=None):
+        """
+        Queues an analysis insert, with the full result and resume text kept
+        compressed in analysis_payload, and returns a Future of the new record id.
+        """
+        # Compressed on the caller's thread, not the single writer's
+        payload = hot_payload(result, resume_text)
+        return self.writer.submit(lambda conn: write_analysis(conn, result, feedback, payload))
+
+    def update_analysis_fields(self, record_id, fields):
+        """
+        Queues replacing some fields of a saved analysis (see update_analysis_fields)
+        and returns a Future of whether the record was updated.
+        """
+        return self.writer.submit(lambda conn: update_analysis_fields(conn, record_id, fields))
+
+    def update_feedback(self, record_id, feedback):
+        """
+        Queues a feedback update and returns a Future of the number of rows
+        changed (0 when there is no such record).
+        """
+        return self.writer.submit(lambda conn: conn.execute(
+            "UPDATE user_data SET feedback=? WHERE id=?", (feedback, record_id)).rowcount)
+
+    def clear_user_data(self):
+        return self.write("DELETE FROM user_data")
+
+    def log_prompt(self, usage):
+        """
+        Queues a prompt_log row from the usage dict reported by analyze_resume.
+        """
+        return self.write('''
+            INSERT INTO prompt_log (mode, raw_tokens, resume_tokens, prompt_tokens, truncated, cached, latency_ms, ok)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', tuple(usage[key] for key in ("mode", "raw_tokens", "resume_tokens", "prompt_tokens",
+                                           "truncated", "cached", "latency_ms", "ok")))
+
+    def prompt_stats(self):
+        """
+        Summarizes prompt_log: request and cache-hit counts, average estimated
+        tokens of the raw and compacted resume text, tokens saved, truncations
+        and the average latency of successful uncached requests.
+        """
+        row = self.query('''
+            SELECT COUNT(*), COALESCE(SUM(cached), 0),
+                   AVG(raw_tokens), AVG(resume_tokens), AVG(prompt_tokens),
+                   COALESCE(SUM(raw_tokens - resume_tokens), 0), COALESCE(SUM(truncated), 0),
+                   AVG(CASE WHEN ok AND NOT cached THEN latency_ms END)
+            FROM prompt_log
+        ''')[0]
+        keys = ("requests", "cache_hits", "avg_raw_tokens", "avg_resume_tokens", "avg_prompt_tokens",
+                "tokens_saved", "truncated", "avg_latency_ms")
+        return dict(zip(keys, row))
+
+    def top_skills(self, kind, top_n=5):
+        """
+        Returns [(skill, count), ...] for the top_n most frequent skills of a kind
+        ('current' or 'recommended'), with the remainder summed under 'Others'.
+        Read from the materialized stats_skill counts.
+        """
+        with self.read() as conn:
+            rows = conn.execute('''
+                SELECT skill.name, stats_skill.count FROM stats_skill
+                JOIN skill ON skill.id = stats_skill.skill_id
+                WHERE stats_skill.kind = ? AND stats_skill.count > 0
+                ORDER BY stats_skill.count DESC, skill.name LIMIT ?
+            ''', (kind, top_n)).fetchall()
+            (total,) = conn.execute(
+                "SELECT COALESCE(SUM(count), 0) FROM stats_skill WHERE kind = ?", (kind,)
+            ).fetchone()
+        others = total - sum(count for _, count in rows)
+        if others > 0:
+            rows.append(("Others", others))
+        return rows
+
+    def browse(self, filters=None, sort="id", descending=True, after=None, page_size=50):
+        """
+        Returns one page of user_data rows using keyset pagination.
+        after is the cursor returned with the previous page; the returned cursor
+        is None on the last page.
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort!r}")
+        where, params = user_data_filters(filters)
+        order = "DESC" if descending else "ASC"
+        if after is not None:
+            where += f" AND ({sort}, id) {'<' if descending else '>'} (?, ?)"
+            params += list(after)
+        rows = self.query(f'''
+            SELECT {", ".join(USER_DATA_COLUMNS)} FROM user_data
+            WHERE {where}
+            ORDER BY {sort} {order}, id {order}
+            LIMIT ?
+        ''', params + [page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        sort_index = USER_DATA_COLUMNS.index(sort)
+        cursor = (rows[-1][sort_index], rows[-1][0]) if has_more else None
+        return rows, cursor
+
+    def get_analyses(self, ids):
+        """
+        Returns the user_data rows (USER_DATA_COLUMNS) for the given ids, in
+        the order given; ids that no longer exist are skipped.
+        """
+        if not ids:
+            return []
+        rows = self.query(f'''
+            SELECT {", ".join(USER_DATA_COLUMNS)} FROM user_data WHERE id IN ({", ".join("?" * len(ids))})
+        ''', list(ids))
+        by_id = {row[0]: row for row in rows}
+        return [by_id[analysis_id] for analysis_id in ids if analysis_id in by_id]
+
+    def stats(self):
+        """
+        Returns the materialized dashboard statistics: totals, average score,
+        score histogram buckets and per-day counts.
+        """
+        with self.read() as conn:
+            return read_stats(conn)
+
+    def data_version(self):
+        """
+        Returns a cheap stamp of the dashboard data; equal stamps mean the
+        statistics and top skills have not changed.
+        """
+        with self.read() as conn:
+            return data_version(conn)
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(path=DB_PATH):
+    """
+    Returns the process-wide Database for a path, creating it on first use.
+    """
+    with _databases_lock:
+        if path not in _databases:
+            _databases[path] = Database(path)
+        return _databases[path]
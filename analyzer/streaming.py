@@ -0,0 +1,169 @@
+import json
+
+# ===========================
+# Streaming Chat Completions
+# ===========================
+# The chat-completions endpoint streams Server-Sent Events. The incremental
+# parser below watches the generated text and emits every top-level key of the
+# analysis JSON as soon as its value is complete, so the dashboard can render
+# sections while the rest of the answer is still being generated.
+
+
+def iter_stream_content(response):
+    """
+    Yields content deltas from a streaming chat-completions response.
+    """
+    for line in response.iter_lines(decode_unicode=True):
+        # Blank lines separate events; lines starting with ':' are keep-alive comments
+        if not line or line.startswith(":") or not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+        try:
+            event = json.loads(data)
+        except json.JSONDecodeError:
+            continue
+        if "error" in event:
+            raise RuntimeError(event["error"].get("message", "Streaming error from API."))
+        for choice in event.get("choices", []):
+            content = (choice.get("delta") or {}).get("content")
+            if content:
+                yield content
+
+
+class IncrementalJSONParser:
+    """
+    Scans streamed text for the outermost JSON object and emits each top-level
+    (key, value) pair once the value has been fully received.
+
+    Reasoning models may think out loud before answering, so anything inside a
+    <think>...</think> block and any text before the first '{' is ignored. An
+    object without any complete member (a brace-y aside such as "{name}") is
+    skipped and scanning resumes after it.
+    """
+
+    THINK_OPEN = "<think>"
+    THINK_CLOSE = "</think>"
+
+    def __init__(self):
+        self.text = ""
+        self.result = {}
+        self.done = False
+        self._pos = 0
+        self._start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._in_think = False
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+
+    def feed(self, chunk):
+        """
+        Consumes a chunk of text and returns the list of newly completed (key, value) pairs.
+        """
+        self.text += chunk
+        completed = []
+        text = self.text
+        while self._pos < len(text) and not self.done:
+            if self._start is None and not self._scan_preamble(text):
+                break
+            if self._start is None:
+                continue
+            ch = text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key is None and self._value_start is None:
+                        self._key = json.loads(text[self._key_start:self._pos + 1])
+            elif ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key is None and self._value_start is None:
+                    self._key_start = self._pos
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(text, completed)
+                    if self.result:
+                        self.done = True
+                    else:
+                        self._reset()
+            elif ch == ":" and self._depth == 1 and self._key is not None and self._value_start is None:
+                self._value_start = self._pos + 1
+            elif ch == "," and self._depth == 1:
+                self._emit(text, completed)
+            self._pos += 1
+        return completed
+
+    def _reset(self):
+        # Not the answer: look for the next object after this one
+        self._start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+
+    def _scan_preamble(self, text):
+        """
+        Advances past reasoning text until the opening brace of the JSON object.
+        Returns False when more input is needed.
+        """
+        if self._in_think:
+            end = text.find(self.THINK_CLOSE, self._pos)
+            if end == -1:
+                # Keep enough tail to match a closing tag split across chunks
+                self._pos = max(self._pos, len(text) - len(self.THINK_CLOSE))
+                return False
+            self._pos = end + len(self.THINK_CLOSE)
+            self._in_think = False
+            return True
+        think = text.find(self.THINK_OPEN, self._pos)
+        brace = text.find("{", self._pos)
+        if think != -1 and (brace == -1 or think < brace):
+            self._in_think = True
+            self._pos = think + len(self.THINK_OPEN)
+            return True
+        if brace == -1:
+            self._pos = max(self._pos, len(text) - len(self.THINK_OPEN))
+            return False
+        self._start = brace
+        self._depth = 1
+        self._pos = brace + 1
+        return False if self._pos >= len(text) else True
+
+    def _emit(self, text, completed):
+        if self._key is not None and self._value_start is not None:
+            try:
+                value = json.loads(text[self._value_start:self._pos])
+            except json.JSONDecodeError:
+                value = None
+            if value is not None:
+                self.result[self._key] = value
+                completed.append((self._key, value))
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+
+
+def stream_analysis(response, on_section=None):
+    """
+    Reads a streaming chat-completions response, calling on_section(key, value)
+    for each top-level section as it completes.
+    Returns the raw generated text and the parsed object (None if it never closed).
+    """
+    parser = IncrementalJSONParser()
+    for content in iter_stream_content(response):
+        for key, value in parser.feed(content):
+            if on_section is not None:
+                on_section(key, value)
+    return parser.text, (parser.result if parser.done else None)
@@ -0,0 +1,212 @@
+"""
+Load test of the headless HTTP API against a mock LLM.
+
+Starts benchmarks/mock_llm.py and `python -m analyzer.api` with --workers
+processes on a temporary database, then N concurrent clients each upload
+their resumes to POST /v1/analyses and follow the NDJSON stream until the
+analysis is saved (or, with --poll, poll GET /v1/jobs/{id}). A final case
+sends one ZIP of resumes to POST /v1/batch and streams the results.
+
+    python benchmarks/bench_api.py --workers 4 --clients 16 --requests 5 --latency 1.0
+    python benchmarks/bench_api.py --workers 4 --clients 16 --json api.json
+    python benchmarks/bench_api.py --workers 4 --clients 16 --compare api.json
+"""
+import argparse
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+
+import requests
+from common import add_report_arguments, report, summarize
+from corpus import SIZES, generate_corpus
+from mock_llm import add_mock_arguments, mock_settings, start_mock_server
+
+from analyzer.analysis import ANALYSIS_MODES
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_api(tmp, workers, llm_url):
+    """
+    Starts the API server in a subprocess and waits until /health answers.
+    Returns (base_url, process).
+    """
+    port = free_port()
+    env = dict(os.environ, OPENROUTER_API_URL=llm_url, OPENROUTER_API_KEY="benchmark",
+               PYTHONPATH=PACKAGE_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "analyzer.api", "--port", str(port), "--workers", str(workers),
+         "--db", os.path.join(tmp, "api.db")],
+        cwd=tmp, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).ok:
+                return base_url, process
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("the API server did not start")
+
+
+def stream_events(response):
+    for line in response.iter_lines():
+        if line:
+            yield json.loads(line)
+
+
+def analyze_streaming(session, base_url, name, data, mode):
+    """
+    Returns (seconds to the job's first event, seconds to the final event).
+    """
+    started = time.perf_counter()
+    first = None
+    with session.post(f"{base_url}/v1/analyses", params={"mode": mode, "stream": "true"},
+                      files={"file": (name, data, "application/pdf")}, stream=True, timeout=300) as response:
+        response.raise_for_status()
+        for event in stream_events(response):
+            if event["event"] == "queue":
+                continue
+            first = first or time.perf_counter() - started
+            if event["event"] == "error":
+                raise RuntimeError(event["error"])
+            if event["event"] == "done":
+                return first, time.perf_counter() - started
+    raise RuntimeError("the stream ended without a result")
+
+
+def analyze_polling(session, base_url, name, data, mode):
+    started = time.perf_counter()
+    response = session.post(f"{base_url}/v1/analyses", params={"mode": mode},
+                            files={"file": (name, data, "application/pdf")}, timeout=300)
+    response.raise_for_status()
+    submitted = time.perf_counter() - started
+    status_url = base_url + response.json()["status_url"]
+    while True:
+        job = session.get(status_url, timeout=30).json()
+        if job["status"] == "error":
+            raise RuntimeError(job["error"])
+        if job["status"] == "done":
+            return submitted, time.perf_counter() - started
+        time.sleep(0.1)
+
+
+def run_clients(base_url, corpus, clients, requests_per_client, mode, poll):
+    samples = {"first_event": [], "end_to_end": []}
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients + 1)
+    analyze = analyze_polling if poll else analyze_streaming
+
+    def client(index):
+        session = requests.Session()
+        # Every client gets its own share of the API's fair upstream queue
+        session.headers["X-Client-Id"] = f"bench-{index}"
+        barrier.wait()
+        for n in range(requests_per_client):
+            name, _, data = corpus[(index * requests_per_client + n) % len(corpus)]
+            try:
+                first, total = analyze(session, base_url, name, data, mode)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                samples["first_event"].append(first)
+                samples["end_to_end"].append(total)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return samples, errors, time.perf_counter() - started
+
+
+def run_batch(base_url, corpus, mode):
+    """
+    Uploads the corpus as one ZIP and returns (seconds per finished resume, failures, elapsed).
+    """
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        for name, _, data in corpus:
+            zf.writestr(name, data)
+    started = time.perf_counter()
+    finished, failures = [], 0
+    with requests.post(f"{base_url}/v1/batch", params={"mode": mode, "stream": "true"},
+                       files={"files": ("batch.zip", archive.getvalue(), "application/zip")},
+                       stream=True, timeout=600) as response:
+        response.raise_for_status()
+        for event in stream_events(response):
+            if event["event"] == "done":
+                finished.append(time.perf_counter() - started)
+            elif event["event"] == "error" or "error" in event:
+                failures += 1
+    return finished, failures, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2, help="API worker processes")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent API clients")
+    parser.add_argument("--requests", type=int, default=5, help="analyses per client")
+    parser.add_argument("--batch", type=int, default=20, help="resumes in the batch request (0 to skip)")
+    parser.add_argument("--mode", choices=ANALYSIS_MODES, default="full")
+    parser.add_argument("--poll", action="store_true", help="poll job status instead of streaming")
+    parser.add_argument("--sizes", default="short,medium,long",
+                        help=f"comma-separated resume sizes to cycle through ({', '.join(SIZES)})")
+    add_mock_arguments(parser)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    sizes = {label: SIZES[label] for label in args.sizes.split(",")}
+    # Distinct resumes for every request and the batch, so nothing is served from the cache
+    corpus = generate_corpus(count=args.clients * args.requests + args.batch, sizes=sizes)
+    single, batch = corpus[:args.clients * args.requests], corpus[args.clients * args.requests:]
+    llm_url, server = start_mock_server(**mock_settings(args))
+    case = f"{args.workers}w_{args.clients}c_{args.mode}" + ("_poll" if args.poll else "")
+    with tempfile.TemporaryDirectory() as tmp:
+        base_url, process = start_api(tmp, args.workers, llm_url)
+        try:
+            samples, errors, elapsed = run_clients(base_url, single, args.clients, args.requests,
+                                                   args.mode, args.poll)
+            batch_result = run_batch(base_url, batch, args.mode) if batch else None
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+            server.shutdown()
+
+    rows = [
+        summarize("api_end_to_end", case, samples["end_to_end"], elapsed, errors=len(errors)),
+        summarize("api_submit" if args.poll else "api_first_event", case, samples["first_event"], elapsed),
+    ]
+    print(f"{len(samples['end_to_end'])} analyses by {args.clients} clients through {args.workers} workers "
+          f"in {elapsed:.2f}s, {len(errors)} failed (mock latency {args.latency}s +/- {args.jitter}s)")
+    for message in sorted(set(errors))[:5]:
+        print(f"  error: {message[:120]}")
+    if batch_result:
+        finished, failures, batch_elapsed = batch_result
+        rows.append(summarize("api_batch", f"{len(batch)}_resumes_{args.mode}", finished, batch_elapsed,
+                              errors=failures))
+    return report(rows, args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,116 @@
+"""
+End-to-end load test: N concurrent simulated users against a mock LLM.
+
+Each user repeatedly takes a synthetic resume PDF through the same steps as
+the User dashboard (extract text, validate, analyze, save to user_data) with
+the analysis served by benchmarks/mock_llm.py, and the run reports latency
+percentiles and throughput per stage.
+
+    python benchmarks/bench_load.py --users 16 --requests 5 --latency 1.0 --error-rate 0.02
+    python benchmarks/bench_load.py --users 16 --json load.json
+    python benchmarks/bench_load.py --users 16 --compare load.json
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from common import add_report_arguments, report, summarize
+from corpus import SIZES, generate_corpus
+from mock_llm import add_mock_arguments, mock_settings, start_mock_server
+
+from analyzer import analysis
+from analyzer.analysis import ANALYSIS_MODES, analyze_resume, validate_resume
+from analyzer.pdf import extract_pdf_text
+from analyzer.storage import Database
+
+STAGES = ("extract", "analyze", "save")
+
+
+def run_load(db, corpus, users, requests_per_user, mode):
+    """
+    Runs the simulated users and returns (samples, errors, elapsed) where
+    samples maps each stage and "end_to_end" to per-request durations.
+    """
+    samples = {stage: [] for stage in STAGES + ("end_to_end",)}
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(users + 1)
+
+    def user(index):
+        barrier.wait()
+        for n in range(requests_per_user):
+            # Every request gets its own resume so no two are coalesced or identical
+            _, _, data = corpus[(index * requests_per_user + n) % len(corpus)]
+            timings = {}
+            started = time.perf_counter()
+            try:
+                text = extract_pdf_text(data)
+                timings["extract"] = time.perf_counter() - started
+                if not validate_resume(text):
+                    raise ValueError("synthetic resume failed validation")
+                mark = time.perf_counter()
+                result = analyze_resume(text, "benchmark", mode=mode)
+                timings["analyze"] = time.perf_counter() - mark
+                if "error" in result:
+                    raise RuntimeError(result["error"])
+                mark = time.perf_counter()
+                db.insert_analysis(result).result()
+                timings["save"] = time.perf_counter() - mark
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            timings["end_to_end"] = time.perf_counter() - started
+            with lock:
+                for stage, duration in timings.items():
+                    samples[stage].append(duration)
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return samples, errors, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=8, help="concurrent simulated users")
+    parser.add_argument("--requests", type=int, default=5, help="analyses per user")
+    parser.add_argument("--mode", choices=ANALYSIS_MODES, default="full")
+    parser.add_argument("--sizes", default="short,medium,long",
+                        help=f"comma-separated resume sizes to cycle through ({', '.join(SIZES)})")
+    add_mock_arguments(parser)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    sizes = {label: SIZES[label] for label in args.sizes.split(",")}
+    corpus = generate_corpus(count=args.users * args.requests, sizes=sizes)
+    analysis.API_URL, server = start_mock_server(**mock_settings(args))
+    case = f"{args.users}u_{args.mode}"
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "load.db"))
+        try:
+            samples, errors, elapsed = run_load(db, corpus, args.users, args.requests, args.mode)
+        finally:
+            db.writer.close()
+            server.shutdown()
+
+    total = args.users * args.requests
+    upstream = server.RequestHandlerClass.settings
+    rows = [summarize("load_end_to_end", case, samples["end_to_end"], elapsed, errors=len(errors))]
+    rows += [summarize(f"load_{stage}", case, samples[stage], elapsed) for stage in STAGES]
+    print(f"{total} analyses by {args.users} users in {elapsed:.2f}s, {len(errors)} failed "
+          f"(mock latency {args.latency}s +/- {args.jitter}s; {upstream.requests} upstream requests, "
+          f"{upstream.errors} injected errors retried or failed)")
+    for message in sorted(set(errors))[:5]:
+        print(f"  error: {message[:120]}")
+    return report(rows, args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
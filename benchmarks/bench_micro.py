@@ -0,0 +1,107 @@
+"""
+Micro-benchmarks of the hot functions on a synthetic resume corpus.
+
+Covers PDF text extraction by document size, extract_json and the streaming
+JSON parser, local pre-scoring and prompt compaction, the Admin top-skills
+query, and analysis inserts through the background writer.
+
+    python benchmarks/bench_micro.py --repeat 20 --json micro.json
+    python benchmarks/bench_micro.py --compare micro.json
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from common import add_report_arguments, report, summarize, time_calls
+from corpus import generate_corpus
+from mock_llm import SAMPLE_ANALYSIS
+
+from analyzer.analysis import extract_json
+from analyzer.compaction import compact_resume
+from analyzer.pdf import extract_pdf_text
+from analyzer.prescore import prescore_resume
+from analyzer.storage import Database
+from analyzer.streaming import IncrementalJSONParser
+
+
+def bench_pdf(corpus, repeat):
+    rows = []
+    for label in dict.fromkeys(label for _, label, _ in corpus):
+        data = next(pdf for _, size, pdf in corpus if size == label)
+        durations = time_calls(lambda: extract_pdf_text(data), repeat)
+        rows.append(summarize("extract_pdf_text", label, durations, bytes=len(data)))
+    return rows
+
+
+def bench_parsing(repeat):
+    rows = []
+    response = "<think>" + "Considering the candidate. " * 200 + "</think>\n" + json.dumps(SAMPLE_ANALYSIS)
+    rows.append(summarize("extract_json", "full_response", time_calls(lambda: extract_json(response), repeat * 10)))
+
+    def stream_parse():
+        parser = IncrementalJSONParser()
+        for i in range(0, len(response), 64):
+            parser.feed(response[i:i + 64])
+        return parser.result
+
+    rows.append(summarize("stream_parse", "64_char_chunks", time_calls(stream_parse, repeat * 10)))
+    return rows
+
+
+def bench_text(corpus, repeat):
+    rows = []
+    for label in ("short", "huge"):
+        data = next(pdf for _, size, pdf in corpus if size == label)
+        text = extract_pdf_text(data)
+        rows.append(summarize("prescore_resume", label, time_calls(lambda: prescore_resume(text), repeat * 5)))
+        rows.append(summarize("compact_resume", label, time_calls(lambda: compact_resume(text), repeat * 5)))
+    return rows
+
+
+def bench_database(repeat, rows_in_db):
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        try:
+            # Single inserts, each waiting for its id like a user session
+            durations = time_calls(lambda: db.insert_analysis(SAMPLE_ANALYSIS).result(), repeat * 10)
+            rows.append(summarize("db_insert", "sequential", durations))
+
+            # Many sessions saving at once: latency is submit-to-commit within the burst
+            latencies = []
+            started = time.perf_counter()
+            for _ in range(rows_in_db):
+                submitted = time.perf_counter()
+                db.insert_analysis(SAMPLE_ANALYSIS).add_done_callback(
+                    lambda future, submitted=submitted: latencies.append(time.perf_counter() - submitted))
+            db.write("SELECT 1").result()
+            elapsed = time.perf_counter() - started
+            rows.append(summarize("db_insert", "group_commit", latencies, elapsed))
+
+            # get_top_skills: materialized counts plus the rows the skills chart plots
+            def top_skills():
+                return [{"Skill": skill, "Resumes": count} for skill, count in db.top_skills("current", 5)]
+
+            rows.append(summarize("get_top_skills", f"{rows_in_db}_rows", time_calls(top_skills, repeat * 5)))
+        finally:
+            db.writer.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="timed calls per case (parsing cases run more)")
+    parser.add_argument("--rows", type=int, default=5000, help="analyses inserted before the query benchmarks")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(count=4)
+    rows = bench_pdf(corpus, args.repeat) + bench_parsing(args.repeat) + bench_text(corpus, args.repeat)
+    rows += bench_database(args.repeat, args.rows)
+    return report(rows, args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
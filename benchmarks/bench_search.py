@@ -0,0 +1,88 @@
+"""
+Candidate search latency over a synthetic index of stored analyses.
+
+Builds a search index of --records synthetic analyses (skills, ATS keywords
+and a short summary each), then times skill/score filters, free-text and
+"like this one" similarity queries, reopening the index from disk, and the
+incremental indexing of a single new analysis.
+
+    python benchmarks/bench_search.py --records 300000 --json search.json
+    python benchmarks/bench_search.py --records 300000 --compare search.json
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from common import add_report_arguments, report, summarize, time_calls
+
+from analyzer.search import SearchIndex
+
+SKILLS = ["Python", "SQL", "Spark", "Java", "Docker", "Kubernetes", "React", "AWS", "Airflow", "Pandas",
+          "Go", "Rust", "Excel", "Tableau", "Terraform", "Kafka", "TypeScript", "Node.js", "C++", "Scala"]
+KEYWORDS = ["ETL", "Data Pipelines", "REST APIs", "Microservices", "CI/CD", "Machine Learning", "Dashboards"]
+ROLES = ["data engineer", "backend developer", "frontend developer", "data scientist", "devops engineer",
+         "analytics engineer", "machine learning engineer", "full stack developer"]
+VERBS = ["building", "maintaining", "scaling", "designing", "automating", "migrating"]
+THINGS = ["batch pipelines", "streaming platforms", "web interfaces", "REST services", "data warehouses",
+          "deployment tooling", "reporting dashboards", "recommendation models"]
+
+
+def synthetic_rows(first_id, count, rng):
+    """
+    Returns (id, resume_score, skills, ats_keywords, summary) rows as sync() reads them from user_data.
+    """
+    rows = []
+    for analysis_id in range(first_id, first_id + count):
+        skills = rng.sample(SKILLS, rng.randint(4, 10))
+        summary = (f"{rng.choice(ROLES).capitalize()} with {rng.randint(1, 15)} years {rng.choice(VERBS)} "
+                   f"{rng.choice(THINGS)} and {rng.choice(THINGS)} using {', '.join(skills[:3])}.")
+        rows.append((analysis_id, rng.randint(30, 98), ", ".join(skills),
+                     ", ".join(rng.sample(KEYWORDS, 3)), summary))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=100000, help="analyses in the index")
+    parser.add_argument("--repeat", type=int, default=50, help="timed calls per query")
+    parser.add_argument("-k", type=int, default=10, help="results per query")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SearchIndex(tmp)
+        started = time.perf_counter()
+        for first_id in range(1, args.records + 1, 5000):
+            index.add(synthetic_rows(first_id, min(5000, args.records + 1 - first_id), rng))
+        build = time.perf_counter() - started
+        rows.append(summarize("index", "build", [build], records_per_s=round(args.records / build)))
+        rows.append(summarize("index", "open", time_calls(lambda: SearchIndex(tmp), 3)))
+
+        like = args.records // 2
+        queries = {
+            "skills": dict(terms=["Python", "Spark"]),
+            "skills_min_score": dict(terms=["Python", "Spark"], min_score=75),
+            "text": dict(text="data engineer building streaming platforms with Kafka"),
+            "text_skills": dict(text="data engineer building streaming platforms", terms=["Kafka"]),
+            "like": dict(like=like),
+            "like_min_score": dict(like=like, min_score=90),
+        }
+        for case, query in queries.items():
+            rows.append(summarize("search", case,
+                                  time_calls(lambda query=query: index.search(k=args.k, **query), args.repeat)))
+
+        next_id = [args.records + 1]
+
+        def add_one():
+            index.add(synthetic_rows(next_id[0], 1, rng))
+            next_id[0] += 1
+
+        rows.append(summarize("index", "add_one", time_calls(add_one, args.repeat)))
+    return report(rows, args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+"""
+Cold-start and rerun latency of the Streamlit app.
+
+Every cold start runs in a fresh interpreter (with Streamlit itself already
+imported, as in a running server): the first User-mode script run, which
+includes importing everything the app needs, then the first Admin render
+and repeated reruns of both modes. Import times of the heavy third-party
+modules are measured separately, each in its own interpreter.
+
+    python benchmarks/bench_startup.py --repeat 5 --json startup.json
+    python benchmarks/bench_startup.py --compare startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import add_report_arguments, report, summarize
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+HEAVY_MODULES = ("pandas", "pdfminer.high_level", "PIL.Image")
+SECRETS = {"API_KEY": "bench", "user_name": "admin", "pass": "admin"}
+
+
+def child(reruns):
+    """
+    Runs in a fresh interpreter: measures the app's first runs and reruns and
+    prints them as JSON.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    def timed_run(at):
+        started = time.perf_counter()
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        return time.perf_counter() - started
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    for key, value in SECRETS.items():
+        at.secrets[key] = value
+    results = {"user_first_run": timed_run(at)}
+    results["user_rerun"] = [timed_run(at) for _ in range(reruns)]
+    at.session_state["admin_logged_in"] = True
+    at.selectbox[-1].select("Admin")
+    results["admin_first_run"] = timed_run(at)
+    results["admin_rerun"] = [timed_run(at) for _ in range(reruns)]
+    print(json.dumps(results))
+
+
+def import_seconds(module):
+    code = f"import time; started = time.perf_counter(); import {module}; print(time.perf_counter() - started)"
+    return float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="cold starts (fresh interpreters) to measure")
+    parser.add_argument("--reruns", type=int, default=10, help="reruns per mode measured after each cold start")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.reruns)
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app keeps resume_data.db and its cache next to the working directory
+        for _ in range(args.repeat):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", "--reruns", str(args.reruns)],
+                cwd=tmp, capture_output=True, text=True, check=True,
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    rows = [
+        summarize("startup", "user_first_run", [run["user_first_run"] for run in runs]),
+        summarize("startup", "admin_first_run", [run["admin_first_run"] for run in runs]),
+        summarize("rerun", "user", [value for run in runs for value in run["user_rerun"]]),
+        summarize("rerun", "admin", [value for run in runs for value in run["admin_rerun"]]),
+    ]
+    for module in HEAVY_MODULES:
+        rows.append(summarize("import", module, [import_seconds(module) for _ in range(args.repeat)]))
+    return report(rows, args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,101 @@
+"""
+Benchmark of user_data inserts/sec with N concurrent simulated sessions.
+
+Compares the original pattern (a connection per session, default rollback
+journal, commit after every INSERT) with the WAL database and its
+group-committing background writer.
+
+    python benchmarks/bench_storage.py --sessions 16 --inserts 200
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer.storage import INSERT_ANALYSIS_SQL, USER_DATA_SCHEMA, Database, analysis_record
+
+SAMPLE_RESULT = {
+    "basic_info": {"name": "Jane Doe", "email": "jane@example.com"},
+    "resume_score": "78/100",
+    "skills": {
+        "current_skills": ["Python", "SQL", "Pandas", "Docker", "Git"],
+        "recommended_skills": ["Spark", "Airflow", "Kubernetes", "dbt", "Terraform"],
+    },
+    "course_recommendations": [{"course_name": "Data Engineering on GCP"}],
+}
+
+
+def run_sessions(sessions, inserts, session_func):
+    errors = []
+    barrier = threading.Barrier(sessions + 1)
+
+    def worker():
+        barrier.wait()
+        try:
+            session_func(inserts)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(sessions)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, errors
+
+
+def bench_baseline(path, sessions, inserts):
+    conn = sqlite3.connect(path)
+    conn.execute(USER_DATA_SCHEMA)
+    conn.commit()
+    conn.close()
+    record = analysis_record(SAMPLE_RESULT) + ("",)
+
+    def session(count):
+        conn = sqlite3.connect(path, timeout=30)
+        for _ in range(count):
+            conn.execute(INSERT_ANALYSIS_SQL, record)
+            conn.commit()
+        conn.close()
+
+    return run_sessions(sessions, inserts, session)
+
+
+def bench_writer(path, sessions, inserts):
+    db = Database(path)
+
+    def session(count):
+        # Like a Streamlit session: each save waits for its record id
+        for _ in range(count):
+            db.insert_analysis(SAMPLE_RESULT).result()
+
+    try:
+        return run_sessions(sessions, inserts, session)
+    finally:
+        db.writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=16, help="concurrent simulated sessions")
+    parser.add_argument("--inserts", type=int, default=200, help="inserts per session")
+    args = parser.parse_args()
+
+    total = args.sessions * args.inserts
+    print(f"{args.sessions} sessions x {args.inserts} inserts = {total} rows")
+    for label, bench in (("baseline (commit per insert)", bench_baseline),
+                         ("WAL + group-commit writer", bench_writer)):
+        with tempfile.TemporaryDirectory() as tmp:
+            elapsed, errors = bench(os.path.join(tmp, "bench.db"), args.sessions, args.inserts)
+        print(f"{label:32s} {total / elapsed:10.0f} inserts/s  ({elapsed:.2f}s, {len(errors)} errors)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Shared timing, reporting and baseline comparison for the benchmark scripts.
+
+Every benchmark reports rows in one format (benchmark, case, n, mean/p50/
+p95/p99 in ms, throughput/s) so results can be saved with --json and later
+runs checked against them with --compare.
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+COLUMNS = ("benchmark", "case", "n", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "throughput_per_s")
+
+
+def percentile(sorted_values, q):
+    """
+    Linear-interpolated percentile (q in 0..100) of an already sorted list.
+    """
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(benchmark, case, durations, elapsed=None, **extra):
+    """
+    Builds a result row from per-operation durations in seconds. elapsed is
+    the wall time of the whole run (defaults to the sum of durations).
+    """
+    values = sorted(durations)
+    elapsed = elapsed if elapsed is not None else sum(values)
+    row = {
+        "benchmark": benchmark,
+        "case": case,
+        "n": len(values),
+        "mean_ms": 1000 * sum(values) / len(values) if values else None,
+        "p50_ms": 1000 * percentile(values, 50) if values else None,
+        "p95_ms": 1000 * percentile(values, 95) if values else None,
+        "p99_ms": 1000 * percentile(values, 99) if values else None,
+        "throughput_per_s": len(values) / elapsed if elapsed else None,
+    }
+    row.update(extra)
+    return row
+
+
+def time_calls(func, repeat, warmup=1):
+    """
+    Calls func() warmup + repeat times and returns the durations of the timed calls.
+    """
+    for _ in range(warmup):
+        func()
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def format_value(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+def print_report(rows):
+    extra = [key for row in rows for key in row if key not in COLUMNS]
+    columns = list(COLUMNS) + list(dict.fromkeys(extra))
+    table = [columns] + [[format_value(row.get(column)) for column in columns] for row in rows]
+    widths = [max(len(line[i]) for line in table) for i in range(len(columns))]
+    for line in table:
+        print("  ".join(cell.ljust(width) if i < 2 else cell.rjust(width)
+                        for i, (cell, width) in enumerate(zip(line, widths))))
+
+
+def compare(rows, baseline_rows, tolerance):
+    """
+    Returns a message for every case whose p95 grew or throughput fell by more
+    than tolerance (a fraction) relative to the baseline.
+    """
+    baseline = {(row["benchmark"], row["case"]): row for row in baseline_rows}
+    regressions = []
+    for row in rows:
+        before = baseline.get((row["benchmark"], row["case"]))
+        if before is None:
+            continue
+        if before.get("p95_ms") and row.get("p95_ms") and row["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{row['benchmark']}/{row['case']}: p95 {before['p95_ms']:.2f} -> {row['p95_ms']:.2f} ms")
+        if (before.get("throughput_per_s") and row.get("throughput_per_s")
+                and row["throughput_per_s"] < before["throughput_per_s"] * (1 - tolerance)):
+            regressions.append(f"{row['benchmark']}/{row['case']}: throughput "
+                               f"{before['throughput_per_s']:.2f} -> {row['throughput_per_s']:.2f}/s")
+    return regressions
+
+
+def add_report_arguments(parser):
+    parser.add_argument("--json", metavar="PATH", help="also write the results to a JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed relative slowdown before a case counts as a regression")
+
+
+def report(rows, args):
+    """
+    Prints the results, writes --json and checks --compare. Returns the exit code.
+    """
+    print_report(rows)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(rows, json.load(f), args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}.")
+    return 0
@@ -0,0 +1,130 @@
+"""
+Synthetic resume PDF corpus for the benchmarks.
+
+Resumes are generated deterministically from a seed in a few sizes (1 to 10
+pages) with a minimal built-in PDF writer, so runs on different machines
+parse exactly the same documents.
+
+    python benchmarks/corpus.py --out bench_corpus --count 40
+"""
+import argparse
+import os
+import random
+
+SIZES = {"short": 1, "medium": 2, "long": 5, "huge": 10}
+
+FIRST_NAMES = ("Alex", "Priya", "Wei", "Maria", "Samuel", "Aisha", "Lukas", "Sofia", "Kenji", "Amara")
+LAST_NAMES = ("Morgan", "Sharma", "Chen", "Garcia", "Okafor", "Khan", "Becker", "Rossi", "Tanaka", "Mensah")
+SKILLS = ("Python", "SQL", "Java", "JavaScript", "React", "Docker", "Kubernetes", "AWS", "Pandas", "TensorFlow",
+          "PyTorch", "Spark", "Airflow", "Git", "Linux", "Tableau", "Excel", "Machine Learning", "NLP", "Agile")
+VERBS = ("Built", "Designed", "Led", "Optimized", "Automated", "Deployed", "Analyzed", "Reduced", "Improved")
+OBJECTS = ("a data pipeline", "the reporting dashboard", "a recommendation model", "REST APIs",
+           "the CI/CD workflow", "an ETL process", "customer churn analysis", "the search service")
+
+LINES_PER_PAGE = 58
+
+
+def resume_lines(rng, pages):
+    """
+    Returns the text lines of one synthetic resume filling about `pages` pages.
+    """
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [
+        name,
+        f"{name.lower().replace(' ', '.')}@example.com | +1 555 {rng.randint(1000, 9999)}",
+        "",
+        "Summary",
+        f"Engineer with {rng.randint(1, 12)} years of experience in {', '.join(rng.sample(SKILLS, 3))}.",
+        "",
+        "Skills",
+        ", ".join(rng.sample(SKILLS, 8)),
+        "",
+        "Education",
+        f"B.Sc. Computer Science, State University, {rng.randint(2005, 2022)}",
+        "",
+        "Experience",
+    ]
+    job = 0
+    while len(lines) < pages * LINES_PER_PAGE - 8:
+        job += 1
+        lines.append(f"Software Engineer, Company {job} ({rng.randint(2010, 2024)})")
+        for _ in range(rng.randint(3, 6)):
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(SKILLS)}, "
+                         f"improving throughput by {rng.randint(5, 60)}%")
+        lines.append("")
+    lines += ["Projects", f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} (open source)", "",
+              "Certifications", "- AWS Certified Cloud Practitioner"]
+    return lines
+
+
+def escape_pdf_text(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(lines):
+    """
+    Lays out text lines on Letter pages in Helvetica and returns the PDF bytes.
+    """
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(None)
+    pages_obj = add(None)
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    page_ids = []
+    for page_lines in pages:
+        text = "".join(f"({escape_pdf_text(line)}) '\n" for line in page_lines)
+        stream = f"BT /F1 10 Tf 12 TL 50 760 Td\n{text}ET".encode("latin-1", "replace")
+        content = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (pages_obj, content, font)
+        ))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_obj
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[pages_obj - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    return bytes(out)
+
+
+def generate_corpus(count=40, seed=7, sizes=SIZES):
+    """
+    Returns [(name, size_label, pdf_bytes)], cycling through the sizes.
+    """
+    rng = random.Random(seed)
+    labels = list(sizes)
+    corpus = []
+    for i in range(count):
+        label = labels[i % len(labels)]
+        corpus.append((f"resume_{i:03d}_{label}.pdf", label, build_pdf(resume_lines(rng, sizes[label]))))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", default="bench_corpus", help="directory to write the PDFs to")
+    parser.add_argument("--count", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+    for name, _, data in generate_corpus(args.count, args.seed):
+        with open(os.path.join(args.out, name), "wb") as f:
+            f.write(data)
+    print(f"Wrote {args.count} resumes to {args.out}/")
+
+
+if __name__ == "__main__":
+    main()
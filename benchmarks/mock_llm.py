@@ -0,0 +1,183 @@
+"""
+Local stand-in for the OpenRouter chat-completions endpoint.
+
+Answers every request with a valid resume analysis (streamed as SSE when the
+request asks for it) after a configurable latency, and can inject 429/5xx
+errors so retries, the circuit breaker and error handling can be exercised
+without paying for real requests.
+
+    python benchmarks/mock_llm.py --port 8765 --latency 1.5 --jitter 0.5 --error-rate 0.05
+    OPENROUTER_API_URL=http://127.0.0.1:8765/ streamlit run streamlit_app.py
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SAMPLE_ANALYSIS = {
+    "basic_info": {"name": "Jane Doe", "email": "jane@example.com", "mobile": "+1 555 0100",
+                   "address": "Springfield"},
+    "skills": {
+        "current_skills": ["Python", "SQL", "Pandas", "Docker", "Git"],
+        "recommended_skills": ["Spark", "Airflow", "Kubernetes", "dbt", "Terraform"],
+    },
+    "recommended_skills": ["Spark", "Airflow", "Kubernetes", "dbt", "Terraform"],
+    "course_recommendations": [
+        {"platform": "Coursera", "course_name": f"Data Engineering {i}", "link": f"https://example.com/course/{i}"}
+        for i in range(5)
+    ],
+    "appreciation": [f"Strong point {i}" for i in range(5)],
+    "resume_tips": [f"Improvement tip {i}" for i in range(5)],
+    "resume_score": "78/100",
+    "ai_resume_summary": "Data engineer with five years of Python and SQL experience building batch pipelines.",
+    "matching_job_roles": ["Data Engineer", "Analytics Engineer", "Junior Data Scientist"],
+    "ats_keywords": ["Python", "SQL", "ETL", "Docker", "Data Pipelines"],
+    "project_suggestions": {
+        "improvement_tips": ["Add metrics to the ETL project", "Document the architecture"],
+        "new_project_recommendations": ["Streaming pipeline with Kafka", "dbt analytics project"],
+    },
+}
+
+
+class MockSettings:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_statuses=(429, 500, 503),
+                 chunk_size=64, think=True, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.chunk_size = chunk_size
+        # Prefix the answer with a <think> block like the reasoning model does
+        self.think = think
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def draw(self):
+        """
+        Returns (delay_seconds, error_status_or_None) for one request.
+        """
+        with self.lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            status = None
+            if self.error_rate and self.random.random() < self.error_rate:
+                status = self.random.choice(self.error_statuses)
+                self.errors += 1
+            return delay, status
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    settings = MockSettings()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        delay, status = self.settings.draw()
+        if status is not None:
+            time.sleep(delay / 4)
+            payload = json.dumps({"error": {"message": f"Injected error {status}", "code": status}}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            if status == 429:
+                self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        text = json.dumps(SAMPLE_ANALYSIS)
+        if self.settings.think:
+            text = "<think>Reviewing the resume sections.</think>\n" + text
+        if not body.get("stream"):
+            time.sleep(delay)
+            payload = json.dumps({"choices": [{"message": {"role": "assistant", "content": text}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        # Time to first token is a third of the latency; the rest is spread over the chunks
+        chunks = [text[i:i + self.settings.chunk_size] for i in range(0, len(text), self.settings.chunk_size)]
+        time.sleep(delay / 3)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.write_chunk(b": OPENROUTER PROCESSING\n\n")
+        per_chunk = (delay * 2 / 3) / len(chunks)
+        for chunk in chunks:
+            event = {"choices": [{"delta": {"content": chunk}}]}
+            self.write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+            if per_chunk:
+                time.sleep(per_chunk)
+        self.write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def write_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping idle keep-alive connections is normal, not worth a traceback
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_mock_server(host="127.0.0.1", port=0, **settings):
+    """
+    Starts the mock server on a background thread and returns (url, server).
+    Keyword arguments configure MockSettings (latency, jitter, error_rate, ...).
+    """
+    handler = type("ConfiguredMockHandler", (MockHandler,), {"settings": MockSettings(**settings)})
+    server = MockServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="mock-llm", daemon=True).start()
+    return f"http://{host}:{server.server_port}/", server
+
+
+def add_mock_arguments(parser):
+    parser.add_argument("--latency", type=float, default=1.0, help="mean seconds per mock LLM response")
+    parser.add_argument("--jitter", type=float, default=0.2, help="uniform +/- seconds added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with an error")
+    parser.add_argument("--error-statuses", default="429,500,503", help="comma-separated injected status codes")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for latency and errors")
+
+
+def mock_settings(args):
+    return {
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "error_rate": args.error_rate,
+        "error_statuses": [int(code) for code in args.error_statuses.split(",") if code],
+        "seed": args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    url, server = start_mock_server(args.host, args.port, **mock_settings(args))
+    print(f"Mock LLM listening on {url} (set OPENROUTER_API_URL to this URL)", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
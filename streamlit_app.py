@@ -1,179 +1,344 @@
 import streamlit as st
-from PIL import Image
-import requests
 import json
-import sqlite3
-import pandas as pd
-import matplotlib.pyplot as plt
-from pdfminer.high_level import extract_text
-import re
 import os
-import base64
+import uuid
+from analyzer import metrics
+from analyzer.admission import get_admission
+from analyzer.analysis import (ANALYSIS_MODES, DEFAULT_ANALYSIS_MODE, analysis_flights, model_router,
+                               parse_resume_score, validate_resume)
+from analyzer.archive import ARCHIVE_AFTER_DAYS, PURGE_AFTER_DAYS, apply_retention, load_analysis, payload_stats
+from analyzer.batch import (DEFAULT_CONCURRENCY, ArchiveLimitError, count_uploaded_resumes, iter_uploaded_resumes,
+                            run_batch)
+from analyzer.export import EXPORT_FORMATS, spool_export
+from analyzer.metrics import ADMIN_RENDER_SECONDS
+from analyzer.pdf import PdfExtractionError, extract_pdf_text, file_digest
+from analyzer.service import get_service
+from analyzer.storage import DB_PATH, get_database
 
 # ===========================
-# Helper Functions
+# Database Setup
 # ===========================
+# Heavy modules (pandas, pdfminer) are imported where they are
+# first needed, and process-wide resources are created once per server
+# process with st.cache_resource instead of on every rerun.
+@st.cache_resource
+def load_database():
+    """
+    Opens the database shared across sessions: pooled read connections and a
+    group-committing writer.
+    """
+    return get_database(DB_PATH)
+
+db = load_database()
 
-def extract_json(response_text):
+@st.cache_resource
+def start_metrics_endpoint(port):
     """
-    Extracts JSON from a string using regex.
+    Prometheus scrape endpoint (http://METRICS_HOST:METRICS_PORT/metrics).
     """
-    json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-    if json_match:
-        json_text = json_match.group(0)
-        try:
-            return json.loads(json_text)
-        except json.JSONDecodeError:
-            st.error("Error: The extracted JSON is not valid.")
-            return {}
-    else:
-        st.error("Error: No valid JSON found in the response.")
-        return {}
+    return metrics.start_metrics_server(port)
 
-def validate_resume(text):
+if os.environ.get("METRICS_PORT"):
+    start_metrics_endpoint(int(os.environ["METRICS_PORT"]))
+
+# ===========================
+# Helper Functions
+# ===========================
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def admin_chart_data(version):
     """
-    Checks if the extracted text contains common resume keywords.
+    Reads the pre-aggregated dashboard statistics and top skills once per data
+    version stamp, so reruns over an unchanged dataset reuse the same chart data.
     """
-    keywords = ["education", "experience", "skills", "projects", "certifications"]
-    return any(keyword in text.lower() for keyword in keywords)
+    return {
+        "stats": db.stats(),
+        "current": db.top_skills("current"),
+        "recommended": db.top_skills("recommended"),
+    }
 
-def get_top_skills(skill_series, top_n=5):
+def skills_chart_spec(rows, title):
     """
-    Groups and counts skills from a Series, filtering out empty values and
-    grouping extras under 'Others'.
+    Vega-Lite donut of [(skill, count), ...], drawn in the browser; the
+    tooltip carries each skill's share of the total.
     """
-    # Clean the series: remove NaNs and empty strings
-    cleaned = [str(skill) for skill in skill_series if pd.notna(skill) and str(skill).strip()]
-    if not cleaned:
-        return pd.Series(dtype=int)
-    # Join the cleaned strings and split by comma
-    skills_list = ", ".join(cleaned).split(", ")
-    counts = pd.Series(skills_list).value_counts()
-    if len(counts) > top_n:
-        top_skills = counts.head(top_n)
-        top_skills["Others"] = counts.iloc[top_n:].sum()
-        return top_skills
-    return counts
+    return {
+        "title": title,
+        "data": {"values": [{"Skill": skill, "Resumes": count} for skill, count in rows]},
+        "transform": [
+            {"joinaggregate": [{"op": "sum", "field": "Resumes", "as": "Total"}]},
+            {"calculate": "datum.Resumes / datum.Total", "as": "Share"},
+        ],
+        "mark": {"type": "arc", "innerRadius": 60, "stroke": "white"},
+        "encoding": {
+            "theta": {"field": "Resumes", "type": "quantitative"},
+            "color": {"field": "Skill", "type": "nominal", "sort": None, "legend": {"orient": "bottom"}},
+            "order": {"field": "Resumes", "type": "quantitative", "sort": "descending"},
+            "tooltip": [
+                {"field": "Skill", "type": "nominal"},
+                {"field": "Resumes", "type": "quantitative"},
+                {"field": "Share", "type": "quantitative", "format": ".1%"},
+            ],
+        },
+    }
 
-# ===========================
-# Database Setup
-# ===========================
-# Connect to (or create) the SQLite database
-conn = sqlite3.connect('resume_data.db')
-cursor = conn.cursor()
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS user_data (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        email TEXT,
-        resume_score INTEGER,
-        skills TEXT,
-        recommended_skills TEXT,
-        courses TEXT,
-        timestamp TEXT,
-        feedback TEXT
-    )
-''')
-conn.commit()
+
+# Admin data grid: display column names and sort options -> (column, descending)
+GRID_COLUMNS = ['ID', 'Name', 'Email', 'Resume_Score', 'Skills', 'Recommended_Skills', 'Courses', 'Timestamp', 'Feedback',
+                'Model', 'Latency_ms']
+GRID_SORTS = {
+    "Newest first": ("id", True),
+    "Oldest first": ("id", False),
+    "Highest score": ("resume_score", True),
+    "Lowest score": ("resume_score", False),
+}
 
 
 # ===========================
 # API Configuration & Resume Analysis
 # ===========================
-API_URL = "https://openrouter.ai/api/v1/chat/completions"
 API_KEY = st.secrets["API_KEY"]
 
-def get_resume_analysis(resume_text):
+@st.cache_resource
+def load_analysis_services():
     """
-    Sends resume text to the API and returns the analysis result.
+    Creates the persistent analysis cache (next to resume_data.db), the
+    background job queue and the payload archive, shared with the HTTP API
+    (analyzer/service.py), so reruns and reconnects never lose an analysis.
     """
-    prompt = f"""
-You are an expert resume analyzer. You must produce valid JSON output and ensure all URLs are valid and relevant to the recommended courses. Additionally, you must tailor job roles to the candidate’s experience level. For example, if the resume indicates an entry-level or student background, include junior- or intern-level job roles (e.g., 'Data Science Intern', 'Junior Data Scientist', 'Machine Learning Intern') rather than exclusively senior positions.
-
-Evaluation Criteria for Resume Score:
-- Formatting and structure (clear sections, bullet points)
-- ATS Optimization (use of industry-relevant keywords)
-- Content Quality (clarity, conciseness, grammar)
-- Relevance (matching skills and experience)
-- Readability and presentation
-
-Return the JSON structure as follows:
-{{
-    "basic_info": {{
-        "name": string,
-        "email": string,
-        "mobile": string,
-        "address": string
-    }},
-    "skills": {{
-        "current_skills": list of at least 5 key skills,
-        "recommended_skills": list of at least 5 skills for improvement
-    }},
-    "course_recommendations": list of at least 5 courses with details as:
-    {{
-        "platform": string,
-        "course_name": string,
-        "link": valid URL (ensure this is an active, relevant course URL)
-    }},
-    "appreciation": list of at least 5 personalized positive comments,
-    "resume_tips": list of at least 5 suggestions for improvement,
-    "resume_score": string (score in "XX/100" format),
-    "ai_resume_summary": string (a concise summary for ATS optimization),
-    "matching_job_roles": list of 2-3 job roles specifically relevant to the candidate’s experience level,
-    "ats_keywords": list of at least 5 industry-relevant keywords,
-    "project_suggestions": {{
-        "improvement_tips": list of 2-3 tips to enhance existing projects,
-        "new_project_recommendations": list of 2-3 suggested projects
-    }}
-}}
-
-Ensure the JSON is valid before outputting.
-
-Here is the resume text:
-\"\"\"{resume_text}\"\"\"
-"""
-
-
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "model": "deepseek/deepseek-r1-distill-llama-70b:free",
-        "messages": [{"role": "user", "content": prompt}]
-    }
-    response = requests.post(API_URL, headers=headers, json=payload)
-    if response.status_code == 200:
-        try:
-            raw_response = response.json()["choices"][0]["message"]["content"]
-            data = extract_json(raw_response)
-            if not data:
-                st.warning("No valid JSON found in API response. Please try again.")
-                return {"error": "No valid JSON found in API response."}
-            return data
-        except Exception as e:
-            st.error(f"Error during JSON extraction: {e}")
-            st.warning("Something went wrong. Try again, it might work now.")
-            return {"error": "Invalid JSON response from API."}
-    else:
-        st.error(f"API Error {response.status_code}: {response.text}")
-        st.warning("There was an issue with the API response. Try again, it might work this time.")
-        return {"error": f"API Error {response.status_code}: {response.text}"}
+    return get_service(DB_PATH, API_KEY)
+
+analysis_service = load_analysis_services()
+analysis_cache, job_queue, archive = analysis_service.cache, analysis_service.jobs, analysis_service.archive
+
+@st.cache_resource
+def load_search_index():
+    """
+    Opens the candidate search index kept next to resume_data.db. Imported on
+    first use, so User mode never loads it.
+    """
+    from analyzer.search import SearchIndex
+    return SearchIndex.next_to(DB_PATH)
+
+def get_resume_analysis(resume_text, mode=DEFAULT_ANALYSIS_MODE):
+    """
+    Enqueues an analysis of the resume text and returns its job id immediately.
+    mode selects "full", "hybrid" (local scoring + LLM text), "fast" (local only)
+    or "sections" (parallel per-section prompts, cached section by section).
+    A resume already being analyzed returns the in-flight job instead.
+    Each browser session is its own client in the fair upstream queue.
+    """
+    return job_queue.submit(resume_text, mode, client=session_client_id())
+
+def session_client_id():
+    """
+    Identifies this browser session to the upstream admission queue (analyzer/admission.py).
+    """
+    if "client_id" not in st.session_state:
+        st.session_state.client_id = f"session:{uuid.uuid4().hex}"
+    return st.session_state.client_id
 
 # ===========================
 # PDF Text Extraction
 # ===========================
+@st.cache_data(max_entries=64, show_spinner=False)
+def extract_text_cached(file_hash, _buffer):
+    """
+    Extracts text once per file hash; Streamlit reruns reuse the cached text.
+    """
+    return extract_pdf_text(_buffer)
+
 def extract_text_from_pdf(uploaded_file):
     """
-    Saves an uploaded PDF to disk temporarily and extracts text from it.
+    Extracts text from an uploaded PDF directly from its in-memory buffer.
     """
     if uploaded_file is not None:
-        with open("temp_resume.pdf", "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        return extract_text("temp_resume.pdf")
+        buffer = uploaded_file.getbuffer()
+        return extract_text_cached(file_digest(buffer), buffer)
     else:
         return ""
 
+# ===========================
+# Dashboard Sections
+# ===========================
+def section_header(title):
+    """
+    Renders the teal section heading used throughout the dashboard.
+    """
+    st.markdown(f"""
+    <div style="background-color:#15967D; padding:10px; border-radius:5px; display:inline-block; margin-bottom:10px;">
+        <h3 style="color:white; margin:0;">{title}</h3>
+    </div>
+    """, unsafe_allow_html=True)
+
+def section_caption(text):
+    st.markdown(f"<p style='font-size:16px; font-style:italic; color:#555555;'>{text}</p>", unsafe_allow_html=True)
+
+def render_basic_info(basic_info):
+    # Use "Null" as placeholder if missing
+    name = basic_info.get("name", "Null")
+    if name != "Null":
+        st.markdown(f"<h2 style='color:#15967D;'>Hello, {name}!</h2>", unsafe_allow_html=True)
+    section_header("Basic Info")
+    st.markdown(f"""
+    <div style="background-color:#F5F5F5; padding:15px; border-radius:5px; margin-bottom:20px;">
+        <strong>Name:</strong> {name}<br>
+        <strong>Email:</strong> {basic_info.get("email", "Null")}<br>
+        <strong>Mobile:</strong> {basic_info.get("mobile", "Null")}<br>
+        <strong>Address:</strong> {basic_info.get("address", "Null")}
+    </div>
+    """, unsafe_allow_html=True)
+
+def render_summary(summary):
+    section_header("AI Resume Summary")
+    section_caption("A concise summary of your experience, skills, and expertise, tailored for ATS optimization. This summary provides a quick overview for hiring managers.")
+    st.markdown(f"""
+    <div style="background-color:#F5F5F5; padding:15px; border-left: 4px solid #15967D; border-radius:3px; margin-bottom:20px;">
+        {summary}
+    </div>
+    """, unsafe_allow_html=True)
+
+def render_resume_score(resume_score_raw):
+    section_header("Resume Score")
+    st.metric(label="Score", value=f"{parse_resume_score(resume_score_raw)}/100")
+    st.markdown("<p style='font-size:14px; color:#555555;'><em>Note: The score is derived from structure, keyword usage, clarity, and overall presentation.</em></p>", unsafe_allow_html=True)
+
+def render_skills(skills):
+    # Side-by-side layout for current and recommended skills
+    section_header("Skills")
+    col_skills1, col_skills2 = st.columns(2)
+    with col_skills1:
+        st.markdown("<div style='background-color:#EFEFEF; padding:10px; border-radius:5px;'><h4 style='color:#15967D;'>Current Skills</h4></div>", unsafe_allow_html=True)
+        for skill in skills.get("current_skills", []):
+            st.markdown(f"- {skill}")
+    with col_skills2:
+        st.markdown("<div style='background-color:#EFEFEF; padding:10px; border-radius:5px;'><h4 style='color:#15967D;'>Recommended Skills</h4></div>", unsafe_allow_html=True)
+        for skill in skills.get("recommended_skills", []):
+            st.markdown(f"- {skill}")
+
+def render_courses(courses):
+    section_header("Recommended Courses")
+    section_caption("Courses suggested to help you enhance your skillset:")
+    for course in courses:
+        if isinstance(course, dict):
+            platform = course.get("platform", "Unknown Platform")
+            course_name = course.get("course_name", "Unknown Course")
+            link = course.get("link", "#")
+            st.markdown(f"- <span style='color:#15967D; font-weight:bold;'>{platform}</span>: [{course_name}]({link})", unsafe_allow_html=True)
+        else:
+            st.markdown(f"- {course}")
+
+def render_appreciation(comments):
+    section_header("Appreciation")
+    section_caption("Positive comments acknowledging your strengths")
+    for comment in comments:
+        st.markdown(f"- {comment}")
+
+def render_resume_tips(tips):
+    section_header("Resume Tips")
+    section_caption("Constructive suggestions for improving your resume:")
+    for tip in tips:
+        st.markdown(f"- {tip}")
+
+def render_job_roles(roles):
+    section_header("Matching Job Roles")
+    section_caption("Job roles that match your skills and experience:")
+    for role in roles:
+        st.markdown(f"- {role}")
+
+def render_ats_keywords(ats_keywords):
+    section_header("ATS Keywords")
+    section_caption("Industry-relevant keywords for better ATS performance:")
+    if isinstance(ats_keywords, list):
+        for keyword in ats_keywords:
+            st.markdown(f"- {keyword}")
+    else:
+        st.json(ats_keywords)
+
+def render_project_suggestions(suggestions):
+    section_header("Project Suggestions")
+    with st.expander("Improvement Tips for Existing Projects", expanded=True):
+        for tip in suggestions.get("improvement_tips", []):
+            st.markdown(f"- {tip}")
+    with st.expander("New Project Recommendations", expanded=True):
+        for proj in suggestions.get("new_project_recommendations", []):
+            st.markdown(f"- {proj}")
+
+# Display order of the analysis sections: (response key, renderer, default value)
+DASHBOARD_SECTIONS = [
+    ("basic_info", render_basic_info, {}),
+    ("ai_resume_summary", render_summary, "Null"),
+    ("resume_score", render_resume_score, "70/100"),
+    ("skills", render_skills, {}),
+    ("course_recommendations", render_courses, []),
+    ("appreciation", render_appreciation, []),
+    ("resume_tips", render_resume_tips, []),
+    ("matching_job_roles", render_job_roles, []),
+    ("ats_keywords", render_ats_keywords, []),
+    ("project_suggestions", render_project_suggestions, {}),
+]
+
+# Sections a user can regenerate on their own: dashboard title -> response key
+REFRESHABLE_SECTIONS = {
+    "AI Resume Summary": "ai_resume_summary",
+    "Resume Score": "resume_score",
+    "Skills": "skills",
+    "Recommended Courses": "course_recommendations",
+    "Appreciation": "appreciation",
+    "Resume Tips": "resume_tips",
+    "Matching Job Roles": "matching_job_roles",
+    "ATS Keywords": "ats_keywords",
+    "Project Suggestions": "project_suggestions",
+    "Basic Info": "basic_info",
+}
+
+@st.fragment(run_every=1.0)
+def show_analysis_job(job_id):
+    """
+    Polls a background analysis job: renders the sections received so far and,
+    once the job finishes, stores the result and reruns the page.
+    """
+    job = job_queue.get(job_id)
+    if job is None or job["status"] == "error":
+        st.session_state.pop("job_id", None)
+        st.query_params.pop("job", None)
+        st.error(job["error"] if job else "This analysis is no longer available. Please analyze the resume again.")
+        return
+    if job["status"] == "done":
+        st.session_state.analysis_result = job["result"]
+        st.session_state.pop("job_id", None)
+        st.query_params.pop("job", None)
+        st.rerun()
+    if job["queue"]:
+        st.info(f"⏳ Many resumes are being analyzed right now. You are number {job['queue']['position']} in line, "
+                f"about {job['queue']['eta_seconds']}s to go; you can safely refresh this page.")
+    else:
+        st.info("⏳ Analyzing resume... Results appear below as they arrive; you can safely refresh this page.")
+    for key, render, _ in DASHBOARD_SECTIONS:
+        if key in job["sections"]:
+            render(job["sections"][key])
+
+@st.fragment(run_every=1.0)
+def show_refresh_job(job_id, title):
+    """
+    Polls a section refresh job and, once it finishes, puts the new section
+    into the shown analysis and reruns the page.
+    """
+    job = job_queue.get(job_id)
+    if job is None or job["status"] == "error":
+        st.session_state.pop("refresh_job", None)
+        st.error(job["error"] if job else "The section could not be regenerated. Please try again.")
+        return
+    if job["status"] == "done":
+        st.session_state.analysis_result.update(job["result"])
+        st.session_state.pop("refresh_job", None)
+        st.rerun()
+    if job["queue"]:
+        st.info(f"⏳ Regenerating {title}... You are number {job['queue']['position']} in line, "
+                f"about {job['queue']['eta_seconds']}s to go.")
+    else:
+        st.info(f"⏳ Regenerating {title}...")
+
 # ===========================
 # Main App Layout and Branding
 # ===========================
@@ -291,167 +456,55 @@ if mode == "User":
 
     if uploaded_file:
         st.success("File uploaded successfully!")
-        resume_text = extract_text_from_pdf(uploaded_file)
+        try:
+            resume_text = extract_text_from_pdf(uploaded_file)
+        except PdfExtractionError as e:
+            st.error(f"❌ {e}")
+            st.stop()
         st.markdown("<br>Click the <span style='color: #15967D; font-weight: bold;'>Analyze Resume</span> button to proceed.", unsafe_allow_html=True)
         
         if not validate_resume(resume_text):
             st.error("❌ The uploaded document does not appear to be a valid resume. Please upload a proper resume file.")
         else:
             if st.button("Analyze Resume"):
-                with st.spinner("Analyzing resume..."):
-                    result = get_resume_analysis(resume_text)
-                if "error" in result:
-                    st.error(result["error"])
-                else:
-                    # Store analysis result in session state to prevent loss on rerun
-                    st.session_state.analysis_result = result
+                # Enqueue and remember the job; the URL keeps it across reconnects
+                st.session_state.job_id = get_resume_analysis(resume_text)
+                st.session_state.resume_text = resume_text
+                st.query_params["job"] = st.session_state.job_id
+
+    # --- Poll a running analysis job, showing sections as they stream in ---
+    if "analysis_result" not in st.session_state:
+        job_id = st.session_state.get("job_id") or st.query_params.get("job")
+        if job_id:
+            show_analysis_job(job_id)
 
     if "analysis_result" in st.session_state:
         result = st.session_state.analysis_result
 
-        # --- Greeting & Basic Info Section ---
+        # --- Analysis Sections (Basic Info through Project Suggestions) ---
+        for key, render, default in DASHBOARD_SECTIONS:
+            render(result.get(key, default))
+
+        # --- Regenerate a Single Section (other sections are kept as they are) ---
+        if "resume_text" in st.session_state:
+            refresh_title = st.selectbox("Not happy with a section? Regenerate just that one:",
+                                         list(REFRESHABLE_SECTIONS))
+            refresh_key = REFRESHABLE_SECTIONS[refresh_title]
+            if st.button("Refresh Section", disabled="refresh_job" in st.session_state):
+                # Runs as a background job; the saved record is updated with the new section too
+                st.session_state.refresh_job = (job_queue.submit_refresh(
+                    st.session_state.resume_text, refresh_key, st.session_state.get("record_id"),
+                    client=session_client_id()), refresh_title)
+            if "refresh_job" in st.session_state:
+                show_refresh_job(*st.session_state.refresh_job)
+
         basic_info = result.get("basic_info", {})
         # Use "Null" as placeholder if missing
         name = basic_info.get("name", "Null")
         email = basic_info.get("email", "Null")
         mobile = basic_info.get("mobile", "Null")
         address = basic_info.get("address", "Null")
-        
-        if name != "Null":
-            st.markdown(f"<h2 style='color:#15967D;'>Hello, {name}!</h2>", unsafe_allow_html=True)
-        
-        st.markdown("""
-        <div style="background-color:#15967D; padding:10px; border-radius:5px; display:inline-block; margin-bottom:10px;">
-            <h3 style="color:white; margin:0;">Basic Info</h3>
-        </div>
-        """, unsafe_allow_html=True)
-        st.markdown(f"""
-        <div style="background-color:#F5F5F5; padding:15px; border-radius:5px; margin-bottom:20px;">
-            <strong>Name:</strong> {name}<br>
-            <strong>Email:</strong> {email}<br>
-            <strong>Mobile:</strong> {mobile}<br>
-            <strong>Address:</strong> {address}
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # --- AI Resume Summary Section ---
-        st.markdown("""
-        <div style="background-color:#15967D; padding:10px; border-radius:5px; display:inline-block; margin-bottom:10px;">
-            <h3 style="color:white; margin:0;">AI Resume Summary</h3>
-        </div>
-        """, unsafe_allow_html=True)
-        st.markdown("<p style='font-size:16px; font-style:italic; color:#555555;'>A concise summary of your experience, skills, and expertise, tailored for ATS optimization. This summary provides a quick overview for hiring managers.</p>", unsafe_allow_html=True)
-        st.markdown(f"""
-        <div style="background-color:#F5F5F5; padding:15px; border-left: 4px solid #15967D; border-radius:3px; margin-bottom:20px;">
-            {result.get('ai_resume_summary', 'Null')}
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # --- Resume Score Section ---
-        st.markdown("""
-        <div style="background-color:#15967D; padding:10px; border-radius:5px; display:inline-block; margin-bottom:10px;">
-            <h3 style="color:white; margin:0;">Resume Score</h3>
-        </div>
-        """, unsafe_allow_html=True)
-        resume_score_raw = result.get("resume_score", "70/100")
-        if isinstance(resume_score_raw, int):
-            resume_score = resume_score_raw
-        elif isinstance(resume_score_raw, str):
-            resume_score_match = re.search(r'\d+', resume_score_raw)
-            resume_score = int(resume_score_match.group()) if resume_score_match else 70
-        else:
-            resume_score = 70
-        st.metric(label="Score", value=f"{resume_score}/100")
-        st.markdown("<p style='font-size:14px; color:#555555;'><em>Note: The score is derived from structure, keyword usage, clarity, and overall presentation.</em></p>", unsafe_allow_html=True)
-        
-        # --- Skills Section with Side-by-Side Layout ---
-        st.markdown("""
-        <div style="background-color:#15967D; padding:10px; border-radius:5px; display:inline-block; margin-bottom:10px;">
-            <h3 style="color:white; margin:0;">Skills</h3>
-        </div>
-        """, unsafe_allow_html=True)
-        col_skills1, col_skills2 = st.columns(2)
-        with col_skills1:
-            st.markdown("<div style='background-color:#EFEFEF; padding:10px; border-radius:5px;'><h4 style='color:#15967D;'>Current Skills</h4></div>", unsafe_allow_html=True)
-            for skill in result.get("skills", {}).get("current_skills", []):
-                st.markdown(f"- {skill}")
-        with col_skills2:
-            st.markdown("<div style='background-color:#EFEFEF; padding:10px; border-radius:5px;'><h4 style='color:#15967D;'>Recommended Skills</h4></div>", unsafe_allow_html=True)
-            for skill in result.get("skills", {}).get("recommended_skills", []):
-                st.markdown(f"- {skill}")
-        
-        # --- Recommended Courses Section ---
-        st.markdown("""
-        <div style="background-color:#15967D; padding:10px; border-radius:5px; display:inline-block; margin-bottom:10px;">
-            <h3 style="color:white; margin:0;">Recommended Courses</h3>
-        </div>
-        """, unsafe_allow_html=True)
-        st.markdown("<p style='font-size:16px; font-style:italic; color:#555555;'>Courses suggested to help you enhance your skillset:</p>", unsafe_allow_html=True)
-        for course in result.get("course_recommendations", []):
-            if isinstance(course, dict):
-                platform = course.get("platform", "Unknown Platform")
-                course_name = course.get("course_name", "Unknown Course")
-                link = course.get("link", "#")
-                st.markdown(f"- <span style='color:#15967D; font-weight:bold;'>{platform}</span>: [{course_name}]({link})", unsafe_allow_html=True)
-            else:
-                st.markdown(f"- {course}")
-        
-        # --- Appreciation Section ---
-        st.markdown("""
-        <div style="background-color:#15967D; padding:10px; border-radius:5px; display:inline-block; margin-bottom:10px;">
-            <h3 style="color:white; margin:0;">Appreciation</h3>
-        </div>
-        """, unsafe_allow_html=True)
-        st.markdown("<p style='font-size:16px; font-style:italic; color:#555555;'>Positive comments acknowledging your strengths</p>", unsafe_allow_html=True)
-        for comment in result.get("appreciation", []):
-            st.markdown(f"- {comment}")
-        
-        # --- Resume Tips Section ---
-        st.markdown("""
-        <div style="background-color:#15967D; padding:10px; border-radius:5px; display:inline-block; margin-bottom:10px;">
-            <h3 style="color:white; margin:0;">Resume Tips</h3>
-        </div>
-        """, unsafe_allow_html=True)
-        st.markdown("<p style='font-size:16px; font-style:italic; color:#555555;'>Constructive suggestions for improving your resume:</p>", unsafe_allow_html=True)
-        for tip in result.get("resume_tips", []):
-            st.markdown(f"- {tip}")
-        
-        # --- Matching Job Roles Section ---
-        st.markdown("""
-        <div style="background-color:#15967D; padding:10px; border-radius:5px; display:inline-block; margin-bottom:10px;">
-            <h3 style="color:white; margin:0;">Matching Job Roles</h3>
-        </div>
-        """, unsafe_allow_html=True)
-        st.markdown("<p style='font-size:16px; font-style:italic; color:#555555;'>Job roles that match your skills and experience:</p>", unsafe_allow_html=True)
-        for role in result.get("matching_job_roles", []):
-            st.markdown(f"- {role}")
-        
-        # --- ATS Keywords Section ---
-        st.markdown("""
-        <div style="background-color:#15967D; padding:10px; border-radius:5px; display:inline-block; margin-bottom:10px;">
-            <h3 style="color:white; margin:0;">ATS Keywords</h3>
-        </div>
-        """, unsafe_allow_html=True)
-        st.markdown("<p style='font-size:16px; font-style:italic; color:#555555;'>Industry-relevant keywords for better ATS performance:</p>", unsafe_allow_html=True)
-        ats_keywords = result.get("ats_keywords", [])
-        if isinstance(ats_keywords, list):
-            for keyword in ats_keywords:
-                st.markdown(f"- {keyword}")
-        else:
-            st.json(ats_keywords)
-        
-        # --- Project Suggestions Section ---
-        st.markdown("""
-        <div style="background-color:#15967D; padding:10px; border-radius:5px; display:inline-block; margin-bottom:10px;">
-            <h3 style="color:white; margin:0;">Project Suggestions</h3>
-        </div>
-        """, unsafe_allow_html=True)
-        with st.expander("Improvement Tips for Existing Projects", expanded=True):
-            for tip in result.get("project_suggestions", {}).get("improvement_tips", []):
-                st.markdown(f"- {tip}")
-        with st.expander("New Project Recommendations", expanded=True):
-            for proj in result.get("project_suggestions", {}).get("new_project_recommendations", []):
-                st.markdown(f"- {proj}")
+        resume_score = parse_resume_score(result.get("resume_score", "70/100"))
         
         # --- Resume Writing Tips Section ---
         st.markdown("""
@@ -469,22 +522,9 @@ if mode == "User":
 
         # --- Automatically Save Analysis Record if Not Already Saved ---
         if "record_saved" not in st.session_state:
-            cursor.execute('''
-                INSERT INTO user_data (name, email, resume_score, skills, recommended_skills, courses, feedback, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))
-            ''', (
-                name,
-                email,
-                resume_score,
-                ", ".join(result.get("skills", {}).get("current_skills", [])),
-                ", ".join(result.get("skills", {}).get("recommended_skills", [])),
-                ", ".join([course.get("course_name", "Null") if isinstance(course, dict) else str(course)
-                           for course in result.get("course_recommendations", [])]),
-                ""  # Feedback is initially empty
-            ))
-            conn.commit()
+            # Feedback is initially empty
+            st.session_state.record_id = db.insert_analysis(result, resume_text=st.session_state.get("resume_text")).result()
             st.session_state.record_saved = True
-            st.session_state.record_id = cursor.lastrowid
         
         # --- Feedback Section (Always Shown) ---
         # Initialize the feedback submission flag if not already set.
@@ -501,8 +541,7 @@ if mode == "User":
             feedback_input = st.text_area("Please provide your feedback (optional):", "")
             if st.button("Submit Feedback"):
                 # Update the saved record with the new feedback.
-                cursor.execute("UPDATE user_data SET feedback=? WHERE id=?", (feedback_input, st.session_state.record_id))
-                conn.commit()
+                db.update_feedback(st.session_state.record_id, feedback_input).result()
                 st.session_state.feedback_submitted = True
                 st.session_state.final_feedback = feedback_input
                 st.success("Feedback submitted! Thank you.")
@@ -561,82 +600,319 @@ if mode == "Admin":
                 st.error("Invalid Admin Credentials")
 
     if st.session_state.admin_logged_in:
-        # Helper function to load data from the database into a DataFrame
-        def load_data():
-            cursor.execute("SELECT * FROM user_data")
-            data = cursor.fetchall()
-            # Updated columns list includes "Feedback"
-            return pd.DataFrame(
-                data,
-                columns=['ID', 'Name', 'Email', 'Resume_Score', 'Skills', 'Recommended_Skills', 'Courses', 'Timestamp','Feedback']
-            )
-        
-        # 1) Load the data initially
-        df = load_data()
-        
-        # 2) Clear data if the button is clicked
+        import pandas as pd
+
+        # 1) Manage data: streaming export and clearing
         st.markdown("<h3 style='color:#15967D;'>Manage Data</h3>", unsafe_allow_html=True)
         col1, col_gap, col2 = st.columns([1, 0.5, 1])
         with col1:
-            export_json = df.to_json(orient="records", indent=4)
-            st.download_button("Download All Data as JSON", data=export_json, file_name="user_data.json", mime="application/json")
+            export_format = st.selectbox("Export Format", list(EXPORT_FORMATS), format_func=str.upper)
+            export_file_name, export_mime = EXPORT_FORMATS[export_format]
+            # Written chunk by chunk to a temporary file, and only when the button is clicked. Streamlit
+            # still reads the finished file into memory to serve it, so large tables go through the CLI.
+            st.download_button("Download All Data", data=lambda fmt=export_format: spool_export(db, fmt),
+                               file_name=export_file_name, mime=export_mime)
+            st.caption("For large tables, export without loading the file into the app: "
+                       f"`python -m analyzer.export --format {export_format} --out {export_file_name}`")
         with col2:
             if st.button("Clear Results", key="clear_admin"):
-                cursor.execute("DELETE FROM user_data")
-                conn.commit()
+                db.clear_user_data().result()
+                st.session_state.pop("grid_key", None)
                 st.success("All results have been cleared from the database.")
-                df = load_data()
 
-        # 3) Now display the data (which might be empty if just cleared)
+        # 2) Browse the data one page at a time, filtered and sorted in SQL
         st.markdown("<h3 style='color:#15967D;'>User Data</h3>", unsafe_allow_html=True)
-        st.dataframe(df)
+        col_score, col_dates, col_skill = st.columns(3)
+        with col_score:
+            score_range = st.slider("Resume Score", 0, 100, (0, 100))
+        with col_dates:
+            date_range = st.date_input("Date Range", value=())
+        with col_skill:
+            skill_filter = st.text_input("Skill")
+        col_sort, col_page_size = st.columns(2)
+        with col_sort:
+            sort_label = st.selectbox("Sort By", list(GRID_SORTS))
+        with col_page_size:
+            page_size = st.selectbox("Rows per Page", [25, 50, 100], index=1)
+        filters = {
+            "min_score": score_range[0] if score_range[0] > 0 else None,
+            "max_score": score_range[1] if score_range[1] < 100 else None,
+            "date_from": date_range[0] if len(date_range) > 0 else None,
+            "date_to": date_range[1] if len(date_range) > 1 else None,
+            "skill": skill_filter or None,
+        }
+        # Cursors of the pages visited so far; reset whenever the query changes
+        grid_key = repr((filters, sort_label, page_size))
+        if st.session_state.get("grid_key") != grid_key:
+            st.session_state.grid_key = grid_key
+            st.session_state.page_cursors = [None]
+        sort_column, descending = GRID_SORTS[sort_label]
+        with ADMIN_RENDER_SECONDS.time(section="user_data"):
+            rows, next_cursor = db.browse(filters, sort_column, descending,
+                                          after=st.session_state.page_cursors[-1], page_size=page_size)
+            st.dataframe(pd.DataFrame(rows, columns=GRID_COLUMNS), hide_index=True)
+        col_prev, col_page, col_next = st.columns([1, 1, 1])
+        with col_prev:
+            if st.button("Previous Page", disabled=len(st.session_state.page_cursors) == 1):
+                st.session_state.page_cursors.pop()
+                st.rerun()
+        with col_page:
+            st.markdown(f"Page {len(st.session_state.page_cursors)}")
+        with col_next:
+            if st.button("Next Page", disabled=next_cursor is None):
+                st.session_state.page_cursors.append(next_cursor)
+                st.rerun()
+        # The complete stored analysis of one record, from the database or the archive (no LLM call)
+        view_id = st.number_input("View the full analysis of ID", min_value=0, value=0, step=1)
+        if view_id:
+            stored = load_analysis(db, archive, int(view_id))
+            if stored is None or not stored.get("result"):
+                st.info("No full analysis is stored for this ID.")
+            else:
+                with st.expander(f"Analysis {int(view_id)} ({stored['timestamp']})", expanded=True):
+                    for key, render, default in DASHBOARD_SECTIONS:
+                        render(stored["result"].get(key, default))
+                    st.download_button("Download Stored Analysis", data=json.dumps(stored, indent=4),
+                                       file_name=f"resume_analysis_{int(view_id)}.json", mime="application/json")
+
+        # 3) Candidate Search (inverted skill/keyword index and TF-IDF similarity, analyzer/search.py)
+        st.markdown("<h3 style='color:#15967D;'>Candidate Search</h3>", unsafe_allow_html=True)
+        col_text, col_like = st.columns([3, 1])
+        with col_text:
+            search_text = st.text_input("Similar to (a summary, role description or skills)")
+        with col_like:
+            like_id = st.number_input("Or similar to analysis ID", min_value=0, value=0, step=1)
+        col_terms, col_min_score, col_k = st.columns([2, 1, 1])
+        with col_terms:
+            search_terms = st.text_input("Required skills or ATS keywords (comma-separated)")
+        with col_min_score:
+            search_min_score = st.number_input("Minimum score", min_value=0, max_value=100, value=0)
+        with col_k:
+            search_k = st.number_input("Results", min_value=1, max_value=100, value=10)
+        if search_text or like_id or search_terms or search_min_score:
+            search_index = load_search_index()
+            # Picks up every analysis saved since the last search
+            search_index.sync(db)
+            results = search_index.search(
+                text=search_text or None, like=int(like_id) or None,
+                terms=[term for term in search_terms.split(",") if term.strip()],
+                min_score=search_min_score or None, k=int(search_k),
+            )
+            similarities = dict(results)
+            records = db.get_analyses(list(similarities))
+            if not records:
+                st.info("No matching analyses.")
+            else:
+                found = pd.DataFrame(records, columns=GRID_COLUMNS)
+                if search_text or like_id:
+                    found.insert(1, "Similarity", [round(similarities[record[0]], 3) for record in records])
+                st.dataframe(found, hide_index=True)
+            st.caption(f"{search_index.stats()['analyses']} analyses indexed.")
 
-        # 4) Resume Score Distribution
+        # 4) Resume Score Distribution (read from the materialized statistics tables)
         st.markdown("<h3 style='color:#15967D;'>Resume Score Distribution</h3>", unsafe_allow_html=True)
-        if df.empty:
-            st.info("No data available.")
-        else:
-            st.bar_chart(df['Resume_Score'])
+        with ADMIN_RENDER_SECONDS.time(section="score_distribution"):
+            chart_data = admin_chart_data(db.data_version())
+            stats = chart_data["stats"]
+            if not stats["analyses"]:
+                st.info("No data available.")
+            else:
+                col_total, col_avg, col_feedback = st.columns(3)
+                col_total.metric("Analyses", stats["analyses"])
+                col_avg.metric("Average Score", f"{stats['average_score']:.1f}/100")
+                col_feedback.metric("With Feedback", stats["with_feedback"])
+                buckets = pd.DataFrame(stats["score_buckets"], columns=["Bucket", "Resumes"])
+                buckets["Resume Score"] = buckets["Bucket"].map(lambda b: f"{b}-{b + 9}" if b < 90 else "90-100")
+                st.bar_chart(buckets.set_index("Resume Score")["Resumes"])
+                st.markdown("<h3 style='color:#15967D;'>Analyses per Day</h3>", unsafe_allow_html=True)
+                daily = pd.DataFrame(stats["daily"], columns=["Day", "Analyses", "Score Sum"])
+                st.line_chart(daily.set_index("Day")["Analyses"])
         
-        # 5) Top Skills Overview
+        # 5) Top Skills Overview (browser-rendered charts of the materialized skill counts)
         st.markdown("<h3 style='color:#15967D;'>Top Skills Overview</h3>", unsafe_allow_html=True)
-        def get_top_skills(skill_series, top_n=5):
-            skills = [str(s).strip() for s in skill_series if pd.notna(s) and str(s).strip() != ""]
-            if not skills:
-                return pd.Series(dtype=int)
-            skill_counts = pd.Series(", ".join(skills).split(", ")).value_counts()
-            if len(skill_counts) > top_n:
-                top_skills = skill_counts.head(top_n)
-                top_skills.loc["Others"] = skill_counts[top_n:].sum()
-            else:
-                top_skills = skill_counts
-            return top_skills
-
-        if df.empty:
+        if not stats["analyses"]:
             st.info("No data available.")
         else:
-            top_current_skills = get_top_skills(df['Skills'])
-            top_recommended_skills = get_top_skills(df['Recommended_Skills'])
-            
-            fig, axes = plt.subplots(1, 2, figsize=(20, 12))
-            plt.subplots_adjust(wspace=0.3)
-
-            def plot_pie(ax, data, title):
-                data.plot.pie(
-                    ax=ax, autopct='%1.1f%%', startangle=140,
-                    wedgeprops={'edgecolor': 'white'}, legend=False
-                )
-                ax.set_ylabel('')
-                ax.set_title(title)
-
-            if not top_current_skills.empty:
-                plot_pie(axes[0], top_current_skills, "Current Skills")
-            else:
-                axes[0].text(0.5, 0.5, "No Data", ha='center', va='center')
-
-            if not top_recommended_skills.empty:
-                plot_pie(axes[1], top_recommended_skills, "Recommended Skills")
+            with ADMIN_RENDER_SECONDS.time(section="top_skills"):
+                col_current, col_recommended = st.columns(2)
+                for column, kind, title in ((col_current, "current", "Current Skills"),
+                                            (col_recommended, "recommended", "Recommended Skills")):
+                    with column:
+                        if chart_data[kind]:
+                            st.vega_lite_chart(skills_chart_spec(chart_data[kind], title), width="stretch")
+                        else:
+                            st.info(f"No {title.lower()} recorded yet.")
+
+        # 6) Analysis Cache
+        st.markdown("<h3 style='color:#15967D;'>Analysis Cache</h3>", unsafe_allow_html=True)
+        cache_stats = analysis_cache.stats()
+        col_hits, col_misses, col_rate, col_entries = st.columns(4)
+        col_hits.metric("Hits", cache_stats["hits"])
+        col_misses.metric("Misses", cache_stats["misses"])
+        col_rate.metric("Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+        col_entries.metric("Cached Analyses", cache_stats["entries"])
+        if st.button("Clear Analysis Cache", key="clear_cache"):
+            analysis_cache.clear()
+            st.success("The analysis cache has been cleared.")
+
+        # 7) Data Retention (full payloads compressed in SQLite, older ones moved to archive segments)
+        st.markdown("<h3 style='color:#15967D;'>Data Retention</h3>", unsafe_allow_html=True)
+        hot_stats, archive_stats = payload_stats(db), archive.stats()
+        col_hot, col_hot_size, col_archived, col_archive_size = st.columns(4)
+        col_hot.metric("Payloads in Database", hot_stats["hot"])
+        col_hot_size.metric("Compressed Size", f"{hot_stats['hot_bytes'] / 1024:,.0f} KB")
+        col_archived.metric("Archived Analyses", archive_stats["records"])
+        col_archive_size.metric("Archive Size", f"{archive_stats['bytes'] / 1024:,.0f} KB",
+                                help=f"{archive_stats['segments']} monthly segments")
+        col_archive_days, col_purge_days = st.columns(2)
+        with col_archive_days:
+            archive_days = st.number_input("Archive payloads older than (days)", min_value=0,
+                                           value=ARCHIVE_AFTER_DAYS)
+        with col_purge_days:
+            purge_days = st.number_input("Remove archived rows older than (days, 0 = never)", min_value=0,
+                                         value=PURGE_AFTER_DAYS or 0)
+        if st.button("Apply Retention"):
+            with st.spinner("Archiving..."):
+                counts = apply_retention(db, archive, int(archive_days), int(purge_days) or None)
+            st.success(f"Archived {counts['archived']} analyses and removed {counts['purged']} rows "
+                       "from the database. Rerun the page to refresh the tables above.")
+
+        # 8) Prompt Tokens (estimated; compaction savings and request latency)
+        st.markdown("<h3 style='color:#15967D;'>Prompt Tokens</h3>", unsafe_allow_html=True)
+        prompt_stats = db.prompt_stats()
+        flight_stats = analysis_flights.stats()
+        col_requests, col_coalesced, col_raw, col_sent, col_latency = st.columns(5)
+        col_requests.metric("LLM Analyses", prompt_stats["requests"],
+                            help=f"{prompt_stats['cache_hits']} served from the cache or a shared request, "
+                                 f"{prompt_stats['truncated']} trimmed to the token budget")
+        col_coalesced.metric("Coalesced", flight_stats["coalesced"],
+                             help=f"Concurrent identical analyses that waited on another session's request "
+                                  f"instead of sending their own (of {flight_stats['calls']} since the server started)")
+        col_raw.metric("Avg Raw Resume Tokens", f"{prompt_stats['avg_raw_tokens'] or 0:.0f}")
+        col_sent.metric("Avg Compacted Tokens", f"{prompt_stats['avg_resume_tokens'] or 0:.0f}",
+                        delta=f"-{prompt_stats['tokens_saved']} total", delta_color="off")
+        col_latency.metric("Avg Latency", f"{(prompt_stats['avg_latency_ms'] or 0) / 1000:.1f}s")
+
+        # 9) Batch Analysis
+        st.markdown("<h3 style='color:#15967D;'>Batch Analysis</h3>", unsafe_allow_html=True)
+        batch_files = st.file_uploader("Upload Resumes (PDFs or ZIP archives)", type=["pdf", "zip"],
+                                       accept_multiple_files=True, key="batch_files")
+        col_mode, col_concurrency, col_rpm = st.columns(3)
+        with col_mode:
+            batch_mode = st.selectbox("Analysis mode", ANALYSIS_MODES,
+                                      index=ANALYSIS_MODES.index(DEFAULT_ANALYSIS_MODE))
+        with col_concurrency:
+            batch_concurrency = st.number_input("Concurrent API requests", min_value=1, max_value=32,
+                                                value=DEFAULT_CONCURRENCY)
+        with col_rpm:
+            batch_rpm = st.number_input("Max requests per minute (0 = unlimited)", min_value=0, value=0)
+        if batch_files and st.button("Run Batch Analysis"):
+            try:
+                # Counted from the ZIP directories; run_batch reads the PDFs lazily
+                total = count_uploaded_resumes(batch_files)
+            except ArchiveLimitError as e:
+                st.error(f"❌ {e}")
+                st.stop()
+            progress = st.progress(0.0, text=f"Analyzing {total} resumes...")
+            results_table = st.empty()
+            batch_results = []
+            for item in run_batch(iter_uploaded_resumes(batch_files), API_KEY, db,
+                                  concurrency=int(batch_concurrency), requests_per_minute=batch_rpm or None,
+                                  cache=analysis_cache, mode=batch_mode):
+                batch_results.append(item)
+                progress.progress(len(batch_results) / total,
+                                  text=f"{len(batch_results)}/{total}: {item['file']} ({item['status']})")
+                results_table.dataframe(pd.DataFrame(batch_results))
+            saved = sum(1 for item in batch_results if item["status"] == "saved")
+            st.success(f"Batch complete: {saved} of {total} resumes saved. Rerun the page to refresh the tables above.")
+
+        # 10) Job Matching (rank many resumes against one posting; only the shortlist reaches the LLM)
+        st.markdown("<h3 style='color:#15967D;'>Job Matching</h3>", unsafe_allow_html=True)
+        job_text = st.text_area("Job Description", height=150, key="job_text")
+        match_source = st.radio("Applicants", ["Uploaded resumes", "Stored analyses"], horizontal=True)
+        match_files = None
+        if match_source == "Uploaded resumes":
+            match_files = st.file_uploader("Upload Applicant Resumes (PDFs or ZIP archives)", type=["pdf", "zip"],
+                                           accept_multiple_files=True, key="match_files")
+        shortlist_size = st.number_input("Shortlist size", min_value=1, max_value=100, value=10)
+        if job_text.strip() and (match_files or match_source == "Stored analyses") and st.button("Rank Applicants"):
+            from analyzer.matching import JobProfile, extract_applicants, rank_applicants, rank_stored
+            profile = JobProfile(job_text)
+            with st.spinner("Ranking applicants..."):
+                if match_files:
+                    try:
+                        applicants, rejected = extract_applicants(iter_uploaded_resumes(match_files))
+                    except ArchiveLimitError as e:
+                        st.error(f"❌ {e}")
+                        st.stop()
+                    st.session_state.match_ranking = rank_applicants(profile, applicants)
+                    st.session_state.match_rejected = rejected
+                else:
+                    st.session_state.match_ranking = rank_stored(profile, load_search_index(), db,
+                                                                 int(shortlist_size))
+                    st.session_state.match_rejected = []
+            if not profile.skills:
+                st.warning("No known skills found in the job description; applicants are ranked on text similarity only.")
+        if "match_ranking" in st.session_state:
+            ranking = st.session_state.match_ranking
+            if not ranking:
+                st.info("No applicants to rank.")
             else:
-                axes[1].text(0.5, 0.5, "No Data", ha='center', va='center')
-
-            st.pyplot(fig)
+                shown = pd.DataFrame([
+                    {key: ", ".join(value) if isinstance(value, list) else value
+                     for key, value in applicant.items() if key not in ("text", "skills")}
+                    for applicant in ranking
+                ])
+                st.dataframe(shown, hide_index=True)
+            if st.session_state.match_rejected:
+                st.caption(f"{len(st.session_state.match_rejected)} files were not readable resumes: "
+                           + ", ".join(item["file"] for item in st.session_state.match_rejected))
+            # Stored analyses already have a full analysis; uploads get one for the shortlist only
+            if ranking and "text" in ranking[0] and st.button("Analyze Shortlist"):
+                from analyzer.matching import analyze_shortlist
+                shortlist = ranking[:int(shortlist_size)]
+                progress = st.progress(0.0, text=f"Analyzing the top {len(shortlist)} applicants...")
+                shortlist_results = []
+                for item in analyze_shortlist(shortlist, API_KEY, db, cache=analysis_cache, mode=batch_mode):
+                    shortlist_results.append(item)
+                    progress.progress(len(shortlist_results) / len(shortlist),
+                                      text=f"{len(shortlist_results)}/{len(shortlist)}: {item['file']} ({item['status']})")
+                st.dataframe(pd.DataFrame(shortlist_results).sort_values("match", ascending=False), hide_index=True)
+
+        # 11) Performance (in-process latency histograms and counters)
+        st.markdown("<h3 style='color:#15967D;'>Performance</h3>", unsafe_allow_html=True)
+        if not metrics.ENABLED:
+            st.info("Metrics are disabled (METRICS_ENABLED=0).")
+        else:
+            timings, counts = metrics.summary()
+            if timings:
+                st.dataframe(pd.DataFrame(timings).round(1), hide_index=True)
+            if counts:
+                st.dataframe(pd.DataFrame(counts), hide_index=True)
+            with st.expander("Prometheus metrics"):
+                st.code(metrics.render_prometheus(), language="text")
+
+        # 12) Models (rolling latency and error rate behind the routing decisions)
+        st.markdown("<h3 style='color:#15967D;'>Models</h3>", unsafe_allow_html=True)
+        st.caption("Tried top to bottom; unhealthy models are moved to the end. Configure with LLM_MODELS.")
+        st.dataframe(pd.DataFrame(model_router.stats()).round(3), hide_index=True)
+
+        # 13) Upstream Admission (host-wide rate limit and fair queue shared by every app process)
+        st.markdown("<h3 style='color:#15967D;'>Upstream Admission</h3>", unsafe_allow_html=True)
+        admission = get_admission()
+        admission_stats = admission.stats()
+        col_running, col_waiting, col_tokens, col_service = st.columns(4)
+        col_running.metric("Running Analyses", admission_stats["running"],
+                           help=f"At most {admission.max_concurrent or 'unlimited'} at once, "
+                                f"{admission.max_per_client or 'unlimited'} per client")
+        col_waiting.metric("Waiting", admission_stats["waiting"],
+                           help=f"From {admission_stats['waiting_clients']} clients")
+        if admission_stats["tokens"] is None:
+            col_tokens.metric("Request Tokens", "unlimited", help="Set LLM_REQUESTS_PER_MINUTE to rate-limit")
+        else:
+            col_tokens.metric("Request Tokens", f"{admission_stats['tokens']:.1f} / {admission.burst}",
+                              help=f"Refilled at {admission.requests_per_minute:g} requests per minute")
+        col_service.metric("Avg Analysis Time", f"{admission_stats['service_seconds']:.1f}s")
+        if admission_stats["paused_seconds"]:
+            st.warning(f"The upstream API is rate limiting; all requests are paused for another "
+                       f"{admission_stats['paused_seconds']:.0f}s.")
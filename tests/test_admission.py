@@ -0,0 +1,32 @@
+import threading
+
+from analyzer.admission import AdmissionControl, fair_order
+
+
+def test_fair_order_interleaves_clients():
+    tickets = [(1, "batch", None), (2, "batch", None), (3, "batch", None), (4, "alice", None), (5, "bob", 0.0),
+               (6, "bob", None)]
+    waiting, running = fair_order(tickets)
+    # Every client's first waiting ticket goes before anyone's second; bob already has one running
+    assert waiting == [(1, "batch"), (4, "alice"), (2, "batch"), (6, "bob"), (3, "batch")]
+    assert running == {"bob": 1}
+
+
+def test_slot_caps_concurrency_per_client(tmp_path):
+    admission = AdmissionControl(str(tmp_path / "admission.db"), max_concurrent=3, max_per_client=1)
+    positions = []
+
+    def second_analysis():
+        with admission.slot("alice", on_wait=lambda position, eta: positions.append(position)):
+            pass
+
+    with admission.slot("alice"), admission.slot("bob"):
+        assert (admission.stats()["running"], admission.stats()["waiting"]) == (2, 0)
+        waiter = threading.Thread(target=second_analysis)
+        waiter.start()
+        waiter.join(0.5)
+        # A free slot is left, but alice already holds the one allowed per client
+        assert waiter.is_alive() and positions[0] == 1
+    waiter.join(5)
+    assert not waiter.is_alive() and positions[-1] == 0
+    assert admission.stats()["running"] == 0
@@ -0,0 +1,76 @@
+import io
+import socket
+import threading
+import time
+import zipfile
+
+import pytest
+import requests
+
+uvicorn = pytest.importorskip("uvicorn")
+
+from analyzer import api  # noqa: E402
+from analyzer.service import get_service  # noqa: E402
+
+
+def serve(app):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        assert time.monotonic() < deadline, "API server did not start"
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server, thread
+
+
+@pytest.fixture
+def start(tmp_path, monkeypatch):
+    servers = []
+
+    def start_app(token=None):
+        monkeypatch.setattr(api, "API_TOKEN", token)
+        url, server, thread = serve(api.create_app(str(tmp_path / "resume_data.db"), api_key="key"))
+        servers.append((server, thread))
+        return url
+
+    yield start_app
+    for server, thread in servers:
+        server.should_exit = True
+        thread.join(10)
+
+
+def test_feedback_for_unknown_record_is_404(start):
+    url = start()
+    response = requests.post(f"{url}/v1/analyses/999/feedback", json={"feedback": "great"})
+    assert response.status_code == 404
+
+
+def test_feedback_for_saved_record_is_stored(start, tmp_path):
+    url = start()
+    # The service the app opened for its database
+    service = get_service(str(tmp_path / "resume_data.db"))
+    record_id = service.save({"resume_score": "80/100"})
+    assert requests.post(f"{url}/v1/analyses/{record_id}/feedback", json={"feedback": "great"}).status_code == 204
+    assert service.stored_analysis(record_id)["feedback"] == "great"
+
+
+def test_bearer_token_is_required(start):
+    url = start(token="s3cret")
+    assert requests.get(f"{url}/v1/jobs/nope").status_code == 401
+    assert requests.get(f"{url}/v1/jobs/nope", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert requests.get(f"{url}/v1/jobs/nope", headers={"Authorization": "Bearer s3cret"}).status_code == 404
+    assert requests.get(f"{url}/health").status_code == 200
+
+
+def test_zip_expanding_past_the_limit_is_413(start, monkeypatch):
+    monkeypatch.setattr(api, "MAX_ZIP_TOTAL_BYTES", 1024 * 1024)
+    url = start()
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("bomb.pdf", bytes(8 * 1024 * 1024))
+    response = requests.post(f"{url}/v1/batch", files=[("files", ("bomb.zip", buffer.getvalue()))])
+    assert response.status_code == 413
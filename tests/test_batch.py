@@ -0,0 +1,92 @@
+import io
+import zipfile
+
+import pytest
+
+from analyzer.batch import ArchiveLimitError, count_uploaded_resumes, iter_zip_resumes, zip_pdf_members
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def test_zip_yields_only_pdfs():
+    source = make_zip([("a.pdf", b"%PDF-a"), ("notes.txt", b"skip"), ("dir/b.PDF", b"%PDF-b")])
+    assert list(iter_zip_resumes(source)) == [("a.pdf", b"%PDF-a"), ("dir/b.PDF", b"%PDF-b")]
+
+
+def test_zip_bomb_member_is_rejected_before_reading():
+    # 4 MB of zeros compresses to a few KB
+    source = make_zip([("bomb.pdf", bytes(4 * 1024 * 1024))])
+    assert len(source.getvalue()) < 64 * 1024
+    with pytest.raises(ArchiveLimitError):
+        next(iter_zip_resumes(source, max_member_bytes=1024 * 1024))
+
+
+def test_zip_total_size_is_capped():
+    source = make_zip([(f"{n}.pdf", bytes(600)) for n in range(4)])
+    with pytest.raises(ArchiveLimitError):
+        list(iter_zip_resumes(source, max_total_bytes=2000))
+    source.seek(0)
+    assert len(list(iter_zip_resumes(source, max_total_bytes=2400))) == 4
+
+
+def test_zip_member_count_is_capped():
+    source = make_zip([(f"{n}.pdf", b"%PDF") for n in range(6)])
+    with pytest.raises(ArchiveLimitError):
+        list(iter_zip_resumes(source, max_members=5))
+
+
+def test_zip_lying_about_sizes_is_still_bounded():
+    data = make_zip([("bomb.pdf", bytes(64 * 1024))]).getvalue()
+    # Declare 10 bytes uncompressed in the central directory entry
+    entry = data.index(b"PK\x01\x02")
+    data = data[:entry + 24] + (10).to_bytes(4, "little") + data[entry + 28:]
+    with pytest.raises(zipfile.BadZipFile):
+        list(iter_zip_resumes(io.BytesIO(data), max_member_bytes=1024))
+
+
+def test_extract_applicants_keeps_few_pdfs_in_flight(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from analyzer import matching
+
+    counts = {"read": 0, "extracted": 0, "most_in_flight": 0}
+
+    def sources():
+        for n in range(20):
+            counts["read"] += 1
+            counts["most_in_flight"] = max(counts["most_in_flight"], counts["read"] - counts["extracted"])
+            yield f"{n}.pdf", b"%PDF"
+
+    def extract(data):
+        counts["extracted"] += 1
+        raise ValueError("unreadable")
+
+    # Threads instead of processes, so the counters are shared
+    monkeypatch.setattr(matching, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(matching, "extract_pdf_text", extract)
+    applicants, rejected = matching.extract_applicants(sources(), workers=2)
+    assert (len(applicants), len(rejected)) == (0, 20)
+    assert counts["most_in_flight"] <= 2 * 2 + 1
+
+
+class Upload:
+    def __init__(self, name, data):
+        self.name, self.data = name, data
+
+    def getvalue(self):
+        return self.data
+
+
+def test_uploaded_resumes_are_counted_without_inflating():
+    uploads = [Upload("a.pdf", b"%PDF"), Upload("more.zip", make_zip([("b.pdf", b"1"), ("c.pdf", b"2")]).getvalue())]
+    assert count_uploaded_resumes(uploads) == 3
+    with zipfile.ZipFile(make_zip([(f"{n}.pdf", b"") for n in range(3)])) as archive:
+        with pytest.raises(ArchiveLimitError):
+            zip_pdf_members(archive, max_members=2)
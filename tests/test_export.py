@@ -0,0 +1,47 @@
+import csv
+import io
+import json
+
+import pytest
+
+from analyzer.export import iter_export, spool_export
+from analyzer.storage import USER_DATA_COLUMNS, Database
+
+RESULT = {
+    "basic_info": {"name": "Jane Doe", "email": "jane@example.com"},
+    "resume_score": "82/100",
+    "skills": {"current_skills": ["Python", "SQL"], "recommended_skills": ["Spark"]},
+    "course_recommendations": [{"course_name": "Data Engineering"}],
+    "model": "test-model",
+    "latency_ms": 1234,
+}
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "resume_data.db"))
+    for _ in range(3):
+        database.insert_analysis(RESULT, resume_text="Jane Doe\nPython").result()
+    return database
+
+
+def test_parquet_export_has_every_column(db):
+    pq = pytest.importorskip("pyarrow.parquet")
+    table = pq.read_table(io.BytesIO(b"".join(iter_export(db, "parquet", chunk_size=2))))
+    assert table.column_names == list(USER_DATA_COLUMNS)
+    rows = table.to_pylist()
+    assert len(rows) == 3
+    assert rows[0]["model"] == "test-model"
+    assert rows[0]["latency_ms"] == 1234
+    assert rows[0]["resume_score"] == 82
+
+
+def test_csv_and_jsonl_exports_match_columns(db):
+    header = next(csv.reader(io.StringIO(b"".join(iter_export(db, "csv")).decode())))
+    assert header == list(USER_DATA_COLUMNS)
+    first = json.loads(b"".join(iter_export(db, "jsonl")).splitlines()[0])
+    assert list(first) == list(USER_DATA_COLUMNS)
+
+
+def test_spooled_export_matches_stream(db):
+    assert spool_export(db, "csv").read() == b"".join(iter_export(db, "csv"))
@@ -0,0 +1,147 @@
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from analyzer.http_client import CircuitOpenError, HttpClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.server.lock:
+            self.server.requests += 1
+            status, headers, delay = self.server.replies.pop(0) if self.server.replies else (200, {}, 0)
+        if delay:
+            time.sleep(delay)
+        body = b"{}"
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.replies = []
+    server.requests = 0
+    server.url = f"http://127.0.0.1:{server.server_port}/"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_retries_server_errors(stub):
+    stub.replies = [(500, {}, 0), (503, {}, 0)]
+    client = HttpClient(backoff_base=0.01, backoff_max=0.01)
+    assert client.post(stub.url, json={}).status_code == 200
+    assert stub.requests == 3
+
+
+def test_gives_up_after_max_retries(stub):
+    stub.replies = [(502, {}, 0)] * 3
+    client = HttpClient(max_retries=2, backoff_base=0.01, backoff_max=0.01)
+    assert client.post(stub.url, json={}).status_code == 502
+    assert stub.requests == 3
+
+
+def test_429_waits_for_retry_after(stub, monkeypatch):
+    stub.replies = [(429, {"Retry-After": "3"}, 0)]
+    client = HttpClient(backoff_max=8.0)
+    delays = []
+    real_sleep = time.sleep
+    monkeypatch.setattr("analyzer.http_client.time.sleep",
+                        lambda seconds: delays.append(seconds) or real_sleep(0))
+    assert client.post(stub.url, json={}).status_code == 200
+    assert delays == [3.0]
+    # A 429 is the upstream saying "slow down", not failing: the breaker stays closed
+    assert client.breaker.state == "closed"
+
+
+def test_breaker_opens_then_lets_one_probe_through(stub):
+    client = HttpClient(max_retries=0, failure_threshold=2, reset_timeout=0.3)
+    stub.replies = [(500, {}, 0), (500, {}, 0)]
+    for _ in range(2):
+        client.post(stub.url, json={})
+    assert client.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        client.post(stub.url, json={})
+    assert stub.requests == 2
+
+    time.sleep(0.35)
+    assert client.breaker.state == "half_open"
+    stub.replies = [(200, {}, 0.3)]
+    probe = threading.Thread(target=client.post, args=(stub.url,), kwargs={"json": {}})
+    probe.start()
+    time.sleep(0.1)
+    with pytest.raises(CircuitOpenError):
+        client.post(stub.url, json={})
+    probe.join()
+    assert stub.requests == 3
+    assert client.breaker.state == "closed"
+    assert client.post(stub.url, json={}).status_code == 200
+
+
+def test_failed_probe_reopens_the_breaker(stub):
+    client = HttpClient(max_retries=0, failure_threshold=1, reset_timeout=0.2)
+    stub.replies = [(500, {}, 0), (500, {}, 0)]
+    client.post(stub.url, json={})
+    time.sleep(0.25)
+    client.post(stub.url, json={})
+    assert client.breaker.state == "open"
+
+
+class LockedLimiter:
+    def acquire(self):
+        raise sqlite3.OperationalError("database is locked")
+
+    def penalize(self, seconds):
+        pass
+
+
+def half_open_client(stub):
+    client = HttpClient(max_retries=0, failure_threshold=1, reset_timeout=0.2)
+    stub.replies = [(500, {}, 0)]
+    client.post(stub.url, json={})
+    time.sleep(0.25)
+    assert client.breaker.state == "half_open"
+    return client
+
+
+def test_probe_that_never_reaches_the_upstream_frees_the_slot(stub):
+    client = half_open_client(stub)
+    with pytest.raises(sqlite3.OperationalError):
+        client.post(stub.url, rate_limiter=LockedLimiter(), json={})
+    assert client.post(stub.url, json={}).status_code == 200
+    assert client.breaker.state == "closed"
+
+
+def test_probe_raising_an_unexpected_request_error_ends_the_probe(stub, monkeypatch):
+    client = half_open_client(stub)
+
+    def redirect_loop(*args, **kwargs):
+        raise requests.TooManyRedirects("loop")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(client.session, "post", redirect_loop)
+        with pytest.raises(requests.TooManyRedirects):
+            client.post(stub.url, json={})
+    # The failed probe re-opened the breaker; the next probe is allowed after the cooldown
+    assert client.breaker.state == "open"
+    time.sleep(0.25)
+    assert client.post(stub.url, json={}).status_code == 200
+    assert client.breaker.state == "closed"
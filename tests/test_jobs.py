@@ -0,0 +1,174 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from analyzer import jobs
+from analyzer.admission import AdmissionControl
+from analyzer.storage import Database
+
+RESUME = "Jane Doe\njane@example.com\nExperience\nBuilt Python things\nSkills\nPython SQL"
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    admission = AdmissionControl(str(tmp_path / "admission.db"))
+    monkeypatch.setattr(jobs, "get_admission", lambda: admission)
+    monkeypatch.setattr(jobs, "analyze_resume", lambda *args, **kwargs: {"resume_score": "80/100"})
+    job_queue = jobs.JobQueue(Database(str(tmp_path / "resume_data.db")), "key")
+    yield job_queue
+    job_queue.close()
+
+
+def wait_for(job_queue, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = job_queue.get(job_id)
+        if job["status"] in ("done", "error"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_finishes_and_is_saved(queue):
+    job = wait_for(queue, queue.submit(RESUME, "full", save=True))
+    assert job["status"] == "done"
+    assert job["record_id"] is not None
+
+
+def test_failed_save_marks_job_as_error_and_frees_the_resume(queue, monkeypatch):
+    def broken_insert(*args, **kwargs):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(queue.db, "insert_analysis", broken_insert)
+    first = queue.submit(RESUME, "full", save=True)
+    job = wait_for(queue, first)
+    assert job["status"] == "error"
+    assert "disk full" in job["error"]
+    # The dead job is not joined by the next submission of the same resume
+    second = queue.submit(RESUME, "full")
+    assert second != first
+    assert wait_for(queue, second)["status"] == "done"
+
+
+def insert_foreign_job(job_queue, job_id, owner):
+    job_queue.db.write(
+        "INSERT INTO analysis_job (id, resume_key, mode, resume_text, status, owner) VALUES (?, ?, ?, ?, 'running', ?)",
+        (job_id, jobs.job_key(RESUME, "full"), "full", RESUME, owner),
+    ).result()
+
+
+def test_submit_joins_job_running_in_another_live_process(queue):
+    # The parent process stands in for another API worker
+    insert_foreign_job(queue, "other-worker-job", os.getppid())
+    assert queue.submit(RESUME, "full", save=True) == "other-worker-job"
+    assert queue.db.query("SELECT save FROM analysis_job WHERE id = 'other-worker-job'") == [(1,)]
+
+
+def test_submit_ignores_job_of_dead_process(queue):
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    insert_foreign_job(queue, "dead-worker-job", dead.pid)
+    job_id = queue.submit(RESUME, "full")
+    assert job_id != "dead-worker-job"
+    assert wait_for(queue, job_id)["status"] == "done"
+
+
+def test_joined_submission_with_save_stores_the_result(queue, monkeypatch):
+    release = threading.Event()
+
+    def slow_analysis(*args, **kwargs):
+        release.wait(10)
+        return {"resume_score": "80/100"}
+
+    monkeypatch.setattr(jobs, "analyze_resume", slow_analysis)
+    first = queue.submit(RESUME, "full")
+    assert queue.submit(RESUME, "full", save=True) == first
+    release.set()
+    assert wait_for(queue, first)["record_id"] is not None
+
+
+def test_save_requested_while_the_job_finishes_is_not_lost(queue, monkeypatch):
+    finish = queue._finish
+    joined = []
+
+    def finish_after_a_save_request(job_id, *args, **kwargs):
+        # Another request for the same resume arrives after the job left _active but before
+        # its row is finished: it joins the job in the database and asks for a save
+        if not joined:
+            joined.append(queue.submit(RESUME, "full", save=True))
+        return finish(job_id, *args, **kwargs)
+
+    monkeypatch.setattr(queue, "_finish", finish_after_a_save_request)
+    first = queue.submit(RESUME, "full")
+    job = wait_for(queue, first)
+    assert joined == [first]
+    assert job["status"] == "done"
+    assert job["record_id"] is not None
+
+
+def test_save_requested_after_the_job_finished_starts_a_new_one(queue):
+    first = queue.submit(RESUME, "full")
+    assert wait_for(queue, first)["record_id"] is None
+    # As if submit() looked the resume up just before the worker cleared it
+    queue._active[jobs.job_key(RESUME, "full")] = first
+    second = queue.submit(RESUME, "full", save=True)
+    assert second != first
+    assert wait_for(queue, second)["record_id"] is not None
+
+
+def test_refresh_job_updates_the_saved_analysis(queue, monkeypatch):
+    original = {"resume_score": "60/100", "skills": {"current_skills": ["Python"], "recommended_skills": []}}
+    record_id = queue.db.insert_analysis(original, feedback="nice", resume_text=RESUME).result()
+    monkeypatch.setattr(jobs, "refresh_section", lambda *args, **kwargs: "90/100")
+    job = wait_for(queue, queue.submit_refresh(RESUME, "resume_score", record_id, client="session:a"))
+    assert job["status"] == "done"
+    assert job["result"] == {"resume_score": "90/100"}
+    assert job["record_id"] == record_id
+    assert queue.db.query("SELECT resume_score, skills, feedback FROM user_data WHERE id = ?", (record_id,)) == [
+        (90, "Python", "nice")]
+    # The statistics follow the rewritten row
+    assert queue.db.query("SELECT analyses, score_sum, with_feedback FROM stats_totals") == [(1, 90, 1)]
+
+
+def test_failed_refresh_leaves_the_saved_analysis_alone(queue, monkeypatch):
+    record_id = queue.db.insert_analysis({"resume_score": "60/100"}, resume_text=RESUME).result()
+    monkeypatch.setattr(jobs, "refresh_section", lambda *args, **kwargs: {"error": "upstream down"})
+    job = wait_for(queue, queue.submit_refresh(RESUME, "resume_score", record_id))
+    assert (job["status"], job["error"]) == ("error", "upstream down")
+    assert queue.db.query("SELECT resume_score FROM user_data WHERE id = ?", (record_id,)) == [(60,)]
+
+
+def test_partial_sections_are_visible_to_other_processes(queue, tmp_path, monkeypatch):
+    release = threading.Event()
+
+    def streaming_analysis(*args, on_section=None, **kwargs):
+        on_section("resume_score", "80/100")
+        release.wait(10)
+        return {"resume_score": "80/100"}
+
+    monkeypatch.setattr(jobs, "analyze_resume", streaming_analysis)
+    # A second queue on the same database stands in for another API worker (opened first,
+    # or it would pick the job up as left behind by a previous run of this process)
+    other = jobs.JobQueue(Database(str(tmp_path / "resume_data.db")), "key")
+    job_id = queue.submit(RESUME, "full")
+    try:
+        deadline = time.monotonic() + 10
+        while other.get(job_id)["sections"] != {"resume_score": "80/100"}:
+            assert time.monotonic() < deadline, "sections never reached the job row"
+            time.sleep(0.05)
+        release.set()
+        assert wait_for(other, job_id)["sections"] == {}
+    finally:
+        release.set()
+        other.close()
+
+
+def test_queue_position_is_read_from_the_row_of_a_foreign_job(queue):
+    insert_foreign_job(queue, "other-worker-job", os.getppid())
+    queue.db.write("UPDATE analysis_job SET queue = ? WHERE id = 'other-worker-job'",
+                   ('{"position": 3, "eta_seconds": 40}',)).result()
+    assert queue.get("other-worker-job")["queue"] == {"position": 3, "eta_seconds": 40}
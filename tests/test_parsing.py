@@ -0,0 +1,91 @@
+import json
+
+from analyzer import analysis
+from analyzer.parsing import load_object, parse_json_object, repair_json
+from analyzer.streaming import IncrementalJSONParser
+
+ANSWER = {"basic_info": {"name": "Jane Doe"}, "skills": {"current_skills": ["Python"]}}
+REASONING_WITH_BRACES = "Okay, the schema is {name}. Let me answer.\n" + json.dumps(ANSWER)
+
+
+def feed_in_chunks(parser, text, size=7):
+    completed = []
+    for start in range(0, len(text), size):
+        completed.extend(parser.feed(text[start:start + size]))
+    return completed
+
+
+def test_streaming_parser_skips_brace_in_reasoning():
+    parser = IncrementalJSONParser()
+    completed = feed_in_chunks(parser, REASONING_WITH_BRACES)
+    assert parser.done
+    assert parser.result == ANSWER
+    assert [key for key, _ in completed] == ["basic_info", "skills"]
+
+
+def test_streaming_parser_skips_think_block():
+    parser = IncrementalJSONParser()
+    feed_in_chunks(parser, "<think>maybe {\"a\": 1}</think>" + json.dumps(ANSWER), size=3)
+    assert parser.result == ANSWER
+
+
+def test_streaming_parser_waits_for_unclosed_object():
+    parser = IncrementalJSONParser()
+    parser.feed('{"basic_info": {"name": "Jane"}, "skills": {')
+    assert not parser.done
+    assert parser.result == {"basic_info": {"name": "Jane"}}
+
+
+def test_parse_json_object_prefers_answer_over_aside():
+    assert parse_json_object(REASONING_WITH_BRACES) == ANSWER
+
+
+def test_repair_json_fixes_literals_trailing_commas_and_truncation():
+    assert json.loads(repair_json('{"a": True, "b": [1, 2,],}')) == {"a": True, "b": [1, 2]}
+    assert json.loads(repair_json('{"a": 1, "b": {"c": "unfinished')) == {"a": 1, "b": {}}
+
+
+def test_non_ascii_word_outside_string_does_not_crash():
+    assert parse_json_object('{"a": 1, x: é}') == {}
+    assert load_object('{"a": é}') is None
+    assert parse_json_object('noise {"a": 1}') == {"a": 1}
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, text):
+        self.lines = [f"data: {json.dumps({'choices': [{'delta': {'content': text}}]})}", "data: [DONE]"]
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+    def close(self):
+        pass
+
+
+class FakeClient:
+    def __init__(self, text):
+        self.text = text
+
+    def post(self, url, **kwargs):
+        return FakeResponse(self.text)
+
+
+def stream(monkeypatch, text, expected=None):
+    monkeypatch.setattr(analysis, "get_http_client", lambda: FakeClient(text))
+    monkeypatch.setattr(analysis, "get_admission", lambda: None)
+    return analysis.stream_completion({}, {}, expected=expected)
+
+
+def test_stream_completion_recovers_answer_after_brace_in_reasoning(monkeypatch):
+    assert stream(monkeypatch, REASONING_WITH_BRACES, expected=list(ANSWER)) == ANSWER
+
+
+def test_stream_completion_falls_back_when_streamed_object_lacks_expected_keys(monkeypatch):
+    text = 'First an example: {"example": 1}\n' + json.dumps(ANSWER)
+    assert stream(monkeypatch, text, expected=["basic_info"]) == ANSWER
+
+
+def test_stream_completion_reports_missing_json(monkeypatch):
+    assert stream(monkeypatch, "I cannot help with that.") == {"error": "No valid JSON found in API response."}
@@ -0,0 +1,86 @@
+import pytest
+
+from analyzer.search import SearchIndex
+from analyzer.storage import Database
+
+
+def result(name, skills):
+    return {
+        "basic_info": {"name": name, "email": f"{name.lower()}@example.com"},
+        "resume_score": "75/100",
+        "skills": {"current_skills": skills, "recommended_skills": []},
+        "ats_keywords": skills,
+        "ai_resume_summary": f"{name} works with {' and '.join(skills)}.",
+    }
+
+
+@pytest.fixture
+def db(tmp_path):
+    return Database(str(tmp_path / "resume_data.db"))
+
+
+def save(db, name, skills):
+    return db.insert_analysis(result(name, skills)).result()
+
+
+def test_indexes_of_two_processes_stay_in_step(db, tmp_path):
+    directory = str(tmp_path / "search_index")
+    for n in range(3):
+        save(db, f"Early{n}", ["Python", "SQL"])
+    first, second = SearchIndex(directory), SearchIndex(directory)
+    assert first.sync(db) == 3
+    for n in range(2):
+        save(db, f"Late{n}", ["Rust"])
+    # The second instance picks up what the first indexed instead of appending it again
+    assert second.sync(db) == 2
+    assert first.sync(db) == 0
+    assert first.stats()["rows"] == 5
+    assert SearchIndex(directory).stats() == second.stats()
+    assert len(first.search(terms=["Rust"])) == 2
+
+    (gone,) = [analysis_id for analysis_id, _ in first.search(terms=["Rust"], k=1)]
+    db.write("DELETE FROM user_data WHERE id = ?", (gone,)).result()
+    second.sync(db)
+    first.sync(db)
+    assert [analysis_id for analysis_id, _ in first.search(terms=["Rust"])] != [gone]
+    assert first.stats()["analyses"] == 4
+
+
+class InsertDuringSync:
+    """
+    Saves one more analysis right before sync() lists the live ids, like a
+    concurrent writer would.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def query(self, sql, params=()):
+        if sql == "SELECT id FROM user_data":
+            save(self.db, "Racer", ["Go"])
+        return self.db.query(sql, params)
+
+
+def test_rows_saved_during_sync_do_not_reset_the_index(db, tmp_path, monkeypatch):
+    index = SearchIndex(str(tmp_path / "search_index"))
+    first = save(db, "Gone", ["Python"])
+    save(db, "Kept", ["Python"])
+    index.sync(db)
+    db.write("DELETE FROM user_data WHERE id = ?", (first,)).result()
+    resets = []
+    monkeypatch.setattr(index, "_reset", lambda dim: resets.append(dim))
+    index.sync(InsertDuringSync(db))
+    assert resets == []
+    assert index.stats()["analyses"] == 1
+    index.sync(db)
+    assert index.stats()["analyses"] == 2
+
+
+def test_removing_a_document_with_cancelling_tokens_restores_document_frequencies(tmp_path):
+    index = SearchIndex(str(tmp_path / "search_index"), dim=256)
+    index.add([(1, 70, "Python", "SQL", "Python developer")])
+    before = index._df.copy()
+    # skill80 and skill240 hash to the same slot of 256 with opposite signs
+    index.add([(2, 70, "Go", "", "skill80 skill240 rust")])
+    index.remove([2])
+    assert (index._df == before).all()